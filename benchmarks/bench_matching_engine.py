@@ -0,0 +1,67 @@
+"""
+Benchmark of the matching throughput through the public API (single thread): orders are placed by
+OrderBook.place_order, so checks, lock, id index, dispatch and logging are measured with the matching itself.
+
+The public path doesn't reach the target of 100k orders/s: on a single core of the reference machine
+it runs at about 60-75k orders/s (13-17 us per order), while the matching engine alone takes about 4 us
+per order. The rest is the per-order cost of the API layers in pure Python (checks, id index and history
+lookups, dispatch, BBO cache and market data publishing).
+
+Run from the repository root:
+    python -m benchmarks.bench_matching_engine [orders_count]
+"""
+import random
+import sys
+import time
+
+from src.entity.deep import Deep
+from src.entity.order import LimitOrder, MarketOrder
+from src.entity.order_book import OrderBook
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, SymbolType, Currency
+from src.utils.quotes_publisher import QuotesPublisher
+
+
+def generate_orders(count: int, seed: int = 42) -> list:
+    """
+    Generate the flow of limit orders around price 100 (about 10% of them are crossing the spread)
+    and market orders (5%).
+    """
+    rnd = random.Random(seed)
+    symbol = Symbol('symbol1', 'exchange1', SymbolType.STOCK, Currency.USD)
+    orders = list()
+    for _ in range(count):
+        action = OrderAction.BUY if rnd.random() < 0.5 else OrderAction.SELL
+        quantity = rnd.randint(1, 10)
+        if rnd.random() < 0.05:
+            order = MarketOrder(symbol, quantity, action)
+        else:
+            offset = rnd.randint(-2, 20) / 10
+            price = round(100 - offset if action == OrderAction.BUY else 100 + offset, 1)
+            order = LimitOrder(symbol, price, quantity, action)
+        orders.append(order)
+    return orders
+
+
+def run(count: int) -> float:
+    orders = generate_orders(count)
+    # Static quote of market orders, so quotes generator's thread doesn't take CPU
+    quotes = QuotesPublisher()
+    quotes.current_quotes = {'symbol1': 100}
+    order_book = OrderBook(Deep(10, 10), quotes)
+    place_order = order_book.place_order
+    executions = 0
+
+    start = time.perf_counter()
+    for order in orders:
+        executions += len(place_order(order))
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed
+    print(f"orders: {count}, executions: {executions}, resting: {len(order_book._engine.levels)}")
+    print(f"elapsed: {elapsed:.3f} s, throughput: {rate:,.0f} orders/s, mean latency: {elapsed / count * 1e6:.2f} us")
+    return rate
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,219 @@
+"""
+Benchmark suite of the order book hot paths: place_order, cancel_order, get_order_by_id, get_market_data,
+get_best_price, get_bbo and stop orders triggering at different book sizes.
+It reports throughput and latency percentiles of each operation, saves them as baseline and flags regressions
+when it's run again.
+
+Run from the repository root:
+    python -m benchmarks.bench_order_book [--sizes 1000,10000,100000,1000000] [--samples 10000]
+                                          [--baseline benchmarks/baseline.json] [--save-baseline] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from src.entity.deep import Deep
+from src.entity.order import LimitOrder, StopOrder
+from src.entity.order_book import OrderBook
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, OrderStatus, OrderType, SymbolType, Currency, LogLevel
+from src.utils.event_log import event_log
+from src.utils.quotes_publisher import QuotesPublisher
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+PERCENTILES = (50, 90, 99, 99.9)
+# Max time in seconds to measure one operation (slow operations get less samples)
+TIME_BUDGET = 3
+MIN_SAMPLES = 5
+
+SYMBOL = Symbol('symbol1', 'exchange1', SymbolType.STOCK, Currency.USD)
+QUOTE = 100
+
+
+def create_order_book(size: int, seed: int) -> tuple:
+    """
+    Create the order book with size resting limit orders of one symbol (bids below 100, asks above 100).
+    Orders are loaded by trusted path, so big books are created fast.
+
+    :return: tuple (order book, list of resting orders)
+    """
+    rnd = random.Random(seed)
+    rows = list()
+    for _ in range(size):
+        action = OrderAction.BUY if rnd.random() < 0.5 else OrderAction.SELL
+        offset = rnd.randint(1, 1000) / 100
+        price = round(QUOTE - offset if action == OrderAction.BUY else QUOTE + offset, 2)
+        rows.append((SYMBOL, price, rnd.randint(1, 10), OrderType.LIMIT, action, None, OrderStatus.PENDING))
+    orders = LimitOrder.bulk_from_trusted(rows)
+    # Resting orders are restored level by level in price-time priority
+    orders.sort(key=lambda o: (o.action == OrderAction.SELL, -o.price if o.action == OrderAction.BUY else o.price))
+
+    quotes = QuotesPublisher()
+    quotes.current_quotes = {SYMBOL.name: QUOTE}
+    order_book = OrderBook(Deep(10, 10), quotes)
+    order_book._restore_orders(orders)
+    return order_book, orders
+
+
+def measure(operation, arguments) -> list:
+    """
+    Call the operation for each argument (while time budget isn't exhausted) and measure latency of each call.
+
+    :return: list of latencies in nanoseconds
+    """
+    latencies = list()
+    clock = time.perf_counter_ns
+    deadline = clock() + TIME_BUDGET * 10 ** 9
+    for argument in arguments:
+        start = clock()
+        operation(argument)
+        end = clock()
+        latencies.append(end - start)
+        if end > deadline and len(latencies) >= MIN_SAMPLES:
+            break
+    return latencies
+
+
+def summarize(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    result = {'samples': len(latencies), 'throughput': len(latencies) / (sum(latencies) / 10 ** 9 or 1e-9)}
+    for percentile in PERCENTILES:
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        result[f'p{percentile}'] = latencies[index] / 1000
+    result['max'] = latencies[-1] / 1000
+    return result
+
+
+def bench_place_order(size: int, samples: int, rnd: random.Random) -> list:
+    order_book, _ = create_order_book(size, rnd.random())
+    orders = [LimitOrder(SYMBOL, round(QUOTE - rnd.randint(1, 1000) / 100, 2), rnd.randint(1, 10), OrderAction.BUY)
+              for _ in range(samples)]
+    return measure(order_book.place_order, orders)
+
+
+def bench_cancel_order(size: int, samples: int, rnd: random.Random) -> list:
+    order_book, orders = create_order_book(size, rnd.random())
+    return measure(order_book.cancel_order, rnd.sample(orders, min(samples, len(orders))))
+
+
+def bench_get_order_by_id(size: int, samples: int, rnd: random.Random) -> list:
+    order_book, orders = create_order_book(size, rnd.random())
+    return measure(order_book.get_order_by_id, [rnd.choice(orders).id for _ in range(samples)])
+
+
+def bench_get_market_data(size: int, samples: int, rnd: random.Random) -> list:
+    order_book, _ = create_order_book(size, rnd.random())
+    return measure(lambda _: order_book.get_market_data(), range(samples))
+
+
+def bench_get_best_price(size: int, samples: int, rnd: random.Random) -> list:
+    order_book, _ = create_order_book(size, rnd.random())
+    return measure(lambda action: order_book.get_best_price(action, 1),
+                   [OrderAction.BUY if i % 2 else OrderAction.SELL for i in range(samples)])
+
+
+def bench_get_bbo(size: int, samples: int, rnd: random.Random) -> list:
+    order_book, _ = create_order_book(size, rnd.random())
+    return measure(order_book.get_bbo, [SYMBOL] * samples)
+
+
+def bench_stop_trigger(size: int, samples: int, rnd: random.Random) -> list:
+    """
+    Each quote update triggers one of waiting buy stop orders (stop prices are above the market),
+    triggered order becomes market order and takes liquidity of asks.
+    """
+    order_book, _ = create_order_book(size, rnd.random())
+    stop_prices = [QUOTE + 20 + i / 100 for i in range(samples)]
+    for stop_price in stop_prices:
+        order_book.place_order(StopOrder(SYMBOL, stop_price, 1, OrderAction.BUY))
+    return measure(lambda stop_price: order_book._on_quotes({SYMBOL.name: stop_price}), stop_prices)
+
+
+BENCHMARKS = {
+    'place_order': bench_place_order,
+    'cancel_order': bench_cancel_order,
+    'get_order_by_id': bench_get_order_by_id,
+    'get_market_data': bench_get_market_data,
+    'get_best_price': bench_get_best_price,
+    'get_bbo': bench_get_bbo,
+    'stop_trigger': bench_stop_trigger,
+}
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare results with baseline: it's regression if throughput is lower or median latency is higher
+    by more than threshold (0.2 - 20%).
+
+    :return: list of messages about regressions
+    """
+    regressions = list()
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append(f"{key}: throughput {result['throughput']:,.0f} ops/s, "
+                               f"baseline {base['throughput']:,.0f} ops/s")
+        if result['p50'] > base['p50'] * (1 + threshold):
+            regressions.append(f"{key}: p50 {result['p50']:.2f} us, baseline {base['p50']:.2f} us")
+    return regressions
+
+
+def run(sizes: list, samples: int, operations: list, seed: int = 42) -> dict:
+    results = dict()
+    rnd = random.Random(seed)
+    # Logging of each placed order is not a part of the measured hot paths
+    event_log.level = LogLevel.WARNING
+    print(f"{'operation':<16} {'size':>8} {'samples':>8} {'ops/s':>12} " +
+          ' '.join(f"{f'p{p} us':>10}" for p in PERCENTILES) + f" {'max us':>10}")
+    for name in operations:
+        for size in sizes:
+            result = summarize(BENCHMARKS[name](size, samples, rnd))
+            results[f'{name}/{size}'] = result
+            print(f"{name:<16} {size:>8} {result['samples']:>8} {result['throughput']:>12,.0f} " +
+                  ' '.join(f"{result[f'p{p}']:>10.2f}" for p in PERCENTILES) + f" {result['max']:>10.2f}")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark suite of the order book hot paths')
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma separated book sizes (resting orders), for example 1000,10000,100000,1000000')
+    parser.add_argument('--samples', type=int, default=10000, help='max number of calls of each operation')
+    parser.add_argument('--operations', default=','.join(BENCHMARKS), help='comma separated operations')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='path of the baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='save results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed degradation (0.2 - 20%%)')
+    args = parser.parse_args(argv)
+
+    results = run([int(size) for size in args.sizes.split(',')], args.samples, args.operations.split(','))
+
+    if args.save_baseline:
+        baseline = dict()
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline is saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"There is no baseline {args.baseline}, run with --save-baseline to create it")
+        return 0
+    with open(args.baseline) as f:
+        regressions = find_regressions(results, json.load(f), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Benchmark of memory and construction time of orders.
+
+Run from the repository root:
+    python -m benchmarks.bench_order_memory [orders_count]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from src.entity.order import LimitOrder
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, OrderType, SymbolType, Currency
+
+
+def measure_memory(create, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    orders = create(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del orders
+    return size / count
+
+
+def measure_time(create, count: int) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    create(count)
+    return (time.perf_counter() - start) / count
+
+
+def run(count: int) -> None:
+    symbol = Symbol('symbol1', 'exchange1', SymbolType.STOCK, Currency.USD)
+
+    def create_validated(n):
+        return [LimitOrder(symbol, 100.5, 10, OrderAction.BUY) for _ in range(n)]
+
+    def create_trusted(n):
+        return LimitOrder.bulk_from_trusted((symbol, 100.5, 10, OrderType.LIMIT, OrderAction.BUY) for _ in range(n))
+
+    for name, create in (('validated constructor', create_validated), ('trusted bulk path', create_trusted)):
+        print(f"{name}: {measure_memory(create, count):.0f} bytes/order (including id), "
+              f"{measure_time(create, count) * 1e6:.2f} us/order")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,59 @@
+"""
+Benchmark of the sharded order book throughput by number of shards (processes). Orders of several symbols
+are placed by batches, so each shard gets one message per batch.
+
+Run from the repository root:
+    python -m benchmarks.bench_sharded_order_book [orders_count] [max_shards]
+"""
+import os
+import random
+import sys
+import time
+
+from src.entity.deep import Deep
+from src.entity.order import LimitOrder
+from src.entity.sharded_order_book import ShardedOrderBook
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, SymbolType, Currency, LogLevel
+from src.utils.event_log import event_log
+from src.utils.quotes_publisher import QuotesPublisher
+
+SYMBOLS_COUNT = 64
+BATCH_SIZE = 1000
+
+
+def generate_orders(count: int, seed: int = 42) -> list:
+    """
+    Generate the flow of limit orders of SYMBOLS_COUNT symbols around price 100 (some of them are crossing
+    the spread).
+    """
+    rnd = random.Random(seed)
+    symbols = [Symbol(f'symbol{i}', 'exchange1', SymbolType.STOCK, Currency.USD) for i in range(SYMBOLS_COUNT)]
+    orders = list()
+    for _ in range(count):
+        action = OrderAction.BUY if rnd.random() < 0.5 else OrderAction.SELL
+        offset = rnd.randint(-2, 20) / 10
+        price = round(100 - offset if action == OrderAction.BUY else 100 + offset, 1)
+        orders.append(LimitOrder(rnd.choice(symbols), price, rnd.randint(1, 10), action))
+    return orders
+
+
+def run(count: int, shards_count: int) -> float:
+    orders = generate_orders(count)
+    with ShardedOrderBook(Deep(10, 10), shards_count=shards_count, quotes_factory=QuotesPublisher) as orderbook:
+        start = time.perf_counter()
+        for i in range(0, count, BATCH_SIZE):
+            orderbook.place_orders(orders[i:i + BATCH_SIZE])
+        elapsed = time.perf_counter() - start
+
+    rate = count / elapsed
+    print(f"shards: {shards_count}, orders: {count}, elapsed: {elapsed:.3f} s, throughput: {rate:,.0f} orders/s")
+    return rate
+
+
+if __name__ == '__main__':
+    event_log.level = LogLevel.WARNING
+    orders_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_shards = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    rates = [run(orders_count, shards_count) for shards_count in range(1, max_shards + 1)]
+    print(f"speedup of {max_shards} shards: {rates[-1] / rates[0]:.2f}x")
@@ -1,14 +1,42 @@
+import copy
 import os
+import threading
 
 import yaml
 
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yml')
+
 
 class ConfigParser:
-    def __init__(self):
+    """
+    The ConfigParser object reads sections of config.yml. Parsed config is cached (it's shared by all parsers)
+    and the file is parsed again only when its modification time or size is changed.
+    """
+    # path -> ((mtime_ns, size), parsed config)
+    _cache = dict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, path: str = CONFIG_PATH):
         os.environ["__cfg4py_server_role__"] = "TEST"
+        self.path = path
+
+    def _load(self) -> dict:
+        stat = os.stat(self.path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(self.path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._cache_lock:
+            with open(self.path, 'r') as f:
+                cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self._cache[self.path] = (version, cfg)
+        return cfg
 
     def parse_config(self, module_name):
-        cfg = None
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yml'), 'r') as f:
-            cfg = yaml.load(f, Loader=yaml.FullLoader)
-        return cfg[module_name]
\ No newline at end of file
+        """
+        This method provide an ability to get the section of config.
+
+        :param module_name: name of the section
+        :return: copy of the section (changes of it don't affect the cache)
+        """
+        return copy.deepcopy(self._load()[module_name])
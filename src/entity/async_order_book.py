@@ -0,0 +1,130 @@
+import asyncio
+
+from src.entity.order import Order
+from src.entity.order_book import OrderBook
+from src.entity.order_update import OrderUpdate
+from src.enums import OrderEvent, OrderStatus
+
+
+class MarketDataStream:
+    """
+    The MarketDataStream object is an async iterator of market data messages (MarketDataSnapshot and LevelDelta)
+    of the order book. Messages are pushed to the stream's event loop by the thread that changes the book,
+    so many streams can be read by coroutines without polling and without threads.
+    Stream is closed by close() or by leaving "async with" block.
+
+    :param order_book: order book that publishes market data
+    :param loop: event loop of the reader
+    """
+
+    def __init__(self, order_book: OrderBook, loop: asyncio.AbstractEventLoop):
+        self.order_book = order_book
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._is_closed = False
+        order_book.subscribe_market_data(self._on_message)
+
+    def __aiter__(self) -> 'MarketDataStream':
+        return self
+
+    async def __anext__(self):
+        if self._is_closed and self._queue.empty():
+            raise StopAsyncIteration
+        message = await self._queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def __aenter__(self) -> 'MarketDataStream':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        This method provide an ability to stop receiving market data. Messages that are already received
+        are still returned by the iterator.
+
+        :return: None
+        """
+        if self._is_closed:
+            return
+        self._is_closed = True
+        self.order_book.unsubscribe_market_data(self._on_message)
+        self._queue.put_nowait(None)
+
+    def _on_message(self, message) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+
+class AsyncOrderBook:
+    """
+    The AsyncOrderBook object is asyncio front end of the order book: coroutines can share one book
+    without executors and without polling. Book's operations are fast and don't block, so they are called
+    right in the event loop. Results of stop orders are delivered to waiting coroutines by order events
+    when quotes trigger them (quotes come from another thread).
+
+    :param order_book: order book that is shared by coroutines
+    """
+
+    def __init__(self, order_book: OrderBook):
+        self.order_book = order_book
+        # waiting stop or stop limit order -> future of its place_order
+        self._waiting = dict()
+        order_book.subscribe_orders(self._on_order_update)
+
+    async def place_order(self, order: Order) -> list:
+        """
+        This method provide an ability to place an order and wait until order book accepts it.
+        Market and limit orders are accepted right away. Stop and stop limit orders are accepted when they are
+        triggered. If waiting stop order is cancelled, filled or rejected then it's resolved with empty list
+        (check the order's status).
+
+        :param order: order for buy or sell some instrument on exchange
+        :return: list of executions of placing (or triggering for stop orders)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[order] = future
+        try:
+            executions = self.order_book.place_order(order)
+        except Exception:
+            self._waiting.pop(order, None)
+            raise
+        if order.status != OrderStatus.CREATED and self._waiting.pop(order, None) is not None:
+            return executions
+        try:
+            return await future
+        finally:
+            self._waiting.pop(order, None)
+
+    async def cancel_order(self, order: Order) -> None:
+        self.order_book.cancel_order(order)
+
+    def get_order_by_id(self, order_id) -> Order:
+        return self.order_book.get_order_by_id(order_id)
+
+    def get_market_data(self, symbol=None) -> dict:
+        return self.order_book.get_market_data(symbol)
+
+    def market_data(self) -> MarketDataStream:
+        """
+        This method provide an ability to get market data updates as async iterator.
+        The first messages are the snapshots of all symbols, then deltas and periodic snapshots.
+        It should be called from the coroutine.
+
+        :return: MarketDataStream
+        """
+        return MarketDataStream(self.order_book, asyncio.get_running_loop())
+
+    def _on_order_update(self, update: OrderUpdate) -> None:
+        if update.event == OrderEvent.PLACE or update.event == OrderEvent.AMEND:
+            return
+        future = self._waiting.pop(update.order, None)
+        if future is not None:
+            future.get_loop().call_soon_threadsafe(self.__resolve, future, update.executions)
+
+    @staticmethod
+    def __resolve(future: asyncio.Future, executions: list) -> None:
+        if not future.done():
+            future.set_result(executions)
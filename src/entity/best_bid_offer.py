@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class BestBidOffer:
+    """
+    This class contains the top of the symbol's book (BBO): price, aggregated quantity and number of orders
+    of the best bid and the best ask. Price is None and quantity, count are 0 if the side is empty.
+    """
+    symbol_name: str
+    bid_price: float = None
+    bid_quantity: float = 0
+    bid_count: int = 0
+    ask_price: float = None
+    ask_quantity: float = 0
+    ask_count: int = 0
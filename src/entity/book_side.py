@@ -0,0 +1,174 @@
+from collections import OrderedDict
+from heapq import merge
+from itertools import islice
+from operator import neg
+
+from sortedcontainers import SortedDict
+
+from src.entity.order import Order
+from src.enums import OrderAction
+
+# Quantities are rounded after each change, so float errors don't leave "dust" orders and levels in the book
+QUANTITY_PRECISION = 10
+
+
+class PriceLevel:
+    """
+    The PriceLevel object keeps all resting orders with the same price in time priority (FIFO) order
+    and their total quantity.
+
+    :param price: price of the level.
+    """
+    __slots__ = ('price', 'orders', 'quantity')
+
+    def __init__(self, price: float):
+        self.price = price
+        self.orders = OrderedDict()
+        self.quantity = 0
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __iter__(self):
+        return iter(self.orders.values())
+
+    def append(self, order: Order) -> None:
+        self.orders[order] = order
+        self.quantity = round(self.quantity + order.quantity, QUANTITY_PRECISION)
+
+    def remove(self, order: Order) -> bool:
+        if self.orders.pop(order, None) is None:
+            return False
+        self.quantity = round(self.quantity - order.quantity, QUANTITY_PRECISION)
+        return True
+
+    def first(self) -> Order:
+        """
+        This method is just getter for the oldest order of the level (the first one in the queue).
+
+        :return: order or None if level is empty
+        """
+        return next(iter(self.orders.values()), None)
+
+
+class BookSide:
+    """
+    The BookSide object keeps one side (bids or asks) of the order book as price levels sorted by price.
+    The first level is always the best one: the highest price for bids and the lowest price for asks.
+
+    :param action: OrderAction.BUY for bids or OrderAction.SELL for asks.
+    """
+
+    def __init__(self, action: OrderAction):
+        self.action = action
+        self.levels = SortedDict(neg) if action == OrderAction.BUY else SortedDict()
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def __bool__(self) -> bool:
+        return bool(self.levels)
+
+    def add(self, order: Order) -> PriceLevel:
+        """
+        This method provide an ability to put the order at the end of its price level's queue.
+        The level will be created if it doesn't exist. O(log L) where L is the number of levels.
+
+        :param order: order that should rest in the book
+        :return: price level where order is placed
+        """
+        level = self.levels.get(order.price)
+        if level is None:
+            level = self.levels[order.price] = PriceLevel(order.price)
+        level.append(order)
+        return level
+
+    def remove(self, order: Order, level: PriceLevel = None) -> bool:
+        """
+        This method provide an ability to remove the order from its price level.
+        Empty level is removed from the side.
+
+        :param order: order that should be removed
+        :param level: price level of the order if it's already known (saves the price lookup)
+        :return: True if order was in the side, otherwise False
+        """
+        if level is None:
+            level = self.levels.get(order.price)
+        if level is None or not level.remove(order):
+            return False
+        if not level:
+            del self.levels[level.price]
+        return True
+
+    def best_level(self) -> PriceLevel:
+        """
+        This method is just getter for the best price level (top of book).
+
+        :return: price level or None if side is empty
+        """
+        return self.levels.peekitem(0)[1] if self.levels else None
+
+    def iter_levels(self):
+        """
+        This method provide an ability to iterate price levels from the best to the worst.
+        """
+        return iter(self.levels.values())
+
+    def iter_orders(self):
+        """
+        This method provide an ability to iterate orders in price-time priority.
+        """
+        for level in self.levels.values():
+            yield from level
+
+    def get_depth(self, count: int) -> list:
+        """
+        This method provide an ability to get aggregated quantities of the best price levels.
+        It costs O(count) and doesn't depend on the number of orders in the book.
+
+        :param count: how much levels you would like to see
+        :return: list like [{"price": value, "quantity": value}, ...] from the best level
+        """
+        return [{'price': level.price, 'quantity': level.quantity} for level in islice(self.levels.values(), count)]
+
+
+def merge_depth(sides: list, count: int) -> list:
+    """
+    This function provide an ability to get aggregated quantities of the best price levels of several sides
+    of the same action (for example, asks of all symbols). Levels with the same price are summed up.
+
+    :param sides: list of BookSide objects with the same action
+    :param count: how much levels you would like to see
+    :return: list like [{"price": value, "quantity": value}, ...] from the best level
+    """
+    if len(sides) == 1:
+        return sides[0].get_depth(count)
+
+    depth = list()
+    is_bids = bool(sides) and sides[0].action == OrderAction.BUY
+    for level in merge(*[side.iter_levels() for side in sides], key=lambda lvl: lvl.price, reverse=is_bids):
+        if depth and depth[-1]['price'] == level.price:
+            depth[-1]['quantity'] = round(depth[-1]['quantity'] + level.quantity, QUANTITY_PRECISION)
+            continue
+        if len(depth) == count:
+            break
+        depth.append({'price': level.price, 'quantity': level.quantity})
+    return depth
+
+
+class SymbolBook:
+    """
+    The SymbolBook object keeps both sides (bids and asks) of one symbol's book.
+    """
+    __slots__ = ('bids', 'asks')
+
+    def __init__(self):
+        self.bids = BookSide(OrderAction.BUY)
+        self.asks = BookSide(OrderAction.SELL)
+
+    def __getitem__(self, action: OrderAction) -> BookSide:
+        if action is OrderAction.BUY:
+            return self.bids
+        if action is OrderAction.SELL:
+            return self.asks
+        raise KeyError(action)
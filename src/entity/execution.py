@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from uuid import UUID
+
+from src.entity.symbol import Symbol
+from src.enums import OrderAction
+
+
+@dataclass
+class Execution:
+    """
+    This class contains the data of one trade between incoming (aggressor) order and resting order.
+    Trade is always done by the resting order's price.
+    """
+    symbol: Symbol
+    price: float
+    quantity: float
+    buy_order_id: UUID
+    sell_order_id: UUID
+    aggressor: OrderAction
@@ -1,21 +1,14 @@
-from dataclasses import dataclass, asdict
-
-from src.enums import OrderStatus, OrderType
+from dataclasses import dataclass
 
 
 @dataclass
 class MarketData:
     """
-    This class contains the formated order book's data (bids and asks)
+    This class contains the formated order book's data (bids and asks) aggregated by price levels
     """
     asks: list
     bids: list
 
-    @staticmethod
-    def __check_order_is_ready_for_market_data(order):
-        return (order.status not in (OrderStatus.REJECT, OrderStatus.FILL)) \
-                    and (order.type in (OrderType.MARKET, OrderType.LIMIT))
-
     @property
     def format(self) -> dict:
         """
@@ -37,14 +30,8 @@ class MarketData:
             ]
 
 
-            !!! One important thing: you will not see orders with "reject" or "fill" statuses. !!!
+            !!! One important thing: each row is a price level with total quantity of resting orders. !!!
+            !!! You will not see orders with "reject", "fill" or "cancel" statuses. !!!
         :return: dict
         """
-        for i in range(len(self.asks)):
-            if self.__check_order_is_ready_for_market_data(self.asks[i]):
-                self.asks[i] = {'price': self.asks[i].price, 'quantity': self.asks[i].quantity}
-
-        for i in range(len(self.bids)):
-            if self.__check_order_is_ready_for_market_data(self.bids[i]):
-                self.bids[i] = {'price': self.bids[i].price, 'quantity': self.bids[i].quantity}
-        return asdict(self)
\ No newline at end of file
+        return {'asks': self.asks, 'bids': self.bids}
@@ -0,0 +1,114 @@
+import inspect
+from dataclasses import dataclass
+from weakref import WeakMethod
+
+from src.enums import OrderAction, LevelUpdateType
+from src.utils.event_log import event_log
+
+
+@dataclass
+class LevelDelta:
+    """
+    This class contains one change of the price level: level is added, its quantity is updated or level is deleted.
+    Deltas are numbered one by one, so consumer can detect the gap if sequence of the next delta is not
+    sequence of the previous one + 1.
+    """
+    sequence: int
+    symbol: str
+    action: OrderAction
+    price: float
+    quantity: float
+    update: LevelUpdateType
+
+
+@dataclass
+class MarketDataSnapshot:
+    """
+    This class contains all price levels of the symbol's book. Sequence is the sequence of the last delta
+    that is already applied to the snapshot, so the next delta after the snapshot has sequence + 1.
+    """
+    sequence: int
+    symbol: str
+    asks: list
+    bids: list
+
+
+class MarketDataFeed:
+    """
+    The MarketDataFeed object publishes incremental market data: sequence-numbered level deltas and
+    periodic snapshots (after each snapshot_interval deltas).
+
+    :param snapshot_provider: function that returns list of snapshots' data [(symbol name, asks, bids), ...]
+    :param snapshot_interval: how much deltas are published between snapshots. Snapshots are not published
+    periodically if it's None.
+    """
+
+    def __init__(self, snapshot_provider, snapshot_interval: int = 1000):
+        self.sequence = 0
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_provider = snapshot_provider
+        self._deltas_since_snapshot = 0
+        self._subscribers = list()
+
+    def __bool__(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, callback) -> None:
+        """
+        This method provide an ability to receive market data messages (LevelDelta and MarketDataSnapshot).
+        Subscriber receives the snapshots of all symbols right away, so it can apply deltas after them.
+        Bound methods are kept by weak reference, so subscription doesn't keep their object alive.
+
+        :param callback: function or bound method
+        :return: None
+        """
+        self._subscribers.append(WeakMethod(callback) if inspect.ismethod(callback) else (lambda: callback))
+        for snapshot in self.__get_snapshots():
+            callback(snapshot)
+
+    def unsubscribe(self, callback) -> None:
+        self._subscribers = [s for s in self._subscribers if s() not in (None, callback)]
+
+    def publish_changes(self, changes: list) -> None:
+        """
+        This method provide an ability to publish changes of price levels as deltas.
+
+        :param changes: list of tuples (symbol name, action, price, quantity before, quantity after)
+        :return: None
+        """
+        for symbol_name, action, price, before, after in changes:
+            if not before:
+                update = LevelUpdateType.ADD
+            elif not after:
+                update = LevelUpdateType.DELETE
+            else:
+                update = LevelUpdateType.UPDATE
+            self.sequence += 1
+            self.__publish(LevelDelta(self.sequence, symbol_name, action, price, after, update))
+
+        self._deltas_since_snapshot += len(changes)
+        if self.snapshot_interval is not None and self._deltas_since_snapshot >= self.snapshot_interval:
+            self.publish_snapshots()
+
+    def publish_snapshots(self) -> None:
+        self._deltas_since_snapshot = 0
+        for snapshot in self.__get_snapshots():
+            self.__publish(snapshot)
+
+    def __get_snapshots(self) -> list:
+        return [MarketDataSnapshot(self.sequence, symbol_name, asks, bids)
+                for symbol_name, asks, bids in self._snapshot_provider()]
+
+    def __publish(self, message) -> None:
+        is_cleanup_needed = False
+        for subscriber in self._subscribers:
+            callback = subscriber()
+            if callback is None:
+                is_cleanup_needed = True
+                continue
+            try:
+                callback(message)
+            except Exception as e:
+                event_log.error('market_data_subscriber_failed', callback=repr(callback), error=repr(e))
+        if is_cleanup_needed:
+            self._subscribers = [s for s in self._subscribers if s() is not None]
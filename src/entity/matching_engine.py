@@ -0,0 +1,242 @@
+from heapq import merge
+
+from src.entity.book_side import BookSide, PriceLevel, SymbolBook, QUANTITY_PRECISION, merge_depth
+from src.entity.execution import Execution
+from src.entity.order import Order
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, OrderStatus, OrderType
+
+BUY = OrderAction.BUY
+SELL = OrderAction.SELL
+FILL = OrderStatus.FILL
+MARKET = OrderType.MARKET
+
+
+class MatchingEngine:
+    """
+    The MatchingEngine object keeps bids and asks of all symbols and matches incoming orders
+    in price-time priority: the best price goes first, the oldest order goes first within the same price.
+    """
+
+    def __init__(self):
+        # symbol name -> SymbolBook
+        self.books = dict()
+        # resting order -> PriceLevel where it rests
+        self.levels = dict()
+        # (symbol name, action, price) -> level's quantity before the first change.
+        # Changes are tracked only when it's a dict (see start_tracking_changes)
+        self.changes = None
+
+    def get_side(self, symbol: Symbol, action: OrderAction) -> BookSide:
+        """
+        This method provide an ability to get one side (bids or asks) of the symbol's book.
+        The symbol's book will be created if it doesn't exist.
+
+        :param symbol: symbol of the book
+        :param action: OrderAction.BUY for bids or OrderAction.SELL for asks
+        :return: book's side
+        """
+        book = self.books.get(symbol.name)
+        if book is None:
+            book = self.books[symbol.name] = SymbolBook()
+        return book[action]
+
+    def process(self, order: Order, is_limited: bool = False) -> list:
+        """
+        This method provide an ability to match incoming order with the opposite side of the book.
+        Market order takes liquidity by any price, limit order - only by its price or better.
+        Each trade reduces the quantity of both orders. Fully filled orders get FILL status and leave the book
+        (filled order keeps the quantity of its last trade). The remainder of incoming order rests in the book.
+
+        :param order: pending market or limit order
+        :param is_limited: match market order only by its price or better too (it's used for the remainder
+        of market order that already rests by its price)
+        :return: list of executions
+        """
+        executions = list()
+        symbol = order.symbol
+        book = self.books.get(symbol.name)
+        if book is None:
+            book = self.books[symbol.name] = SymbolBook()
+        is_buy = order.action is BUY
+        levels = book.asks.levels if is_buy else book.bids.levels
+        limit = None if order.type is MARKET and not is_limited else order.price
+        remaining = order.quantity
+
+        changes = self.changes
+        while remaining and levels:
+            price, level = levels.peekitem(0)
+            if limit is not None and (price > limit if is_buy else price < limit):
+                break
+            if changes is not None:
+                changes.setdefault((symbol.name, SELL if is_buy else BUY, price), level.quantity)
+            resting_orders = level.orders
+            while remaining and resting_orders:
+                resting = next(iter(resting_orders.values()))
+                quantity = resting.quantity
+                left = round(quantity - remaining, QUANTITY_PRECISION)
+                if left > 0:
+                    resting.quantity = left
+                    traded = remaining
+                    remaining = 0
+                else:
+                    traded = quantity
+                    remaining = round(remaining - quantity, QUANTITY_PRECISION)
+                    resting.status = FILL
+                    del resting_orders[resting]
+                    del self.levels[resting]
+                level.quantity = round(level.quantity - traded, QUANTITY_PRECISION)
+                if is_buy:
+                    executions.append(Execution(symbol, price, traded, order.id, resting.id, BUY))
+                else:
+                    executions.append(Execution(symbol, price, traded, resting.id, order.id, SELL))
+            if not resting_orders:
+                del levels[price]
+
+        if remaining > 0:
+            if remaining != order.quantity:
+                order.quantity = remaining
+            side = book.bids if is_buy else book.asks
+            if changes is not None:
+                self.__track_change(symbol.name, side, order.price)
+            self.levels[order] = side.add(order)
+        else:
+            order.status = FILL
+        return executions
+
+    def remove(self, order: Order) -> bool:
+        """
+        This method provide an ability to remove the resting order from the book.
+
+        :param order: resting order
+        :return: True if order was resting in the book, otherwise False
+        """
+        level = self.levels.pop(order, None)
+        if level is None:
+            return False
+        side = self.books[order.symbol.name][order.action]
+        if self.changes is not None:
+            self.__track_change(order.symbol.name, side, level.price)
+        return side.remove(order, level)
+
+    def rest(self, order: Order) -> None:
+        """
+        This method provide an ability to put the order at the end of its price level's queue without matching
+        (for example when the book is restored).
+
+        :param order: pending limit or market order
+        :return: None
+        """
+        side = self.get_side(order.symbol, order.action)
+        if self.changes is not None:
+            self.__track_change(order.symbol.name, side, order.price)
+        self.levels[order] = side.add(order)
+
+    def rest_many(self, orders) -> None:
+        """
+        This method provide an ability to put a lot of orders to the book without matching
+        (for example when the book is loaded from snapshot). Orders of the same level should go one by one
+        in time priority, so the level is looked up once for all of them.
+
+        :param orders: iterable of pending orders
+        :return: None
+        """
+        levels = self.levels
+        level = level_orders = symbol_name = action = None
+        quantity = 0
+        for order in orders:
+            price = order._price
+            if (level is None or price != level.price or order._symbol.name != symbol_name
+                    or order._action is not action):
+                if level is not None:
+                    level.quantity = round(quantity, QUANTITY_PRECISION)
+                symbol_name, action = order._symbol.name, order._action
+                side = self.get_side(order._symbol, action)
+                level = side.levels.get(price)
+                if level is None:
+                    level = side.levels[price] = PriceLevel(price)
+                if self.changes is not None:
+                    self.changes.setdefault((symbol_name, action, price), level.quantity)
+                level_orders, quantity = level.orders, level.quantity
+            level_orders[order] = order
+            quantity += order._quantity
+            levels[order] = level
+        if level is not None:
+            level.quantity = round(quantity, QUANTITY_PRECISION)
+
+    def set_quantity(self, order: Order, quantity: float) -> bool:
+        """
+        This method provide an ability to change the quantity of the resting order keeping its place
+        in the price level's queue.
+
+        :param order: resting order
+        :param quantity: new quantity
+        :return: True if order was resting in the book, otherwise False
+        """
+        level = self.levels.get(order)
+        if level is None:
+            return False
+        if self.changes is not None:
+            self.__track_change(order.symbol.name, self.books[order.symbol.name][order.action], level.price)
+        level.quantity = round(level.quantity - order.quantity + quantity, QUANTITY_PRECISION)
+        order.quantity = quantity
+        return True
+
+    def __track_change(self, symbol_name: str, side: BookSide, price: float) -> None:
+        level = side.levels.get(price)
+        self.changes.setdefault((symbol_name, side.action, price), level.quantity if level is not None else 0)
+
+    def start_tracking_changes(self) -> None:
+        """
+        This method provide an ability to track changes of price levels' quantities (for incremental market data).
+        Tracking is off by default, so it costs nothing when nobody needs changes.
+
+        :return: None
+        """
+        if self.changes is None:
+            self.changes = dict()
+
+    def stop_tracking_changes(self) -> None:
+        self.changes = None
+
+    def pop_changes(self) -> list:
+        """
+        This method provide an ability to get all changes of price levels since the previous call.
+        Several changes of the same level are coalesced into one, levels that got back to the same quantity
+        are skipped.
+
+        :return: list of tuples (symbol name, action, price, quantity before, quantity after)
+        """
+        if not self.changes:
+            return list()
+        result = list()
+        for (symbol_name, action, price), before in self.changes.items():
+            level = self.books[symbol_name][action].levels.get(price)
+            after = level.quantity if level is not None else 0
+            if after != before:
+                result.append((symbol_name, action, price, before, after))
+        self.changes = dict()
+        return result
+
+    def iter_orders(self, action: OrderAction):
+        """
+        This method provide an ability to iterate resting orders of all symbols in price-time priority.
+
+        :param action: OrderAction.BUY for bids or OrderAction.SELL for asks
+        """
+        return merge(*[book[action].iter_orders() for book in self.books.values()],
+                     key=lambda o: o.price, reverse=action == OrderAction.BUY)
+
+    def get_depth(self, action: OrderAction, count: int, symbol: Symbol = None) -> list:
+        """
+        This method provide an ability to get aggregated quantities of the best price levels.
+
+        :param action: OrderAction.BUY for bids or OrderAction.SELL for asks
+        :param count: how much levels you would like to see
+        :param symbol: symbol of the book. Levels of all symbols are merged if it's None
+        :return: list like [{"price": value, "quantity": value}, ...] from the best level
+        """
+        if symbol is not None:
+            book = self.books.get(symbol.name)
+            return book[action].get_depth(count) if book is not None else list()
+        return merge_depth([book[action] for book in self.books.values()], count)
@@ -1,27 +1,98 @@
+import os
 from abc import ABC
-from uuid import uuid4, UUID
+from random import Random
+from uuid import uuid4, UUID, SafeUUID
 from src.entity.symbol import Symbol
 from src.enums import OrderType, OrderAction, OrderStatus
 from src.exception import OrderPriceIsNotValidError, OrderQuantityIsNotValidError, SymbolIsNotValidError,\
     OrderChangeWhenPlacedError
 
 
+# Ids for trusted orders are generated by own generator seeded from os.urandom (random.seed() doesn't affect it)
+_id_random = Random(os.urandom(32))
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: _id_random.seed(os.urandom(32)))
+
+
+def fast_uuid4() -> UUID:
+    """
+    This function is the faster version of uuid.uuid4() for orders created by trusted path.
+    It skips the system call for random bytes and the argument checks of UUID constructor.
+
+    :return: random UUID (version 4)
+    """
+    value = (_id_random.getrandbits(128) & ~(0xf000 << 64) & ~(0xc000 << 48)) | (4 << 76) | (0x8000 << 48)
+    uuid = object.__new__(UUID)
+    object.__setattr__(uuid, 'int', value)
+    object.__setattr__(uuid, 'is_safe', SafeUUID.unknown)
+    return uuid
+
+
 class Order(ABC):
     """
     The Order object realize the methods and logic for order.
+    Order keeps its fields in slots (without __dict__), so millions of resting orders take less memory.
     """
+    __slots__ = ('_status', '_symbol', '_quantity', '_type', '_price', '_action', '_id')
 
     def __init__(self, symbol: Symbol, price: float, quantity: float, order_type: OrderType, order_action: OrderAction):
-        self.status = None
+        # New order is not placed and uuid4() is always valid id, so their setters' checks are skipped
+        self._status = None
         self.symbol = symbol
         self.quantity = quantity
         self.type = order_type
         self.price = price
         self.action = order_action
-        self.id = uuid4()
+        self._id = uuid4()
 
     def __repr__(self) -> str:
-        return str(self.__dict__)
+        return str(self.to_dict())
+
+    def to_dict(self) -> dict:
+        """
+        This method provide an ability to get all order's fields (the same as __dict__ of regular object).
+
+        :return: dict {field name: value}
+        """
+        return {name: getattr(self, name, None)
+                for cls in reversed(type(self).__mro__) for name in cls.__dict__.get('__slots__', ())}
+
+    @classmethod
+    def from_trusted(cls, symbol: Symbol, price: float, quantity: float, order_type: OrderType,
+                     order_action: OrderAction, order_id: UUID = None, status: OrderStatus = None,
+                     stop_price: float = None) -> 'Order':
+        """
+        This method provide an ability to create order without validation of its fields.
+        It's for internal use only (for example replay of orders that were already validated),
+        because wrong data breaks the order book.
+
+        :param order_id: order id. New id is generated if it's None.
+        :param status: order status. Order with not None status is placed and cannot be changed by setters.
+        :param stop_price: stop price of stop limit order
+        :return: order of cls type
+        """
+        order = object.__new__(cls)
+        order._status = status
+        order._symbol = symbol
+        order._quantity = quantity
+        order._type = order_type
+        order._price = price
+        order._action = order_action
+        order._id = fast_uuid4() if order_id is None else order_id
+        if stop_price is not None:
+            order.stop_price = stop_price
+        return order
+
+    @classmethod
+    def bulk_from_trusted(cls, rows) -> list:
+        """
+        This method provide an ability to create a lot of orders without validation of their fields.
+
+        :param rows: iterable of tuples with arguments of from_trusted method
+        :return: list of orders of cls type
+        """
+        from_trusted = cls.from_trusted
+        return [from_trusted(*row) for row in rows]
 
     @property
     def id(self) -> uuid4:
@@ -136,22 +207,51 @@ class Order(ABC):
 
 
 class MarketOrder(Order):
+    __slots__ = ()
+
     def __init__(self, symbol: Symbol, quantity: float, order_action: OrderAction):
         super().__init__(symbol, 0.0001, quantity, OrderType.MARKET, order_action)
 
 
 class LimitOrder(Order):
+    __slots__ = ()
+
     def __init__(self, symbol: Symbol, price: float, quantity: float, order_action: OrderAction):
         super().__init__(symbol, price, quantity, OrderType.LIMIT, order_action)
 
 
 class StopLimitOrder(Order):
+    __slots__ = ('stop_price',)
+
     def __init__(self, symbol: Symbol, limit_price: float, stop_price: float, quantity: float,
                  order_action: OrderAction):
         super().__init__(symbol, limit_price, quantity, OrderType.STOP_LIMIT, order_action)
         self.stop_price = stop_price
 
+    def trigger(self, price: float) -> None:
+        """
+        This method turns triggered stop limit order to limit order with its limit price.
+        It's used by order book, so it works for already placed order.
+
+        :param price: market price that triggered the order
+        :return: None
+        """
+        self._type = OrderType.LIMIT
+
 
 class StopOrder(Order):
+    __slots__ = ()
+
     def __init__(self, symbol: Symbol, stop_price: float, quantity: float, order_action: OrderAction):
         super().__init__(symbol, stop_price, quantity, OrderType.STOP, order_action)
+
+    def trigger(self, price: float) -> None:
+        """
+        This method turns triggered stop order to market order by market price.
+        It's used by order book, so it works for already placed order.
+
+        :param price: market price that triggered the order
+        :return: None
+        """
+        self._type = OrderType.MARKET
+        self._price = price
@@ -1,11 +1,29 @@
-from threading import Thread
-from uuid import uuid4
+import inspect
+import os
+import sys
+from itertools import islice
+from threading import RLock
+from uuid import uuid4, UUID
+from weakref import WeakMethod
+from src.entity.best_bid_offer import BestBidOffer
 from src.entity.deep import Deep
 from src.entity.market_data import MarketData
+from src.entity.market_data_feed import MarketDataFeed
+from src.entity.matching_engine import MatchingEngine
 from src.entity.order import Order, MarketOrder
-from src.enums import OrderAction, OrderStatus, OrderType
-from src.exception import OrderAlreadyCreatedError, ChangeOrderBookDeepError, SymbolIsNotEnabledError
+from src.entity.order_history import OrderHistory
+from src.entity.order_update import OrderUpdate
+from src.entity.place_order_result import PlaceOrderResult
+from src.entity.stop_trigger_index import StopTriggerIndex
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, OrderStatus, OrderType, OrderEvent, LogLevel
+from src.exception import OrderAlreadyCreatedError, ChangeOrderBookDeepError, SymbolIsNotEnabledError, \
+    OrderIsNotAmendableError, OrderPriceIsNotValidError, OrderQuantityIsNotValidError, OrderIsNotWaitingError
+from src.utils.event_log import event_log
+from src.utils.book_snapshot import encode_book_snapshot, decode_book_snapshot, gc_paused
+from src.utils.metrics import OrderBookMetrics
 from src.utils.quotes_generator import quote_generator
+from src.utils.quotes_publisher import QuotesPublisher
 
 
 class OrderBook:
@@ -13,13 +31,49 @@ class OrderBook:
     The OrderBook object realize the methods and logic with orders
 
     :param deep: one of the property of order book that characterizes the number of visible orders.
+    :param quotes: source of quotes (QuotesPublisher). Random quotes generator is used by default,
+    TickReplay can be used for backtests.
+    :param history: store of finished orders (filled, cancelled, rejected). They leave the live book right away
+    and are moved there (by default the last 100000 finished orders are kept in memory).
     """
 
-    def __init__(self, deep: Deep):
-        self.orders = list()
+    def __init__(self, deep: Deep, quotes: QuotesPublisher = None, history: OrderHistory = None):
+        # Live orders (resting and waiting stop orders), finished orders are in the history
+        self._orders = dict()
+        self.history = history if history is not None else OrderHistory()
+        self._engine = MatchingEngine()
+        self._stops = StopTriggerIndex()
         self.deep = None
         self.set_deep(deep)
-        self.quotes = quote_generator
+        self._lock = RLock()
+        self._is_batch = False
+        self.market_data_feed = MarketDataFeed(self.__get_snapshots_data)
+        self._order_subscribers = list()
+        # symbol name -> BestBidOffer and its tuple (to compare without creating BBO), BBO subscribers
+        self._bbo = dict()
+        self._bbo_keys = dict()
+        self._bbo_subscribers = list()
+        self.metrics = None
+        self.quotes = quotes if quotes is not None else quote_generator
+        self.quotes.subscribe(self._on_quotes)
+
+    @property
+    def orders(self) -> list:
+        """
+        This method is just getter for live orders of order book (resting orders and waiting stop orders).
+
+        :return: list of orders
+        """
+        return list(self._orders.values())
+
+    @property
+    def finished_orders(self) -> list:
+        """
+        This method is just getter for finished orders (filled, cancelled, rejected) kept in memory by the history.
+
+        :return: list of orders from the oldest finished one
+        """
+        return list(self.history)
 
     def set_deep(self, deep: Deep) -> None:
         """
@@ -42,76 +96,313 @@ class OrderBook:
             raise ChangeOrderBookDeepError(deep)
         self.deep = deep
 
-    def _place_market_order(self, order: MarketOrder):
+    def _place_market_order(self, order: MarketOrder) -> list:
         order.price = self.quotes.get_current_quote(order.symbol)
         order.status = OrderStatus.PENDING
-        self.orders.append(order)
-        print(f"Order {order.__dict__} is placed.")
+        executions = self.__execute_order(order)
+        if event_log.level <= LogLevel.DEBUG:
+            self.__log_order_placed(order)
+        return executions
 
-    def _place_limit_order(self, order):
+    def _place_limit_order(self, order) -> list:
         order.status = OrderStatus.PENDING
-        self.orders.append(order)
-        print(f"Order {order.__dict__} is placed.")
-
-    def _place_stop_order(self, order):
-        if order.action == OrderAction.SELL:
-            while True:
-                current_market_price = self.quotes.get_current_quote(order.symbol)
-                if order.price >= current_market_price:
-                    order.price = current_market_price
-                    order.type = OrderType.MARKET
-                    order.status = OrderStatus.PENDING
-                    self.orders.append(order)
-                    print(f"Order {order.__dict__} is placed.")
-                    return
-
-        elif order.action == OrderAction.BUY:
-            while True:
-                current_market_price = self.quotes.get_current_quote(order.symbol)
-                if order.price <= current_market_price:
-                    order.price = current_market_price
-                    order.type = OrderType.MARKET
-                    order.status = OrderStatus.PENDING
-                    self.orders.append(order)
-                    print(f"Order {order.__dict__} is placed.")
-                    return
-
-    def _place_stop_limit_order(self, order):
-        if order.action == OrderAction.SELL:
-            while True:
-                current_market_price = self.quotes.get_current_quote(order.symbol)
-                if order.stop_price >= current_market_price:
-                    order.type = OrderType.LIMIT
-                    order.status = OrderStatus.PENDING
-                    self.orders.append(order)
-                    print(f"Order {order.__dict__} is placed.")
-                    return
-
-        if order.action == OrderAction.BUY:
-            while True:
-                current_market_price = self.quotes.get_current_quote(order.symbol)
-                if order.stop_price <= current_market_price:
-                    order.type = OrderType.LIMIT
-                    order.status = OrderStatus.PENDING
-                    self.orders.append(order)
-                    print(f"Order {order.__dict__} is placed.")
-                    return
-
-    def __place_order(self, order):
-        if order.type == OrderType.MARKET:
-            self._place_market_order(order)
-        elif order.type == OrderType.LIMIT:
-            self._place_limit_order(order)
-        elif order.type == OrderType.STOP:
-            self._place_stop_order(order)
-        elif order.type == OrderType.STOP_LIMIT:
-            self._place_stop_limit_order(order)
-
-    def place_order(self, order: Order) -> None:
+        executions = self.__execute_order(order)
+        if event_log.level <= LogLevel.DEBUG:
+            self.__log_order_placed(order)
+        return executions
+
+    def _place_stop_order(self, order) -> list:
+        """
+        Stop and stop limit orders wait for the trigger in the stop index (they have CREATED status).
+        Order that is already triggered by the current quote is executed immediately.
+        """
+        with self._lock:
+            if not isinstance(order.action, OrderAction):
+                order.status = OrderStatus.REJECT
+                self.__archive_order(order)
+                self.__publish_order_update(OrderEvent.REJECT, order)
+                return list()
+            order.status = OrderStatus.CREATED
+            self._stops.add(order)
+            self.__publish_order_update(OrderEvent.PLACE, order)
+            quote = self.__get_current_quote(order.symbol)
+            if quote is None:
+                return list()
+            return self.__trigger_stop_orders(order.symbol.name, quote)
+
+    @staticmethod
+    def __log_order_placed(order: Order) -> None:
+        # It's per order record, so it's DEBUG (off by default) and callers check the level before the call.
+        # Fields are formatted by the event log's writer thread
+        event_log.log(LogLevel.DEBUG, 'order_placed', id=order.id, symbol=order.symbol.name, type=order.type,
+                      action=order.action, price=order.price, quantity=order.quantity, status=order.status)
+
+    def __get_current_quote(self, symbol: Symbol):
+        try:
+            return self.quotes.get_current_quote(symbol)
+        except KeyError:
+            return None
+
+    def __trigger_stop_orders(self, symbol_name: str, quote: float) -> list:
+        """
+        Private method that provide an ability to release all stop orders of the symbol triggered by the quote
+        into the book in one batch. Stop order becomes market order, stop limit order becomes limit order.
+
+        :return: list of executions
+        """
+        executions = list()
+        with self._lock:
+            for order in self._stops.pop_triggered(symbol_name, quote):
+                order.trigger(quote)
+                order.status = OrderStatus.PENDING
+                order_executions = self._engine.process(order)
+                counterparties = self.__archive_filled_orders(order, order_executions)
+                executions.extend(order_executions)
+                if event_log.level <= LogLevel.DEBUG:
+                    self.__log_order_placed(order)
+                self.__publish_order_update(OrderEvent.TRIGGER, order, order_executions, counterparties)
+            self.__update_bbo(symbol_name)
+            self.__publish_market_data()
+        return executions
+
+    def _on_quotes(self, quotes: dict) -> None:
+        """
+        Quotes generator pushes each update of quotes here, so pending stop orders are checked once per update.
+
+        :param quotes: dict {symbol name: price} (or dict-like QuotesArray)
+        :return: None
+        """
+        with self._lock:
+            if not self._stops:
+                return
+            # Only symbols with stop orders are looked up, so it doesn't depend on the number of quoted symbols
+            for symbol_name in list(self._stops.books):
+                quote = quotes.get(symbol_name)
+                if quote is not None:
+                    self.__trigger_stop_orders(symbol_name, quote)
+
+    def __execute_order(self, order: Order) -> list:
+        """
+        Private method that provide an ability to match the order with the book and rest its remainder.
+        Order with unknown action cannot be matched, so it's rejected.
+        It's called by place_order and place_orders under the book's lock.
+
+        :return: list of executions
+        """
+        action = order.action
+        if not isinstance(action, OrderAction):
+            order.status = OrderStatus.REJECT
+            self.__archive_order(order)
+            self.__publish_order_update(OrderEvent.REJECT, order)
+            return list()
+        executions = self._engine.process(order)
+        symbol_name = order.symbol.name
+        if executions:
+            counterparties = self.__archive_filled_orders(order, executions)
+            self.__update_bbo(symbol_name)
+        else:
+            counterparties = None
+            # Order that rests behind the best price of its side doesn't change BBO, so it isn't rebuilt
+            key = self._bbo_keys.get(symbol_name)
+            best_price = None if key is None else key[0] if action is OrderAction.BUY else key[3]
+            if best_price is None or (order.price >= best_price if action is OrderAction.BUY
+                                      else order.price <= best_price):
+                self.__update_bbo(symbol_name)
+        self.__publish_market_data()
+        if self._order_subscribers:
+            self.__publish_order_update(OrderEvent.PLACE, order, executions, counterparties)
+        return executions
+
+    def __remove_order(self, order: Order, event: OrderEvent) -> None:
+        """
+        Private method that provide an ability to remove finished order from the book's sides to the history,
+        so it still can be found by id.
+
+        :return: None
+        """
+        with self._lock:
+            if not self._engine.remove(order):
+                self._stops.remove(order)
+            self.__archive_order(order)
+            self.__update_bbo(order.symbol.name)
+            self.__publish_market_data()
+            self.__publish_order_update(event, order)
+
+    def __archive_order(self, order: Order) -> None:
+        self._orders.pop(order.id, None)
+        self.history.add(order)
+
+    def __archive_filled_orders(self, order: Order, executions: list) -> list:
+        """
+        Private method that provide an ability to move orders filled by matching of the order to the history:
+        resting orders of executions that are filled and the order itself if it's filled.
+
+        :return: list of resting orders of executions (counterparties of the order's update)
+        """
+        counterparties = list()
+        if executions:
+            orders, history = self._orders, self.history
+            for execution in executions:
+                resting_id = execution.sell_order_id if execution.aggressor is OrderAction.BUY \
+                    else execution.buy_order_id
+                # Resting orders are live till this moment, so they are found even if the history evicts them
+                resting = orders.get(resting_id)
+                counterparties.append(resting)
+                if resting.status is OrderStatus.FILL:
+                    del orders[resting_id]
+                    history.add(resting)
+        if order.status is OrderStatus.FILL:
+            self.__archive_order(order)
+        return counterparties
+
+    def __publish_order_update(self, event: OrderEvent, order: Order, executions: list = None,
+                               counterparties: list = None) -> None:
+        if not self._order_subscribers:
+            return
+        update = OrderUpdate(event, order, executions if executions is not None else list(),
+                             counterparties if counterparties is not None else list())
+        is_cleanup_needed = False
+        for subscriber in self._order_subscribers:
+            callback = subscriber()
+            if callback is None:
+                is_cleanup_needed = True
+                continue
+            try:
+                callback(update)
+            except Exception as e:
+                event_log.error('order_subscriber_failed', callback=repr(callback), error=repr(e))
+        if is_cleanup_needed:
+            self._order_subscribers = [s for s in self._order_subscribers if s() is not None]
+
+    def __update_bbo(self, symbol_name: str) -> None:
+        """
+        Private method that provide an ability to refresh BBO of the symbol after the change of its book.
+        The best levels are the first ones of the sides, so it's O(1). Subscribers are called only if BBO is changed.
+
+        :return: None
+        """
+        book = self._engine.books.get(symbol_name)
+        bid = book.bids.best_level() if book is not None else None
+        ask = book.asks.best_level() if book is not None else None
+        key = (bid.price, bid.quantity, len(bid.orders)) if bid is not None else (None, 0, 0)
+        key += (ask.price, ask.quantity, len(ask.orders)) if ask is not None else (None, 0, 0)
+        if self._bbo_keys.get(symbol_name, (None, 0, 0, None, 0, 0)) == key:
+            return
+        self._bbo_keys[symbol_name] = key
+        bbo = self._bbo[symbol_name] = BestBidOffer(symbol_name, *key)
+        if not self._bbo_subscribers:
+            return
+        is_cleanup_needed = False
+        for reference, symbols in self._bbo_subscribers:
+            callback = reference()
+            if callback is None:
+                is_cleanup_needed = True
+            elif symbols is None or symbol_name in symbols:
+                try:
+                    callback(bbo)
+                except Exception as e:
+                    event_log.error('bbo_subscriber_failed', callback=repr(callback), error=repr(e))
+        if is_cleanup_needed:
+            self._bbo_subscribers = [s for s in self._bbo_subscribers if s[0]() is not None]
+
+    def __publish_market_data(self) -> None:
+        if self._engine.changes and not self._is_batch:
+            self.market_data_feed.publish_changes(self._engine.pop_changes())
+
+    def __get_snapshots_data(self) -> list:
+        return [(symbol_name, book.asks.get_depth(sys.maxsize), book.bids.get_depth(sys.maxsize))
+                for symbol_name, book in self._engine.books.items()]
+
+    def subscribe_market_data(self, callback) -> None:
+        """
+        This method provide an ability to receive incremental market data instead of polling snapshots.
+        Callback receives the snapshots of all symbols (MarketDataSnapshot) right away and then
+        sequence-numbered LevelDelta on each change of price level plus periodic snapshots.
+        Callback is called by the thread that changes the book, so it should be fast.
+
+        :param callback: function or bound method (bound method is kept by weak reference)
+        :return: None
+        """
+        with self._lock:
+            self._engine.start_tracking_changes()
+            self.market_data_feed.subscribe(callback)
+
+    def unsubscribe_market_data(self, callback) -> None:
+        with self._lock:
+            self.market_data_feed.unsubscribe(callback)
+            if not self.market_data_feed:
+                self._engine.stop_tracking_changes()
+
+    def subscribe_orders(self, callback) -> None:
+        """
+        This method provide an ability to receive events of orders (OrderUpdate): order is placed, stop order
+        is triggered, order is filled, cancelled or rejected by the order book's methods.
+        Callback is called by the thread that changes the book (under the book's lock), so it should be fast.
+
+        :param callback: function or bound method (bound method is kept by weak reference)
+        :return: None
+        """
+        with self._lock:
+            self._order_subscribers.append(WeakMethod(callback) if inspect.ismethod(callback) else (lambda: callback))
+
+    def unsubscribe_orders(self, callback) -> None:
+        with self._lock:
+            self._order_subscribers = [s for s in self._order_subscribers if s() not in (None, callback)]
+
+    def get_bbo(self, symbol: Symbol) -> BestBidOffer:
+        """
+        This method provide an ability to get the best bid and the best ask of the symbol (price, quantity and
+        number of orders). BBO is maintained on each change of the book, so it's O(1) dict lookup.
+
+        :param symbol: symbol of the book
+        :return: BestBidOffer (with empty sides if the symbol doesn't have orders)
+        """
+        bbo = self._bbo.get(symbol.name)
+        return bbo if bbo is not None else BestBidOffer(symbol.name)
+
+    def subscribe_bbo(self, callback, symbols=None) -> None:
+        """
+        This method provide an ability to receive BBO (BestBidOffer) only when it's changed: price, quantity or
+        number of orders of the best bid or the best ask. Changes that don't touch the top of the book don't call it.
+        Callback is called by the thread that changes the book (under the book's lock), so it should be fast.
+
+        :param callback: function or bound method (bound method is kept by weak reference)
+        :param symbols: iterable of symbol names (None - all symbols)
+        :return: None
+        """
+        reference = WeakMethod(callback) if inspect.ismethod(callback) else (lambda: callback)
+        with self._lock:
+            self._bbo_subscribers.append((reference, frozenset(symbols) if symbols is not None else None))
+
+    def unsubscribe_bbo(self, callback) -> None:
+        with self._lock:
+            self._bbo_subscribers = [s for s in self._bbo_subscribers if s[0]() not in (None, callback)]
+
+    def enable_metrics(self) -> OrderBookMetrics:
+        """
+        This method provide an ability to instrument the order book: latency histograms of place, cancel, fill and
+        market data calls, counters of orders by type and status and gauges of the book (see OrderBookMetrics).
+        Metrics are disabled by default and don't cost anything then.
+
+        :return: OrderBookMetrics (the same object if metrics are already enabled)
+        """
+        with self._lock:
+            if self.metrics is None:
+                self.metrics = OrderBookMetrics(self)
+                self.metrics.enable()
+            return self.metrics
+
+    def disable_metrics(self) -> None:
+        with self._lock:
+            if self.metrics is not None:
+                self.metrics.disable()
+                self.metrics = None
+
+    def place_order(self, order: Order) -> list:
         """
         This method provide an ability to place an order in order book.
-        After each addition of order the list will be resorted by price (first orders
-        contains the highest price)
+        Incoming order is matched with the opposite side of the symbol's book in price-time priority
+        (partial fills reduce the quantity of orders). The remainder is put to the end of its price level's queue.
 
         Assertions:
         1. If order book already has order with order.id then method raise
@@ -119,30 +410,221 @@ class OrderBook:
         2. If order is not enabled then method raise SymbolIsNotEnabledError exception.
         It so because you cannot place order for symbol that is not ready for trading.
         3. Only Market Order and Limit Order will be placed imediatelly. Stop Order, StopLimit orders
-        will be placed when price will be triggered.
+        will be placed when price will be triggered (on placing or on one of the next quotes updates).
 
         :param order: order for buy or sell some instrument on exchange
-        :return: None
+        :return: list of executions (trades). Stop orders are executed only if they are triggered
+        by the current quote, otherwise it's empty list for them.
         """
 
-        if order.id in [order.id for order in self.orders]:
-            raise OrderAlreadyCreatedError(order)
+        with self._lock:
+            self.__check_order(order)
+            return self.__dispatch_order(order)
 
+    def place_orders(self, orders) -> list:
+        """
+        This method provide an ability to place a batch of orders (for example a burst from gateway).
+        The whole batch is checked in one pass before placing (duplicates are found by id index,
+        including duplicates inside the batch), then valid orders are placed one by one in the batch order
+        under one lock. Changes of market data are coalesced and published once for the whole batch.
+        Invalid order doesn't stop the batch: its error is returned in its result.
+
+        :param orders: iterable of orders
+        :return: list of PlaceOrderResult (one per order in the same order)
+        """
+        results = list()
+        with self._lock:
+            batch_ids = set()
+            for order in orders:
+                try:
+                    self.__check_order(order)
+                    if order.id in batch_ids:
+                        raise OrderAlreadyCreatedError(order)
+                    batch_ids.add(order.id)
+                    results.append(PlaceOrderResult(order))
+                except Exception as e:
+                    results.append(PlaceOrderResult(order, error=e))
+
+            self._is_batch = True
+            try:
+                for result in results:
+                    if result.error is None:
+                        try:
+                            result.executions = self.__dispatch_order(result.order)
+                        except Exception as e:
+                            result.error = e
+            finally:
+                self._is_batch = False
+                self.__publish_market_data()
+        return results
+
+    def __check_order(self, order: Order) -> None:
         if not order.symbol.is_enabled:
             raise SymbolIsNotEnabledError(order.symbol)
+        order_id = order.id
+        if order_id in self._orders or order_id in self.history:
+            raise OrderAlreadyCreatedError(order)
+
+    def __dispatch_order(self, order: Order) -> list:
+        """
+        Private method that provide an ability to register checked order in id index and place it.
+        Order is unregistered if it cannot be placed (for example there is no quote for market order).
+
+        :return: list of executions
+        """
+        self._orders[order.id] = order
+        order_type = order.type
+        try:
+            if order_type is OrderType.LIMIT:
+                return self._place_limit_order(order)
+            if order_type is OrderType.MARKET:
+                return self._place_market_order(order)
+            return self._place_stop_order(order)
+        except Exception:
+            if not order.is_placed():
+                del self._orders[order.id]
+            raise
+
+    def _restore_order(self, order: Order) -> None:
+        """
+        Private method for recovery (journal and snapshots): it puts already processed order to the book
+        in its state without matching: pending order rests at the end of its price level's queue,
+        created stop order waits for the trigger, orders with other statuses are put to the history.
+        Previous state of the order with the same id is replaced.
+
+        :param order: order created by trusted path
+        :return: None
+        """
+        with self._lock:
+            previous = self._orders.get(order.id)
+            if previous is not None and order.status is OrderStatus.PENDING and previous.status is OrderStatus.PENDING \
+                    and previous.price == order.price and previous.action is order.action \
+                    and order.quantity <= previous.quantity and self._engine.set_quantity(previous, order.quantity):
+                # Decrease of quantity of resting order (amend) keeps its place in the queue
+                self.__update_bbo(order.symbol.name)
+                self.__publish_market_data()
+                return
+            self._orders.pop(order.id, None)
+            if previous is not None and not self._engine.remove(previous):
+                self._stops.remove(previous)
+            if order.status == OrderStatus.PENDING:
+                self._orders[order.id] = order
+                self._engine.rest(order)
+            elif order.status == OrderStatus.CREATED:
+                self._orders[order.id] = order
+                self._stops.add(order)
+            else:
+                self.history.add(order)
+            if previous is not None and previous.symbol.name != order.symbol.name:
+                self.__update_bbo(previous.symbol.name)
+            self.__update_bbo(order.symbol.name)
+            self.__publish_market_data()
+
+    def _restore_orders(self, orders: list) -> None:
+        """
+        Private method for recovery (snapshots): it's bulk version of _restore_order for the empty order book.
+        Resting orders should go in price-time priority (see _dump_orders).
 
-        t = Thread(target=self.__place_order, args=(order,))
-        t.start()
+        :param orders: orders created by trusted path
+        :return: None
+        """
+        with self._lock:
+            if self._orders or len(self.history):
+                for order in orders:
+                    self._restore_order(order)
+                return
+            pending, created = OrderStatus.PENDING, OrderStatus.CREATED
+            self._orders = {order.id: order for order in orders if order.status is pending or order.status is created}
+            self._engine.rest_many(order for order in orders if order.status is pending)
+            for order in orders:
+                if order.status is created:
+                    self._stops.add(order)
+                elif order.status is not pending:
+                    self.history.add(order)
+            for symbol_name in self._engine.books:
+                self.__update_bbo(symbol_name)
+            self.__publish_market_data()
+
+    def save_snapshot(self, path: str) -> None:
+        """
+        This method provide an ability to save all orders of the order book to the binary snapshot file
+        (see src.utils.book_snapshot) for warm startup by load_snapshot.
+        File is replaced atomically, so the previous snapshot is kept if saving fails.
 
-        self.__sort_orders_by_price()
+        :param path: path of the file
+        :return: None
+        """
+        with self._lock, gc_paused():
+            data = encode_book_snapshot(self._dump_orders())
+        with open(f'{path}.tmp', 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def load_snapshot(cls, path: str, deep: Deep, quotes: QuotesPublisher = None) -> 'OrderBook':
+        """
+        This method provide an ability to create the order book from the snapshot file saved by save_snapshot.
+        Orders are restored in their states without matching (resting orders keep price-time priority).
 
-    def __sort_orders_by_price(self):
+        :param path: path of the file
+        :param deep: deep of the new order book
+        :param quotes: source of quotes of the new order book (random quotes generator by default)
+        :return: new order book
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        order_book = cls(deep, quotes)
+        with gc_paused():
+            order_book._restore_orders(decode_book_snapshot(data))
+        return order_book
+
+    def _restore_order_state(self, order_id: UUID, quantity: float, status: OrderStatus) -> None:
         """
-        Private method that provide an ability to sort the orders by price
+        Private method for recovery (journal): it changes quantity and status of the order
+        (for example resting order that was partially filled keeps its place in the queue).
 
         :return: None
         """
-        self.orders = sorted(self.orders, key=lambda o: o.price, reverse=True)
+        with self._lock:
+            order = self.get_order_by_id(order_id)
+            if order is None:
+                return
+            if status == OrderStatus.PENDING and self._engine.set_quantity(order, quantity):
+                order.status = status
+            else:
+                if not self._engine.remove(order):
+                    self._stops.remove(order)
+                order.quantity = quantity
+                order.status = status
+                if status == OrderStatus.PENDING:
+                    self._orders[order.id] = order
+                    self._engine.rest(order)
+                elif status == OrderStatus.CREATED:
+                    self._orders[order.id] = order
+                    self._stops.add(order)
+                else:
+                    self.__archive_order(order)
+            self.__update_bbo(order.symbol.name)
+            self.__publish_market_data()
+
+    def _dump_orders(self) -> list:
+        """
+        Private method for snapshots: it returns all orders in the order they should be restored by _restore_order:
+        resting orders in price-time priority, then waiting stop orders in trigger priority, then finished orders
+        of the history (in memory).
+        It should be called under the book's lock.
+
+        :return: list of orders
+        """
+        orders = list()
+        for book in self._engine.books.values():
+            orders.extend(book.bids.iter_orders())
+            orders.extend(book.asks.iter_orders())
+        orders.extend(self._stops.iter_orders())
+        orders.extend(self.history)
+        return orders
 
     def get_orders_by_action(self, action: OrderAction, count: int = None) -> list:
         """
@@ -153,11 +635,18 @@ class OrderBook:
         :param action: buy or sell. Use OrderAction.BUY for bid or OrderAction.SELL for ask.
         :param count: how much orders you would like to see.
         For example count=1 return the order with most low price (if ask) or high price (if bid)
-        :return: list of orders without any filters. You will see orders with any status and symbol
+        :return: list of resting orders in price-time priority. You will see orders of any symbol
         """
         if not isinstance(count, int) and count is not None:
             return list()
-        return [order for order in self.orders if order.action == action][:count]
+        if not isinstance(action, OrderAction):
+            return list()
+
+        with self._lock:
+            orders = self._engine.iter_orders(action)
+            if count is None or count < 0:
+                return list(orders)[:count]
+            return list(islice(orders, min(count, sys.maxsize)))
 
     def reject_order(self, order: Order) -> None:
         """
@@ -167,8 +656,7 @@ class OrderBook:
         :param order: order. It can be market,limit,stop,stop limit order.
         :return: None
         """
-        order = self.get_order_by_id(order.id)
-        order.status = OrderStatus.REJECT
+        self.__finish_order(order, OrderStatus.REJECT, OrderEvent.REJECT)
 
     def fill_order(self, order: Order) -> None:
         """
@@ -178,27 +666,100 @@ class OrderBook:
         :param order: order id. It can be market,limit,stop,stop limit order.
         :return: None
         """
-        order = self.get_order_by_id(order.id)
-        order.status = OrderStatus.FILL
+        self.__finish_order(order, OrderStatus.FILL, OrderEvent.FILL)
 
     def cancel_order(self, order: Order) -> None:
-        self.get_order_by_id(order.id).status = OrderStatus.CANCEL
+        self.__finish_order(order, OrderStatus.CANCEL, OrderEvent.CANCEL)
+
+    def __finish_order(self, order: Order, status: OrderStatus, event: OrderEvent) -> None:
+        """
+        Private method that provide an ability to finish the order that waits in order book. Finished orders
+        (they are in the history) and unknown orders can't be finished again.
+
+        :return: None
+        """
+        with self._lock:
+            live_order = self._orders.get(order.id)
+            if live_order is None:
+                raise OrderIsNotWaitingError(order)
+            live_order.status = status
+            self.__remove_order(live_order, event)
+
+    def amend_order(self, order: Order, price: float = None, quantity: float = None) -> list:
+        """
+        This method provide an ability to change price and/or quantity of the order that waits in order book
+        in one call instead of cancel and new order (the order keeps its id and object).
+        Decrease of quantity keeps the order's place in its price level's queue. Increase of quantity moves
+        the order to the end of the queue. New price moves the order to the end of the queue of the new price level
+        (O(log L) where L is the number of levels) and the order is matched like incoming one if it crosses the book.
+        Price of stop order is its stop price, price of stop limit order is its limit price. Resting remainder
+        of market order (or triggered stop order) is matched by its resting price like limit order.
+
+        :param order: resting order or waiting stop order
+        :param price: new price (None - price isn't changed)
+        :param quantity: new quantity (None - quantity isn't changed)
+        :return: list of executions
+        """
+        with self._lock:
+            live_order = self._orders.get(order.id)
+            if live_order is None:
+                raise OrderIsNotAmendableError(order)
+            order = live_order
+            new_price = order.price if price is None else price
+            new_quantity = order.quantity if quantity is None else quantity
+            if type(new_price) not in (int, float) or new_price <= 0:
+                raise OrderPriceIsNotValidError(new_price)
+            if type(new_quantity) not in (int, float) or new_quantity <= 0:
+                raise OrderQuantityIsNotValidError(new_quantity)
+
+            if order.status is OrderStatus.CREATED:
+                self._stops.remove(order)
+                order._price = new_price
+                order.quantity = new_quantity
+                self._stops.add(order)
+                self.__publish_order_update(OrderEvent.AMEND, order)
+                quote = self.__get_current_quote(order.symbol)
+                return self.__trigger_stop_orders(order.symbol.name, quote) if quote is not None else list()
+
+            if new_price == order.price and new_quantity <= order.quantity:
+                self._engine.set_quantity(order, new_quantity)
+                executions, counterparties = list(), list()
+            else:
+                self._engine.remove(order)
+                order._price = new_price
+                order.quantity = new_quantity
+                # Resting remainder of market order (or triggered stop order) is matched by its resting price,
+                # it doesn't take liquidity by any price again
+                executions = self._engine.process(order, True)
+                counterparties = self.__archive_filled_orders(order, executions)
+            self.__update_bbo(order.symbol.name)
+            self.__publish_market_data()
+            self.__publish_order_update(OrderEvent.AMEND, order, executions, counterparties)
+            return executions
 
     def get_order_by_id(self, order_id: uuid4) -> Order:
         """
         This method provide an ability to find and return order by using order id.
 
         :param order_id: order id. Recommend to generate id by using function uuid.uuid4().
-        :return: list of orders without any filters. You will see orders with any status and symbol
+        :return: order with any status and symbol (finished order is looked up in the history)
+        or None if order book doesn't have such order
         """
-        return next(filter(lambda order: order.id == order_id, self.orders), None)
+        order = self._orders.get(order_id)
+        if order is None:
+            return self.history.get(order_id)
+        return order
 
-    def get_market_data(self) -> dict:
+    def get_market_data(self, symbol: Symbol = None) -> dict:
         """
         This method provide an ability to get a market data snapshot.
         For example it can be helpful when you need to print order book or sent it to someone.
+        Quantities of price levels are maintained on each change of the book, so snapshot costs
+        O(deep) and doesn't depend on the number of orders.
 
-        :return: data by following json:
+        :param symbol: symbol of the book. If it's None then levels of all symbols are merged by price.
+        :return: data by following json (deep.ask_count asks from the lowest price,
+        deep.bid_count bids from the highest price):
         {
             "asks": [
                 {
@@ -215,8 +776,18 @@ class OrderBook:
                 ...
             ]
         """
-        return MarketData(asks=self.get_orders_by_action(OrderAction.SELL, self.deep.ask_count),
-                          bids=self.get_orders_by_action(OrderAction.BUY, self.deep.bid_count)).format
+        ask_count, bid_count = min(self.deep.ask_count, sys.maxsize), min(self.deep.bid_count, sys.maxsize)
+        with self._lock:
+            return MarketData(asks=self._engine.get_depth(OrderAction.SELL, ask_count, symbol),
+                              bids=self._engine.get_depth(OrderAction.BUY, bid_count, symbol)).format
 
     def get_best_price(self, action: OrderAction, count: int = None) -> list:
-        return sorted(self.get_orders_by_action(action), key=lambda x: x.price)[:count]
\ No newline at end of file
+        """
+        This method provide an ability to get resting orders with the best prices: bids from the highest price,
+        asks from the lowest price (the same as get_orders_by_action). Use get_bbo for the top of the book.
+
+        :param action: OrderAction.BUY for bids or OrderAction.SELL for asks
+        :param count: how much orders you would like to see
+        :return: list of orders in price-time priority
+        """
+        return self.get_orders_by_action(action, count)
\ No newline at end of file
@@ -0,0 +1,112 @@
+import dbm
+import threading
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+from src.entity.order import Order
+from src.utils.book_snapshot import encode_book_snapshot, decode_book_snapshot
+
+
+class OrderHistory:
+    """
+    The OrderHistory object keeps finished orders (filled, cancelled, rejected) that left the live order book.
+    Orders are kept in memory in finishing order: the oldest ones are evicted when there are more than max_size
+    orders or they are older than max_age seconds (it's checked by adding and reading, so idle book's history
+    is aged too). Evicted orders are spilled to the disk file (dbm) if spill_path is set, otherwise they are dropped.
+
+    :param max_size: max number of orders in memory (None - unlimited)
+    :param max_age: max age of orders in memory in seconds (None - unlimited)
+    :param spill_path: path of the dbm file for evicted orders (None - evicted orders are dropped)
+    """
+
+    def __init__(self, max_size: int = 100000, max_age: float = None, spill_path: str = None):
+        if max_size is not None and max_size < 0:
+            raise ValueError(f"History size {max_size} should be >= 0")
+        self.max_size = max_size
+        self.max_age = max_age
+        self.spill_path = spill_path
+        # order id -> (time of finishing, order)
+        self._orders = OrderedDict()
+        self._spill = dbm.open(spill_path, 'c') if spill_path is not None else None
+        self._spill_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self.evict()
+        return len(self._orders)
+
+    def __iter__(self):
+        self.evict()
+        return iter([order for _, order in self._orders.values()])
+
+    def __contains__(self, order_id: UUID) -> bool:
+        """
+        This method provide an ability to check that the order is in the history: in memory or in the spill file.
+        """
+        self.evict()
+        if order_id in self._orders:
+            return True
+        if self._spill is None or not isinstance(order_id, UUID):
+            return False
+        with self._spill_lock:
+            return order_id.bytes in self._spill
+
+    def add(self, order: Order) -> None:
+        """
+        This method provide an ability to put finished order to the history (order added again becomes the newest).
+
+        :param order: finished order
+        :return: None
+        """
+        orders = self._orders
+        if order.id in orders:
+            del orders[order.id]
+        orders[order.id] = (time.monotonic(), order)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        This method provide an ability to evict orders by size and age (it's called by add and reads,
+        so age eviction of idle book can be done by this call too).
+
+        :return: number of evicted orders
+        """
+        orders, max_size, max_age = self._orders, self.max_size, self.max_age
+        if (max_size is None or len(orders) <= max_size) and max_age is None:
+            return 0
+        evicted = list()
+        if max_size is not None:
+            while len(orders) > max_size:
+                evicted.append(orders.popitem(last=False)[1][1])
+        if max_age is not None and orders:
+            oldest_allowed = time.monotonic() - max_age
+            while orders and next(iter(orders.values()))[0] < oldest_allowed:
+                evicted.append(orders.popitem(last=False)[1][1])
+        if evicted and self._spill is not None:
+            with self._spill_lock:
+                for order in evicted:
+                    self._spill[order.id.bytes] = encode_book_snapshot([order])
+        return len(evicted)
+
+    def get(self, order_id: UUID) -> Order:
+        """
+        This method provide an ability to find finished order in memory, then in the spill file.
+
+        :param order_id: order id
+        :return: order (order read from the spill file is a new object) or None
+        """
+        self.evict()
+        item = self._orders.get(order_id)
+        if item is not None:
+            return item[1]
+        if self._spill is None or not isinstance(order_id, UUID):
+            return None
+        with self._spill_lock:
+            data = self._spill.get(order_id.bytes)
+        return decode_book_snapshot(data)[0] if data is not None else None
+
+    def close(self) -> None:
+        if self._spill is not None:
+            with self._spill_lock:
+                self._spill.close()
+                self._spill = None
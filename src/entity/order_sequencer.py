@@ -0,0 +1,148 @@
+from concurrent.futures import Future
+from queue import Queue, Full
+from threading import Thread, Lock, Condition
+
+from src.entity.order import Order
+from src.entity.order_book import OrderBook
+from src.enums import Backpressure
+from src.exception import OrderSequencerIsFullError, OrderSequencerIsStoppedError
+
+_STOP = object()
+
+
+class OrderSequencer:
+    """
+    The OrderSequencer object serializes all mutations of the order book: operations are put to the bounded queue
+    and one consumer thread applies them one by one. Each operation returns a future with its result.
+    Quotes updates (stop orders' triggers) go through the same queue while sequencer is running.
+
+    :param order_book: order book that is changed by sequencer
+    :param maxsize: size of the queue
+    :param backpressure: what to do when the queue is full. Backpressure.BLOCK waits for the free place
+    (no longer than timeout seconds if it's set), Backpressure.REJECT raises OrderSequencerIsFullError right away.
+    :param timeout: max time in seconds to wait for the free place with Backpressure.BLOCK (None - wait forever)
+    """
+
+    def __init__(self, order_book: OrderBook, maxsize: int = 10000, backpressure: Backpressure = Backpressure.BLOCK,
+                 timeout: float = None):
+        self.order_book = order_book
+        self.maxsize = maxsize
+        self.backpressure = backpressure
+        self.timeout = timeout
+        self._queue = Queue(maxsize)
+        self._thread = None
+        # It serializes start and stop
+        self._lock = Lock()
+        # It guards _is_accepting and _puts (number of operations that are being put to the queue right now)
+        self._condition = Condition()
+        self._is_accepting = False
+        self._puts = 0
+
+    def __enter__(self) -> 'OrderSequencer':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = Thread(target=self.__run, name='OrderSequencer', daemon=True)
+            self._thread.start()
+            with self._condition:
+                self._is_accepting = True
+            self.order_book.quotes.unsubscribe(self.order_book._on_quotes)
+            self.order_book.quotes.subscribe(self._on_quotes)
+
+    def stop(self) -> None:
+        """
+        This method provide an ability to stop the consumer thread. Operations that are already in the queue
+        (or are being put to it) are applied before stop, new operations and quotes are not accepted.
+
+        :return: None
+        """
+        with self._lock:
+            if self._thread is None:
+                return
+            self.order_book.quotes.unsubscribe(self._on_quotes)
+            self.order_book.quotes.subscribe(self.order_book._on_quotes)
+            with self._condition:
+                self._is_accepting = False
+                # Blocked puts are finished by the consumer thread, so nothing is put after _STOP
+                self._condition.wait_for(lambda: self._puts == 0)
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, function, *args) -> Future:
+        """
+        This method provide an ability to apply any function to the order book in the consumer thread.
+
+        :param function: function (usually order book's method)
+        :param args: function's arguments
+        :return: future with result of the function
+        """
+        future = Future()
+        try:
+            if self.backpressure == Backpressure.REJECT:
+                is_put = self.__put((future, function, args), False, None)
+            else:
+                is_put = self.__put((future, function, args), True, self.timeout)
+        except Full:
+            raise OrderSequencerIsFullError(self.maxsize)
+        if not is_put:
+            raise OrderSequencerIsStoppedError()
+        return future
+
+    def __put(self, item, block: bool, timeout) -> bool:
+        # Put is done without locks (full queue doesn't stall other producers and stop), stop waits for it
+        with self._condition:
+            if not self._is_accepting:
+                return False
+            self._puts += 1
+        try:
+            self._queue.put(item, block, timeout)
+        finally:
+            with self._condition:
+                self._puts -= 1
+                self._condition.notify_all()
+        return True
+
+    def place_order(self, order: Order) -> Future:
+        return self.submit(self.order_book.place_order, order)
+
+    def place_orders(self, orders) -> Future:
+        return self.submit(self.order_book.place_orders, list(orders))
+
+    def cancel_order(self, order: Order) -> Future:
+        return self.submit(self.order_book.cancel_order, order)
+
+    def fill_order(self, order: Order) -> Future:
+        return self.submit(self.order_book.fill_order, order)
+
+    def reject_order(self, order: Order) -> Future:
+        return self.submit(self.order_book.reject_order, order)
+
+    def _on_quotes(self, quotes: dict) -> None:
+        # Quotes are never dropped while sequencer is running: generator waits for the free place in the queue.
+        # Quotes that come after stop are skipped (order book is subscribed to quotes again by stop)
+        self.__put((Future(), self.order_book._on_quotes, (quotes,)), True, None)
+
+    def __run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            future, function, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
@@ -0,0 +1,19 @@
+from dataclasses import dataclass, field
+
+from src.entity.order import Order
+from src.enums import OrderEvent
+
+
+@dataclass
+class OrderUpdate:
+    """
+    This class contains one event of the order's life in the order book: order is placed (accepted by the book),
+    stop order is triggered, order is filled, cancelled or rejected.
+    Executions are the trades of the order made by this event (placing, triggering or amending).
+    Counterparties are the resting orders of executions (in the same order) in their states after the trades,
+    so subscribers don't look them up by id (filled orders can be already evicted from the history).
+    """
+    event: OrderEvent
+    order: Order
+    executions: list = field(default_factory=list)
+    counterparties: list = field(default_factory=list)
@@ -0,0 +1,18 @@
+from dataclasses import dataclass, field
+
+from src.entity.order import Order
+
+
+@dataclass
+class PlaceOrderResult:
+    """
+    This class contains the result of placing one order of the batch: executions of placed order
+    or the error if order is not placed.
+    """
+    order: Order
+    executions: list = field(default_factory=list)
+    error: Exception = None
+
+    @property
+    def is_placed(self) -> bool:
+        return self.error is None
@@ -0,0 +1,346 @@
+import importlib
+import multiprocessing
+import os
+import zlib
+from collections import deque
+from concurrent.futures import Future
+from heapq import merge
+from threading import Thread, Lock
+
+from src.entity.best_bid_offer import BestBidOffer
+from src.entity.book_side import QUANTITY_PRECISION
+from src.entity.deep import Deep
+from src.entity.order import Order
+from src.entity.place_order_result import PlaceOrderResult
+from src.entity.symbol import Symbol
+from src.enums import OrderAction
+from src.exception import ShardedOrderBookIsStoppedError
+from src.utils.event_log import event_log
+
+# Methods of OrderBook with the order as the first argument, the router applies the order's state after them
+ORDER_METHODS = frozenset(('place_order', 'cancel_order', 'fill_order', 'reject_order', 'amend_order'))
+
+
+def get_shard(symbol_name: str, shards_count: int) -> int:
+    """
+    This function provide an ability to get the shard of the symbol. crc32 is used (not hash()), so the shard
+    is the same in all processes and runs.
+
+    :param symbol_name: name of the symbol
+    :param shards_count: number of shards
+    :return: number of the shard from 0
+    """
+    return zlib.crc32(symbol_name.encode('utf-8')) % shards_count
+
+
+def merge_depths(depths: list, count: int, action: OrderAction) -> list:
+    """
+    This function provide an ability to merge market data levels of several books (the best count levels of each)
+    into the best count levels. Levels with the same price are summed up.
+
+    :param depths: list of lists like [{"price": value, "quantity": value}, ...] from the best level
+    :param count: how much levels you would like to see
+    :param action: OrderAction.BUY for bids or OrderAction.SELL for asks
+    :return: list like [{"price": value, "quantity": value}, ...] from the best level
+    """
+    result = list()
+    for level in merge(*depths, key=lambda lvl: lvl['price'], reverse=action == OrderAction.BUY):
+        if result and result[-1]['price'] == level['price']:
+            result[-1]['quantity'] = round(result[-1]['quantity'] + level['quantity'], QUANTITY_PRECISION)
+            continue
+        if len(result) == count:
+            break
+        result.append(dict(level))
+    return result
+
+
+def _get_state(order: Order) -> tuple:
+    return order.status, order.quantity, order.price, order.type
+
+
+def _encode_error(error: Exception):
+    # Exceptions of the repository keep only the message in args, so they can't be unpickled by their __init__
+    return None if error is None else (type(error).__module__, type(error).__qualname__, str(error))
+
+
+def _decode_error(payload) -> Exception:
+    """
+    This function provide an ability to rebuild the shard's error by its type name and message. The error
+    of the same type is created without its __init__ (msg and args are the message), RuntimeError is used
+    if the type isn't found.
+    """
+    if payload is None:
+        return None
+    module_name, type_name, message = payload
+    try:
+        error_type = getattr(importlib.import_module(module_name), type_name)
+    except (ImportError, AttributeError):
+        error_type = None
+    if not isinstance(error_type, type) or not issubclass(error_type, Exception):
+        return RuntimeError(f"{type_name}: {message}")
+    error = error_type.__new__(error_type)
+    Exception.__init__(error, message)
+    error.msg = message
+    return error
+
+
+def _run_shard(connection, deep: Deep, quotes_factory, log_level) -> None:
+    """
+    This function is the main function of the shard's process: it owns the order book of the shard's symbols
+    and applies requests (method name, arguments) one by one. Requests with orders return the orders' states,
+    so the router updates the caller's objects.
+    """
+    from src.entity.order_book import OrderBook
+
+    event_log.level = log_level
+    order_book = OrderBook(deep, quotes_factory() if quotes_factory is not None else None)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            connection.close()
+            return
+        method_name, args = request
+        try:
+            if method_name in ORDER_METHODS:
+                # The state is taken from the book's object of the order (the request's copy for a new order),
+                # not by id: finished order can be already evicted from the history
+                order = order_book._orders.get(args[0].id, args[0])
+                result = (getattr(order_book, method_name)(*args), _get_state(order))
+            else:
+                result = getattr(order_book, method_name)(*args)
+            if method_name == 'place_orders':
+                result = [(r.executions, _encode_error(r.error), _get_state(r.order)) for r in result]
+            # Result is pickled before writing, so the pipe is not broken by unpicklable result
+            connection.send((True, result))
+        except Exception as e:
+            connection.send((False, _encode_error(e)))
+
+
+class _Shard:
+    """
+    Connection to the shard's process: requests are sent without waiting for the previous ones (pipelining),
+    the reader thread resolves futures of responses in the order of requests.
+    """
+
+    def __init__(self, number: int, context, deep: Deep, quotes_factory):
+        self.number = number
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_run_shard,
+                                       args=(child_connection, deep, quotes_factory, event_log.level),
+                                       name=f'OrderBookShard-{number}', daemon=True)
+        self.process.start()
+        child_connection.close()
+        self._futures = deque()
+        self._send_lock = Lock()
+        self._is_stopped = False
+        self._reader = Thread(target=self.__read, name=f'OrderBookShardReader-{number}', daemon=True)
+        self._reader.start()
+
+    def submit(self, method_name: str, *args) -> Future:
+        future = Future()
+        with self._send_lock:
+            if self._is_stopped or self.connection.closed:
+                raise ShardedOrderBookIsStoppedError()
+            self._futures.append(future)
+            self.connection.send((method_name, args))
+        return future
+
+    def __read(self) -> None:
+        while True:
+            try:
+                is_ok, value = self.connection.recv()
+            except Exception:
+                # Closed pipe, dead process or response that can't be read: the shard is stopped,
+                # waiting futures (including the future of this response) are failed
+                break
+            future = self._futures.popleft()
+            if is_ok:
+                future.set_result(value)
+            else:
+                future.set_exception(_decode_error(value))
+        with self._send_lock:
+            self._is_stopped = True
+            futures, self._futures = self._futures, deque()
+        for future in futures:
+            future.set_exception(ShardedOrderBookIsStoppedError())
+
+    def stop(self) -> None:
+        with self._send_lock:
+            if not self.connection.closed:
+                try:
+                    self.connection.send(None)
+                except OSError:
+                    # The process is already dead
+                    pass
+        self.process.join()
+        with self._send_lock:
+            self.connection.close()
+        self._reader.join()
+
+
+class ShardedOrderBook:
+    """
+    The ShardedOrderBook object is the router of order books of several processes: symbols are split into shards
+    (see get_shard) and each shard has its own order book in its own process, so symbols are matched in parallel
+    on several cores instead of one GIL. Orders are dispatched by their symbols, market data of all symbols
+    is aggregated from all shards.
+    Orders are sent to the shard's process as copies: the caller's order gets status, quantity, price and type
+    after the call, resting orders changed by later calls are up to date only in the shard
+    (see get_order_by_id). place_orders sends one message per shard, so batches scale with the number of shards
+    better than single orders. Event log's level of the shards' processes is the level of this process' event log.
+
+    :param deep: deep of the order books of shards
+    :param shards_count: number of processes (number of CPUs by default)
+    :param quotes_factory: picklable callable that creates the source of quotes in the shard's process
+    (QuotesPublisher). Random quotes generator of the process is used by default
+    :param start_method: multiprocessing start method. 'spawn' is used by default because parent process
+    has threads (quotes generator, event log's writer) and fork copies their locks
+    """
+
+    def __init__(self, deep: Deep, shards_count: int = None, quotes_factory=None, start_method: str = 'spawn'):
+        self.deep = deep
+        self.shards_count = shards_count or os.cpu_count() or 1
+        self.quotes_factory = quotes_factory
+        self._context = multiprocessing.get_context(start_method)
+        self._shards = list()
+        self._lock = Lock()
+
+    def __enter__(self) -> 'ShardedOrderBook':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._shards)
+
+    def start(self) -> None:
+        with self._lock:
+            if not self._shards:
+                self._shards = [_Shard(number, self._context, self.deep, self.quotes_factory)
+                                for number in range(self.shards_count)]
+
+    def stop(self) -> None:
+        """
+        This method provide an ability to stop processes of the shards. Requests that are already sent are applied
+        before stop, their order books are lost.
+
+        :return: None
+        """
+        with self._lock:
+            for shard in self._shards:
+                shard.stop()
+            self._shards = list()
+
+    def __get_shards(self) -> list:
+        shards = self._shards
+        if not shards:
+            raise ShardedOrderBookIsStoppedError()
+        return shards
+
+    def _get_shard(self, symbol: Symbol) -> _Shard:
+        shards = self.__get_shards()
+        return shards[get_shard(symbol.name, len(shards))]
+
+    def submit(self, symbol: Symbol, method_name: str, *args) -> Future:
+        """
+        This method provide an ability to call the method of the symbol's order book without waiting for the result
+        (for example to send a lot of orders one by one and wait for all of them later).
+
+        :param symbol: symbol that defines the shard
+        :param method_name: name of OrderBook's method
+        :param args: arguments of the method
+        :return: future with result of the method
+        """
+        return self._get_shard(symbol).submit(method_name, *args)
+
+    @staticmethod
+    def __apply_state(order: Order, state: tuple) -> None:
+        # Caller's order is already placed by the shard, so setters' checks of placed order are skipped
+        order._status, order._quantity, order._price, order._type = state
+
+    def __call_with_order(self, method_name: str, order: Order, *args):
+        result, state = self.submit(order.symbol, method_name, order, *args).result()
+        self.__apply_state(order, state)
+        return result
+
+    def place_order(self, order: Order) -> list:
+        """
+        This method provide an ability to place an order in the order book of its symbol's shard
+        (see OrderBook.place_order).
+
+        :param order: order
+        :return: list of executions
+        """
+        return self.__call_with_order('place_order', order)
+
+    def place_orders(self, orders) -> list:
+        """
+        This method provide an ability to place a batch of orders: orders are split by shards and each shard
+        places its part in parallel with the others (see OrderBook.place_orders).
+
+        :param orders: iterable of orders
+        :return: list of PlaceOrderResult (one per order in the same order)
+        """
+        orders = list(orders)
+        shards = self.__get_shards()
+        # shard number -> (positions of orders in the batch, orders)
+        parts = dict()
+        for position, order in enumerate(orders):
+            positions, part = parts.setdefault(get_shard(order.symbol.name, len(shards)), (list(), list()))
+            positions.append(position)
+            part.append(order)
+        futures = {number: shards[number].submit('place_orders', part) for number, (_, part) in parts.items()}
+        results = [None] * len(orders)
+        for number, future in futures.items():
+            positions, part = parts[number]
+            for position, order, (executions, error, state) in zip(positions, part, future.result()):
+                error = _decode_error(error)
+                if error is None:
+                    self.__apply_state(order, state)
+                results[position] = PlaceOrderResult(order, executions, error)
+        return results
+
+    def amend_order(self, order: Order, price: float = None, quantity: float = None) -> list:
+        return self.__call_with_order('amend_order', order, price, quantity)
+
+    def cancel_order(self, order: Order) -> None:
+        self.__call_with_order('cancel_order', order)
+
+    def fill_order(self, order: Order) -> None:
+        self.__call_with_order('fill_order', order)
+
+    def reject_order(self, order: Order) -> None:
+        self.__call_with_order('reject_order', order)
+
+    def get_order_by_id(self, order_id) -> Order:
+        """
+        This method provide an ability to find the order by id in all shards (id doesn't tell the symbol).
+
+        :param order_id: order id
+        :return: copy of the order in its current state or None if there is no such order
+        """
+        futures = [shard.submit('get_order_by_id', order_id) for shard in self.__get_shards()]
+        return next((order for order in (future.result() for future in futures) if order is not None), None)
+
+    def get_market_data(self, symbol: Symbol = None) -> dict:
+        """
+        This method provide an ability to get a market data snapshot (see OrderBook.get_market_data).
+        Market data of the symbol is got from its shard, market data of all symbols is merged from all shards.
+
+        :param symbol: symbol of the book. If it's None then levels of all symbols are merged by price.
+        :return: dict {"asks": [...], "bids": [...]}
+        """
+        if symbol is not None:
+            return self.submit(symbol, 'get_market_data', symbol).result()
+        market_data = [future.result() for future in [shard.submit('get_market_data') for shard in self.__get_shards()]]
+        return {'asks': merge_depths([data['asks'] for data in market_data], self.deep.ask_count, OrderAction.SELL),
+                'bids': merge_depths([data['bids'] for data in market_data], self.deep.bid_count, OrderAction.BUY)}
+
+    def get_bbo(self, symbol: Symbol) -> BestBidOffer:
+        return self.submit(symbol, 'get_bbo', symbol).result()
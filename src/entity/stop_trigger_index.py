@@ -0,0 +1,105 @@
+from operator import neg, le, ge
+
+from sortedcontainers import SortedDict
+
+from src.entity.book_side import PriceLevel
+from src.entity.order import Order
+from src.enums import OrderAction, OrderType
+
+
+def get_stop_price(order: Order) -> float:
+    """
+    This function provide an ability to get the price that triggers stop or stop limit order.
+
+    :param order: stop or stop limit order
+    :return: stop price
+    """
+    return order.stop_price if order.type == OrderType.STOP_LIMIT else order.price
+
+
+class StopTriggerIndex:
+    """
+    The StopTriggerIndex object keeps pending stop and stop limit orders of all symbols sorted by stop price.
+    Buy stops are triggered when quote >= stop price, so they are sorted from the lowest stop price.
+    Sell stops are triggered when quote <= stop price, so they are sorted from the highest stop price.
+    Orders with the same stop price are triggered in placing order (FIFO).
+    """
+
+    def __init__(self):
+        # symbol name -> {OrderAction.BUY: SortedDict, OrderAction.SELL: SortedDict} (stop price -> PriceLevel)
+        self.books = dict()
+        # pending order -> PriceLevel where it waits
+        self.levels = dict()
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def __contains__(self, order: Order) -> bool:
+        return order in self.levels
+
+    def add(self, order: Order) -> None:
+        """
+        This method provide an ability to put stop or stop limit order to the index.
+
+        :param order: stop or stop limit order with valid action (buy or sell)
+        :return: None
+        """
+        book = self.books.get(order.symbol.name)
+        if book is None:
+            book = self.books[order.symbol.name] = {OrderAction.BUY: SortedDict(), OrderAction.SELL: SortedDict(neg)}
+        levels = book[order.action]
+        stop_price = get_stop_price(order)
+        level = levels.get(stop_price)
+        if level is None:
+            level = levels[stop_price] = PriceLevel(stop_price)
+        level.append(order)
+        self.levels[order] = level
+
+    def remove(self, order: Order) -> bool:
+        """
+        This method provide an ability to remove pending order from the index (for example when it's cancelled).
+
+        :param order: stop or stop limit order
+        :return: True if order was in the index, otherwise False
+        """
+        level = self.levels.pop(order, None)
+        if level is None:
+            return False
+        level.remove(order)
+        if not level:
+            del self.books[order.symbol.name][order.action][level.price]
+        return True
+
+    def iter_orders(self):
+        """
+        This method provide an ability to iterate pending orders of all symbols in trigger priority.
+        """
+        for book in self.books.values():
+            for action in (OrderAction.BUY, OrderAction.SELL):
+                for level in book[action].values():
+                    yield from level
+
+    def pop_triggered(self, symbol_name: str, quote: float) -> list:
+        """
+        This method provide an ability to remove and return all orders of the symbol that are triggered by the quote.
+
+        :param symbol_name: symbol's name
+        :param quote: current price of the symbol
+        :return: list of triggered orders (buy stops first, then sell stops)
+        """
+        book = self.books.get(symbol_name)
+        if book is None:
+            return list()
+
+        triggered = list()
+        for action, is_triggered in ((OrderAction.BUY, le), (OrderAction.SELL, ge)):
+            levels = book[action]
+            while levels:
+                stop_price, level = levels.peekitem(0)
+                if not is_triggered(stop_price, quote):
+                    break
+                del levels[stop_price]
+                for order in level:
+                    del self.levels[order]
+                    triggered.append(order)
+        return triggered
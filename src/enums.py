@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class Currency(Enum):
@@ -32,4 +32,31 @@ class OrderStatus(Enum):
     REJECT = 'reject'
     PENDING = 'pending'
     CANCEL = 'cancel'
-    CREATED = 'created'
\ No newline at end of file
+    CREATED = 'created'
+
+
+class LevelUpdateType(Enum):
+    ADD = 'add'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+
+class Backpressure(Enum):
+    BLOCK = 'block'
+    REJECT = 'reject'
+
+
+class OrderEvent(Enum):
+    PLACE = 'place'
+    TRIGGER = 'trigger'
+    FILL = 'fill'
+    CANCEL = 'cancel'
+    REJECT = 'reject'
+    AMEND = 'amend'
+
+
+class LogLevel(IntEnum):
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
@@ -47,3 +47,39 @@ class SymbolIsNotValidError(Exception):
     """Exception for cases when somebody tries to trade by using not enabled symbol"""
     def __init__(self, symbol: Symbol):
         self.msg = f"The symbol {symbol} is not valid. "
+
+
+class OrderSequencerIsFullError(Exception):
+    """Exception for cases when somebody tries to submit an operation to order sequencer with full queue"""
+    def __init__(self, maxsize: int):
+        self.msg = f"The order sequencer's queue is full ({maxsize} operations). "
+        super().__init__(self.msg)
+
+
+class OrderSequencerIsStoppedError(Exception):
+    """Exception for cases when somebody tries to submit an operation to order sequencer that is not running"""
+    def __init__(self):
+        self.msg = "The order sequencer is not running. "
+        super().__init__(self.msg)
+
+
+class OrderIsNotAmendableError(Exception):
+    """Exception for cases when somebody tries to amend order that doesn't wait in order book (finished or unknown)"""
+    def __init__(self, order):
+        self.msg = f"The order {order.id} doesn't wait in order book, so it cannot be amended. "
+        super().__init__(self.msg)
+
+
+class OrderIsNotWaitingError(Exception):
+    """Exception for cases when somebody tries to cancel, fill or reject order that doesn't wait in order book
+    (finished or unknown)"""
+    def __init__(self, order):
+        self.msg = f"The order {order.id} doesn't wait in order book, so it cannot be finished. "
+        super().__init__(self.msg)
+
+
+class ShardedOrderBookIsStoppedError(Exception):
+    """Exception for cases when somebody tries to send a request to sharded order book that is not running"""
+    def __init__(self):
+        self.msg = "The sharded order book is not running. "
+        super().__init__(self.msg)
@@ -1,29 +1,58 @@
-import time
+"""
+Simulation of the order book under synthetic order flow (see LoadGenerator): it's used to find out
+which rate the book can handle on the hardware. Defaults are in load_generator section of config.yml.
 
-from src.entity.order_book import OrderBook
+Run from the repository root:
+    python -m src.run [--rate 1000] [--duration 10] [--cancel-ratio 0.2] [--mix market=1,limit=6,stop=2,stop_limit=1]
+"""
+import argparse
+
+from src.conf.config_parser import ConfigParser
 from src.entity.deep import Deep
-from src.entity.order import MarketOrder, LimitOrder, StopLimitOrder, StopOrder
-from src.entity.symbol import Symbol
-from src.enums import OrderAction, SymbolType, Currency
-
-deep = Deep(4, 4)
-order_book = OrderBook(deep)
-
-symbol1 = Symbol('symbol1', 'exchange1', SymbolType.STOCK, Currency.EUR, is_enabled=True)
-symbol2 = Symbol('symbol2', 'exchange1', SymbolType.OPTION, Currency.USD, is_enabled=True)
-
-order1 = MarketOrder(symbol1, 2.5, OrderAction.BUY)
-order2 = LimitOrder(symbol2, 1500, 12, OrderAction.SELL)
-order3 = StopOrder(symbol1, 70, 20, OrderAction.BUY)
-order4 = StopLimitOrder(symbol2, 70, 80, 2.5, OrderAction.SELL)
-print(f"Order1 is {order1.__dict__}\nOrder2 is {order2.__dict__}\nOrder3 is {order3.__dict__}\nOrder4 is {order4.__dict__}")
-
-order_book.place_order(order1)
-order_book.place_order(order2)
-order_book.place_order(order3)
-order_book.place_order(order4)
-
-while len(order_book.orders) < 4:
-    print(order_book.get_market_data())
-    time.sleep(5)
-print(order_book.get_market_data())
+from src.entity.order_book import OrderBook
+from src.enums import OrderType, LogLevel
+from src.utils.event_log import event_log
+from src.utils.load_generator import LoadGenerator, OrderFlowGenerator
+
+
+def parse_mix(value: str) -> dict:
+    mix = dict()
+    for item in value.split(','):
+        name, weight = item.split('=')
+        mix[OrderType(name.strip().replace('_', ' '))] = float(weight)
+    return mix
+
+
+def main(argv=None) -> None:
+    config_parser = ConfigParser()
+    config = config_parser.parse_config('load_generator')
+    symbols = config_parser.parse_config('quotes_generator')['symbols']
+
+    parser = argparse.ArgumentParser(description='Drive the order book by synthetic order flow')
+    parser.add_argument('--rate', type=float, default=config['rate'], help='target requests per second')
+    parser.add_argument('--duration', type=float, default=config['duration'], help='duration in seconds')
+    parser.add_argument('--cancel-ratio', type=float, default=config['cancel_ratio'],
+                        help='probability of request to be cancel')
+    parser.add_argument('--max-quantity', type=int, default=config['max_quantity'])
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help='weights of order types, for example market=1,limit=6,stop=2,stop_limit=1')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--log-level', choices=[level.name.lower() for level in LogLevel], default='warning',
+                        help='level of the event log (info logs each placed order)')
+    args = parser.parse_args(argv)
+    event_log.level = LogLevel[args.log_level.upper()]
+
+    order_mix = args.mix or {OrderType(name): weight for name, weight in config['order_mix'].items()}
+    flow = OrderFlowGenerator(symbols, order_mix, args.max_quantity, seed=args.seed)
+    order_book = OrderBook(Deep(4, 4))
+    load_generator = LoadGenerator(order_book, flow, args.rate, args.cancel_ratio, seed=args.seed)
+
+    report = load_generator.run(args.duration)
+    event_log.flush()
+    print(report)
+    for symbol in flow.symbols:
+        print(f"{symbol.name}: {order_book.get_market_data(symbol)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+import gc
+import math
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from operator import attrgetter
+from uuid import UUID, SafeUUID
+
+from src.entity.order import MarketOrder, LimitOrder, StopOrder, StopLimitOrder
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, OrderEvent, OrderStatus, OrderType, SymbolType, Currency
+
+# Codes of enums and order classes in binary files (journal and snapshots)
+ORDER_EVENTS = tuple(OrderEvent)
+ORDER_CLASSES = (MarketOrder, LimitOrder, StopOrder, StopLimitOrder)
+ORDER_TYPES = tuple(OrderType)
+ORDER_ACTIONS = tuple(OrderAction)
+ORDER_STATUSES = tuple(OrderStatus)
+SYMBOL_TYPES = tuple(SymbolType)
+CURRENCIES = tuple(Currency)
+# Code of None (or unknown value) of order's action and status
+NONE_CODE = 255
+ORDER_EVENT_CODES = {value: code for code, value in enumerate(ORDER_EVENTS)}
+ORDER_CLASS_CODES = {value: code for code, value in enumerate(ORDER_CLASSES)}
+ORDER_TYPE_CODES = {value: code for code, value in enumerate(ORDER_TYPES)}
+ORDER_ACTION_CODES = {value: code for code, value in enumerate(ORDER_ACTIONS)}
+ORDER_STATUS_CODES = {value: code for code, value in enumerate(ORDER_STATUSES)}
+SYMBOL_TYPE_CODES = {value: code for code, value in enumerate(SYMBOL_TYPES)}
+CURRENCY_CODES = {value: code for code, value in enumerate(CURRENCIES)}
+
+# Symbol: number of symbol in the file, type, currency, is_enabled, then name and exchange (length + utf-8)
+SYMBOL_RECORD = struct.Struct('<IBBB')
+STRING_LENGTH = struct.Struct('<H')
+
+# Snapshot: header (magic, version, crc32 of the rest of the file, number of symbols, number of orders), symbols,
+# then columns of orders. Each column is packed array of one field of all orders:
+# ids (2 x uint64: high and low halves), symbol numbers (uint32), class, type, action, status codes (uint8),
+# prices, quantities, stop prices (float64, nan if order doesn't have stop price)
+SNAPSHOT_MAGIC = b'BOOK'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sHIIQ')
+COLUMNS = (('id_high', 'Q'), ('id_low', 'Q'), ('symbol', 'I'), ('class', 'B'), ('type', 'B'), ('action', 'B'),
+           ('status', 'B'), ('price', 'd'), ('quantity', 'd'), ('stop_price', 'd'))
+UINT64_MASK = (1 << 64) - 1
+
+
+def _codes_by_id(values: tuple) -> dict:
+    codes = {id(value): code for code, value in enumerate(values)}
+    codes[id(None)] = NONE_CODE
+    return codes
+
+
+def _encode_codes(codes: dict, values: tuple) -> array:
+    try:
+        return array('B', map(codes.__getitem__, map(id, values)))
+    except KeyError:
+        # There are unknown values (for example rejected order with wrong action)
+        return array('B', [codes.get(id(value), NONE_CODE) for value in values])
+
+
+def decode_value(values: tuple, code: int):
+    return values[code] if code != NONE_CODE else None
+
+
+def encode_symbol(number: int, symbol: Symbol) -> bytes:
+    name, exchange = symbol.name.encode('utf-8'), symbol.exchange.encode('utf-8')
+    return b''.join((SYMBOL_RECORD.pack(number, SYMBOL_TYPE_CODES.get(symbol.type, NONE_CODE),
+                                        CURRENCY_CODES.get(symbol.currency, NONE_CODE), symbol.is_enabled),
+                     STRING_LENGTH.pack(len(name)), name, STRING_LENGTH.pack(len(exchange)), exchange))
+
+
+def decode_symbol(data: bytes, offset: int = 0) -> tuple:
+    """
+    This function provide an ability to read the symbol written by encode_symbol.
+
+    :return: tuple (number of symbol, symbol, offset after the symbol)
+    """
+    number, type_code, currency_code, is_enabled = SYMBOL_RECORD.unpack_from(data, offset)
+    offset += SYMBOL_RECORD.size
+    strings = list()
+    for _ in range(2):
+        length, = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(bytes(data[offset:offset + length]).decode('utf-8'))
+        offset += length
+    name, exchange = strings
+    symbol = Symbol(name, exchange, decode_value(SYMBOL_TYPES, type_code), decode_value(CURRENCIES, currency_code),
+                    bool(is_enabled))
+    return number, symbol, offset
+
+
+def encode_book_snapshot(orders: list) -> bytes:
+    """
+    This function provide an ability to pack orders to the binary snapshot.
+
+    :param orders: list of orders in the order they should be restored (see OrderBook._dump_orders)
+    :return: content of the snapshot
+    """
+    # Fields are read in one pass (orders of the book are spread over memory, so each pass costs cache misses),
+    # then columns are built from contiguous tuples
+    nan = math.nan
+    ids, symbols_column, classes, types, actions, statuses, prices, quantities, stop_prices = zip(*[
+        (order._id.int, order._symbol, type(order), order._type, order._action, order._status, order._price,
+         order._quantity, getattr(order, 'stop_price', nan)) for order in orders]) if orders else ((),) * 9
+
+    symbol_numbers = dict()
+    symbols = list()
+    for symbol in symbols_column:
+        if symbol.name not in symbol_numbers:
+            symbol_numbers[symbol.name] = len(symbols)
+            symbols.append(encode_symbol(len(symbols), symbol))
+    # Enum members are singletons, so codes are looked up by id() that is cheaper than enum's hash
+    class_codes, type_codes = _codes_by_id(ORDER_CLASSES), _codes_by_id(ORDER_TYPES)
+    action_codes, status_codes = _codes_by_id(ORDER_ACTIONS), _codes_by_id(ORDER_STATUSES)
+    columns = {
+        'id_high': array('Q', [value >> 64 for value in ids]),
+        'id_low': array('Q', [value & UINT64_MASK for value in ids]),
+        'symbol': array('I', map(symbol_numbers.__getitem__, map(attrgetter('name'), symbols_column))),
+        'class': array('B', map(class_codes.__getitem__, map(id, classes))),
+        'type': _encode_codes(type_codes, types),
+        'action': _encode_codes(action_codes, actions),
+        'status': _encode_codes(status_codes, statuses),
+        'price': array('d', prices),
+        'quantity': array('d', quantities),
+        'stop_price': array('d', stop_prices),
+    }
+    if sys.byteorder != 'little':
+        for column in columns.values():
+            column.byteswap()
+    body = b''.join(symbols) + b''.join(columns[name].tobytes() for name, _ in COLUMNS)
+    return SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, zlib.crc32(body), len(symbols), len(orders)) + body
+
+
+def decode_book_snapshot(data: bytes) -> list:
+    """
+    This function provide an ability to unpack orders from the binary snapshot.
+    Columns are read by bulk copy, orders are created without validation.
+
+    :param data: content of the snapshot
+    :return: list of orders in the same order as they were packed
+    """
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError("Snapshot is incomplete")
+    magic, version, crc, symbols_count, orders_count = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"It's not a book snapshot of version {SNAPSHOT_VERSION}")
+    body = memoryview(data)[SNAPSHOT_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise ValueError("Snapshot is damaged")
+
+    symbols = [None] * symbols_count
+    offset = 0
+    for _ in range(symbols_count):
+        number, symbol, offset = decode_symbol(body, offset)
+        symbols[number] = symbol
+    columns = dict()
+    for name, typecode in COLUMNS:
+        column = array(typecode)
+        size = column.itemsize * orders_count
+        column.frombytes(body[offset:offset + size])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        columns[name] = column
+        offset += size
+
+    new_object, unknown = object.__new__, SafeUUID.unknown
+    set_attribute = object.__setattr__
+    classes = [ORDER_CLASSES[code] for code in range(len(ORDER_CLASSES))]
+    types, actions, statuses = [_decode_values(values) for values in (ORDER_TYPES, ORDER_ACTIONS, ORDER_STATUSES)]
+    orders = list()
+    append = orders.append
+    for high, low, symbol_number, class_code, type_code, action_code, status_code, price, quantity, stop_price in \
+            zip(*[columns[name] for name, _ in COLUMNS]):
+        order_id = new_object(UUID)
+        set_attribute(order_id, 'int', (high << 64) | low)
+        set_attribute(order_id, 'is_safe', unknown)
+        order = new_object(classes[class_code])
+        order._id = order_id
+        order._symbol = symbols[symbol_number]
+        order._type = types[type_code]
+        order._action = actions[action_code]
+        order._status = statuses[status_code]
+        order._price = price
+        order._quantity = quantity
+        if stop_price == stop_price:
+            order.stop_price = stop_price
+        append(order)
+    return orders
+
+
+def _decode_values(values: tuple) -> list:
+    # list where code is index and NONE_CODE is None
+    decoded = [None] * (NONE_CODE + 1)
+    decoded[:len(values)] = values
+    return decoded
+
+
+@contextmanager
+def gc_paused():
+    """
+    This function provide an ability to pause garbage collector while a lot of objects are created
+    (for example when the book is loaded), because collection of young objects is triggered again and again
+    and doesn't free anything.
+    """
+    is_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if is_enabled:
+            gc.enable()
@@ -0,0 +1,139 @@
+import atexit
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from src.enums import LogLevel
+
+
+def format_record(record: tuple) -> str:
+    """
+    This function provide an ability to format the record as one line: time, level, event and fields key=value.
+
+    :param record: tuple (timestamp, level, event, fields)
+    :return: line without new line symbol
+    """
+    timestamp, level, event, fields = record
+    line = f"{datetime.fromtimestamp(timestamp).isoformat()} {level.name} {event}"
+    if fields:
+        line += ' ' + ' '.join(f"{name}={getattr(value, 'value', value)}" for name, value in fields.items())
+    return line
+
+
+class EventLog:
+    """
+    The EventLog object is the structured log for hot paths: log() only checks the level and appends the record
+    (event name and fields) to the in-memory ring buffer, records are formatted and written by the background
+    writer thread. Appending to deque is atomic, so writers don't take locks. When the buffer is full, the oldest
+    records are dropped (and counted) instead of blocking the caller.
+    Fields are formatted later, so they should be immutable values (ids, prices, enums), not mutable objects.
+
+    :param level: minimal level of records
+    :param capacity: size of the ring buffer
+    :param stream: stream to write lines (stdout by default)
+    :param flush_interval: how often the writer drains the buffer, seconds
+    :param formatter: function that makes the line of the record (see format_record)
+    """
+
+    def __init__(self, level: LogLevel = LogLevel.INFO, capacity: int = 65536, stream=None,
+                 flush_interval: float = 0.1, formatter=format_record):
+        self.level = level
+        self.capacity = capacity
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.formatter = formatter
+        self.dropped = 0
+        self._records = deque(maxlen=capacity)
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        return level >= self.level
+
+    def log(self, level: LogLevel, event: str, **fields) -> None:
+        """
+        This method provide an ability to log the event without formatting and I/O in the caller's thread.
+        Writer thread is started by the first record.
+
+        :param level: level of the record
+        :param event: name of the event, for example 'order_placed'
+        :param fields: fields of the event
+        :return: None
+        """
+        if level < self.level:
+            return
+        records = self._records
+        if len(records) == self.capacity:
+            self.dropped += 1
+        records.append((time.time(), level, event, fields))
+        if self._thread is None:
+            self.start()
+
+    def debug(self, event: str, **fields) -> None:
+        if LogLevel.DEBUG >= self.level:
+            self.log(LogLevel.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields) -> None:
+        if LogLevel.INFO >= self.level:
+            self.log(LogLevel.INFO, event, **fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self.log(LogLevel.WARNING, event, **fields)
+
+    def error(self, event: str, **fields) -> None:
+        self.log(LogLevel.ERROR, event, **fields)
+
+    def start(self) -> None:
+        with self._write_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.__run, name='EventLogWriter', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        This method provide an ability to stop the writer thread. Records left in the buffer are written.
+
+        :return: None
+        """
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """
+        This method provide an ability to write all buffered records right now (in the caller's thread).
+
+        :return: number of written records
+        """
+        with self._write_lock:
+            records, formatter = self._records, self.formatter
+            lines = list()
+            while records:
+                try:
+                    lines.append(formatter(records.popleft()))
+                except IndexError:
+                    break
+            if lines:
+                stream = self.stream if self.stream is not None else sys.stdout
+                stream.write('\n'.join(lines) + '\n')
+                stream.flush()
+            return len(lines)
+
+    def __run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                sys.stderr.write(f"Event log writer failed: {e!r}\n")
+
+
+event_log = EventLog()
+atexit.register(event_log.flush)
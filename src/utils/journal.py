@@ -0,0 +1,371 @@
+import math
+import os
+import struct
+import threading
+import zlib
+from uuid import UUID
+
+from src.entity.deep import Deep
+from src.entity.order import Order
+from src.entity.order_book import OrderBook
+from src.entity.order_update import OrderUpdate
+from src.enums import OrderEvent
+from src.utils.book_snapshot import ORDER_CLASSES, ORDER_TYPES, ORDER_ACTIONS, ORDER_STATUSES, NONE_CODE, \
+    ORDER_EVENT_CODES, ORDER_CLASS_CODES, ORDER_TYPE_CODES, ORDER_ACTION_CODES, ORDER_STATUS_CODES, decode_value, \
+    encode_symbol, decode_symbol, encode_book_snapshot, decode_book_snapshot, gc_paused
+from src.utils.quotes_publisher import QuotesPublisher
+
+# Frame: crc32 of the rest of the frame, payload length, sequence number, kind of payload, then payload.
+# Sequence numbers of order records grow by 1, symbol records have sequence 0.
+FRAME_HEADER = struct.Struct('<IIQB')
+SYMBOL_FRAME = 1
+ORDER_FRAME = 2
+# Order: event, id, number of symbol, class, type, action, status, price, quantity, stop price (nan if there is
+# no stop price), number of counterparties, then counterparties (resting orders changed by executions)
+ORDER_RECORD = struct.Struct('<B16sIBBBBdddI')
+COUNTERPARTY_RECORD = struct.Struct('<16sdB')
+
+SEGMENT_PREFIX = 'journal-'
+SNAPSHOT_PREFIX = 'snapshot-'
+FILE_SUFFIX = '.bin'
+
+
+def _encode_frame(sequence: int, kind: int, payload: bytes) -> bytes:
+    header = FRAME_HEADER.pack(0, len(payload), sequence, kind)
+    crc = zlib.crc32(payload, zlib.crc32(header[4:]))
+    return struct.pack('<I', crc) + header[4:] + payload
+
+
+def _iter_frames(data: bytes):
+    """
+    This function provide an ability to read frames of the file. Reading stops on the first incomplete
+    or broken frame (the tail that wasn't fully written before crash).
+
+    :param data: content of the file
+    :return: iterator of tuples (sequence, kind, payload, offset of the frame's end)
+    """
+    offset, size = 0, len(data)
+    while offset + FRAME_HEADER.size <= size:
+        crc, length, sequence, kind = FRAME_HEADER.unpack_from(data, offset)
+        end = offset + FRAME_HEADER.size + length
+        if end > size:
+            return
+        payload = data[offset + FRAME_HEADER.size:end]
+        if zlib.crc32(payload, zlib.crc32(data[offset + 4:offset + FRAME_HEADER.size])) != crc:
+            return
+        yield sequence, kind, payload, end
+        offset = end
+
+
+def _encode_order(event: OrderEvent, order: Order, symbol_number: int, counterparties: list) -> bytes:
+    stop_price = getattr(order, 'stop_price', None)
+    record = ORDER_RECORD.pack(ORDER_EVENT_CODES[event], order.id.bytes, symbol_number,
+                               ORDER_CLASS_CODES[type(order)], ORDER_TYPE_CODES.get(order.type, NONE_CODE),
+                               ORDER_ACTION_CODES.get(order.action, NONE_CODE),
+                               ORDER_STATUS_CODES.get(order.status, NONE_CODE),
+                               order.price, order.quantity, math.nan if stop_price is None else stop_price,
+                               len(counterparties))
+    if not counterparties:
+        return record
+    return record + b''.join(COUNTERPARTY_RECORD.pack(c.id.bytes, c.quantity, ORDER_STATUS_CODES[c.status])
+                             for c in counterparties)
+
+
+def _apply_order(order_book: OrderBook, payload: bytes, symbols: dict) -> None:
+    """
+    This function provide an ability to apply the order record to the order book:
+    the order gets its state after the event and resting orders get their states after executions.
+    """
+    (_, order_id, symbol_number, class_code, type_code, action_code, status_code, price, quantity, stop_price,
+     counterparties_count) = ORDER_RECORD.unpack_from(payload, 0)
+    order = ORDER_CLASSES[class_code].from_trusted(
+        symbols[symbol_number], price, quantity, decode_value(ORDER_TYPES, type_code),
+        decode_value(ORDER_ACTIONS, action_code), UUID(bytes=order_id), decode_value(ORDER_STATUSES, status_code),
+        None if math.isnan(stop_price) else stop_price)
+    order_book._restore_order(order)
+    offset = ORDER_RECORD.size
+    for _ in range(counterparties_count):
+        counterparty_id, counterparty_quantity, counterparty_status = COUNTERPARTY_RECORD.unpack_from(payload, offset)
+        offset += COUNTERPARTY_RECORD.size
+        order_book._restore_order_state(UUID(bytes=counterparty_id), counterparty_quantity,
+                                        decode_value(ORDER_STATUSES, counterparty_status))
+
+
+def _list_files(directory: str, prefix: str) -> list:
+    return sorted(name for name in os.listdir(directory) if name.startswith(prefix) and name.endswith(FILE_SUFFIX))
+
+
+def _file_sequence(name: str, prefix: str) -> int:
+    return int(name[len(prefix):-len(FILE_SUFFIX)])
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    The Journal object is write-ahead journal of the order book: each order event (place, trigger, fill, cancel,
+    reject) is appended as binary record with the order's state after the event and the states of resting orders
+    changed by its executions. Records are written by background thread with group commit: all records of
+    commit_interval are written and fsync-ed together, so journal doesn't throttle the order book
+    (records of the last commit_interval can be lost by power failure, flush() waits for durability).
+    Snapshot of the whole book (see OrderBook.save_snapshot) is written after each snapshot_interval records
+    and old journal segments are removed, so recovery loads the latest snapshot and replays only the journal's tail.
+
+    Usage:
+        journal = Journal(directory)
+        order_book = journal.recover(Deep(10, 10))
+        journal.start(order_book)
+        ...
+        journal.close()
+
+    :param directory: directory of journal segments and snapshots (it's created if it doesn't exist)
+    :param commit_interval: max time in seconds between group commits
+    :param snapshot_interval: how much records are written between snapshots (None - snapshots only by snapshot())
+    :param segment_size: size in bytes of journal segment that is closed and replaced by new one
+    """
+
+    def __init__(self, directory: str, commit_interval: float = 0.005, snapshot_interval: int = 100000,
+                 segment_size: int = 64 * 1024 * 1024):
+        self.directory = str(directory)
+        self.commit_interval = commit_interval
+        self.snapshot_interval = snapshot_interval
+        self.segment_size = segment_size
+        os.makedirs(self.directory, exist_ok=True)
+        self.order_book = None
+        # sequence of the last record (None until it's read from the directory by recover or start)
+        self.sequence = None
+        self.durable_sequence = 0
+        self._buffered_sequence = 0
+        self._symbol_numbers = dict()
+        self._symbol_records = list()
+        self._buffer = list()
+        self._records_since_snapshot = 0
+        self._is_snapshot_requested = False
+        self._is_flush_requested = False
+        self._is_closed = False
+        self._condition = threading.Condition()
+        self._snapshot_lock = threading.Lock()
+        self._thread = None
+        self._segment = None
+        # closed segments: list of tuples (path, sequence of the last record)
+        self._closed_segments = list()
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def recover(self, deep: Deep, quotes: QuotesPublisher = None) -> OrderBook:
+        """
+        This method provide an ability to rebuild the order book from the directory: the latest snapshot is loaded
+        and journal records after it are replayed. Orders are restored in their states without matching.
+        Broken tails of segments are cut and segments without records are removed.
+
+        :param deep: deep of the new order book
+        :param quotes: source of quotes of the new order book (random quotes generator by default)
+        :return: new order book
+        """
+        order_book = OrderBook(deep, quotes)
+        snapshot_sequence = 0
+        for name in reversed(_list_files(self.directory, SNAPSHOT_PREFIX)):
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                data = f.read()
+            try:
+                with gc_paused():
+                    order_book._restore_orders(decode_book_snapshot(data))
+            except ValueError:
+                # Damaged snapshot, the previous one is used
+                continue
+            snapshot_sequence = _file_sequence(name, SNAPSHOT_PREFIX)
+            break
+
+        self.sequence = snapshot_sequence
+        for name in _list_files(self.directory, SEGMENT_PREFIX):
+            path = os.path.join(self.directory, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            symbols = dict()
+            last_sequence = valid_size = 0
+            for sequence, kind, payload, valid_size in _iter_frames(data):
+                if kind == SYMBOL_FRAME:
+                    number, symbol, _ = decode_symbol(payload)
+                    symbols[number] = symbol
+                    continue
+                last_sequence = sequence
+                if sequence > snapshot_sequence:
+                    _apply_order(order_book, payload, symbols)
+                    self.sequence = sequence
+            if last_sequence == 0:
+                # Segment without records (crash before its first record was written), its name can be used again
+                os.remove(path)
+                continue
+            if valid_size < len(data):
+                # Broken tail is cut, so records written after restart are never behind it
+                with open(path, 'r+b') as f:
+                    f.truncate(valid_size)
+                    os.fsync(f.fileno())
+            self._closed_segments.append((path, last_sequence))
+        self.durable_sequence = self._buffered_sequence = self.sequence
+        return order_book
+
+    def start(self, order_book: OrderBook) -> None:
+        """
+        This method provide an ability to start journaling of the order book's events.
+        Records are written to new segment, existing segments are never appended.
+
+        :param order_book: order book (usually returned by recover)
+        :return: None
+        """
+        if self.sequence is None:
+            self.recover(order_book.deep, order_book.quotes)
+        self.order_book = order_book
+        self.__open_segment()
+        self._thread = threading.Thread(target=self.__run, name='Journal', daemon=True)
+        self._thread.start()
+        order_book.subscribe_orders(self._on_order_update)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        This method provide an ability to wait until all records that are already appended are written
+        and fsync-ed.
+
+        :param timeout: max time in seconds to wait (None - wait forever)
+        :return: True if records are durable, otherwise False (timeout is expired)
+        """
+        with self._condition:
+            sequence = self._buffered_sequence
+            self._is_flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self.durable_sequence >= sequence or self._thread is None,
+                                            timeout)
+
+    def snapshot(self) -> int:
+        """
+        This method provide an ability to write snapshot of the whole order book right now.
+        Journal segments that are fully covered by the snapshot are removed.
+
+        :return: sequence of the last record included to the snapshot
+        """
+        with self._snapshot_lock:
+            return self.__write_snapshot()
+
+    def __write_snapshot(self) -> int:
+        with self.order_book._lock:
+            sequence = self.sequence
+            with gc_paused():
+                data = encode_book_snapshot(self.order_book._dump_orders())
+            self._records_since_snapshot = 0
+
+        path = os.path.join(self.directory, f'{SNAPSHOT_PREFIX}{sequence:020d}{FILE_SUFFIX}')
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        _fsync_directory(self.directory)
+
+        # The previous snapshot is kept in case the latest one is damaged
+        for name in _list_files(self.directory, SNAPSHOT_PREFIX)[:-2]:
+            os.remove(os.path.join(self.directory, name))
+        previous_snapshots = _list_files(self.directory, SNAPSHOT_PREFIX)[:-1]
+        if previous_snapshots:
+            covered_sequence = _file_sequence(previous_snapshots[-1], SNAPSHOT_PREFIX)
+            with self._condition:
+                closed_segments = self._closed_segments
+                self._closed_segments = [s for s in closed_segments if s[1] > covered_sequence]
+            for segment_path, last_sequence in closed_segments:
+                if last_sequence <= covered_sequence:
+                    os.remove(segment_path)
+        return sequence
+
+    def close(self) -> None:
+        """
+        This method provide an ability to stop journaling: all appended records are written and fsync-ed.
+
+        :return: None
+        """
+        if self._thread is None:
+            return
+        self.order_book.unsubscribe_orders(self._on_order_update)
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+        self._segment.close()
+        self._segment = None
+
+    def _on_order_update(self, update: OrderUpdate) -> None:
+        # It's called by the order book under its lock, so records are appended in the order of events.
+        # Sequence and symbols are changed only when the record is encoded, so failed record doesn't leave a gap
+        symbol = update.order.symbol
+        symbol_number = self._symbol_numbers.get(symbol.name)
+        is_new_symbol = symbol_number is None
+        if is_new_symbol:
+            symbol_number = len(self._symbol_numbers)
+        sequence = self.sequence + 1
+        record = _encode_frame(sequence, ORDER_FRAME,
+                               _encode_order(update.event, update.order, symbol_number, update.counterparties))
+        frames = list()
+        if is_new_symbol:
+            self._symbol_numbers[symbol.name] = symbol_number
+            symbol_record = _encode_frame(0, SYMBOL_FRAME, encode_symbol(symbol_number, symbol))
+            self._symbol_records.append(symbol_record)
+            frames.append(symbol_record)
+        frames.append(record)
+        self.sequence = sequence
+        with self._condition:
+            self._buffer.extend(frames)
+            self._buffered_sequence = self.sequence
+            self._records_since_snapshot += 1
+            if self.snapshot_interval is not None and self._records_since_snapshot >= self.snapshot_interval:
+                self._is_snapshot_requested = True
+                self._condition.notify_all()
+
+    def __open_segment(self) -> None:
+        path = os.path.join(self.directory, f'{SEGMENT_PREFIX}{self._buffered_sequence + 1:020d}{FILE_SUFFIX}')
+        # The name is never reused: segment that starts with the same sequence has no records, recover removes it
+        self._segment = open(path, 'xb')
+        # Symbols are defined in each segment, because old segments are removed
+        self._segment.write(b''.join(list(self._symbol_records)))
+        _fsync_directory(self.directory)
+
+    def __rotate_segment(self, last_sequence: int) -> None:
+        self._segment.close()
+        self._closed_segments.append((self._segment.name, last_sequence))
+        self.__open_segment()
+
+    def __run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._is_flush_requested or self._is_closed or self._is_snapshot_requested,
+                    self.commit_interval)
+                buffer, self._buffer = self._buffer, list()
+                sequence = self._buffered_sequence
+                self._is_flush_requested = False
+                is_closed = self._is_closed
+                is_snapshot_requested, self._is_snapshot_requested = self._is_snapshot_requested, False
+
+            if buffer:
+                self._segment.write(b''.join(buffer))
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+            with self._condition:
+                self.durable_sequence = sequence
+                self._condition.notify_all()
+
+            if is_closed:
+                return
+            if is_snapshot_requested:
+                self.snapshot()
+            if self._segment.tell() >= self.segment_size:
+                with self._condition:
+                    self.__rotate_segment(self.durable_sequence)
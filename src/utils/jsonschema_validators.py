@@ -1,30 +1,113 @@
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+import json
+import numbers
+from functools import lru_cache
 
+from jsonschema.exceptions import ValidationError, best_match
+from jsonschema.validators import validator_for
 
-def is_market_data_schema_valid(market_data):
-    market_data_schema = {
-        "definitions": {
-            "order": {
-                "$id": "#order",
-                "type": "array",
+MARKET_DATA_SCHEMA = {
+    "definitions": {
+        "levels": {
+            "type": "array",
+            "items": {
+                "type": "object",
                 "properties": {
                     "price": {"type": "number"},
                     "quantity": {"type": "number"}
-                }
+                },
+                "required": ["price", "quantity"]
             }
+        }
+    },
+    "type": "object",
+    "properties": {
+        "asks": {"$ref": "#/definitions/levels"},
+        "bids": {"$ref": "#/definitions/levels"}
+    },
+    "required": ["asks", "bids"]
+}
+
+
+@lru_cache(maxsize=None)
+def _compile_validator(schema_json: str):
+    schema = json.loads(schema_json)
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def get_validator(schema: dict):
+    """
+    This function provide an ability to get the validator of the schema. The schema is checked and its validator
+    is built once, next calls with equal schema return the same validator (jsonschema.validate does both
+    on each call).
+
+    :param schema: json schema
+    :return: jsonschema validator (is_valid, iter_errors, validate)
+    """
+    return _compile_validator(json.dumps(schema, sort_keys=True))
+
+
+market_data_validator = get_validator(MARKET_DATA_SCHEMA)
+
+
+def _is_number(value) -> bool:
+    # The same as jsonschema's number type: bool is not a number (exact float and int are checked first, it's faster)
+    return type(value) in (float, int) or isinstance(value, numbers.Number) and not isinstance(value, bool)
+
 
-        },
-        "type": "object",
-        "properties": {
-            "asks": {"type": "array", "$ref": "#/definitions/order"},
-            "bids": {"type": "array", "$ref": "#/definitions/order"}
-        },
-        'required': ['asks', 'bids']
+def _are_levels_valid(levels) -> bool:
+    if not isinstance(levels, list):
+        return False
+    for level in levels:
+        if not isinstance(level, dict):
+            return False
+        try:
+            if not (_is_number(level['price']) and _is_number(level['quantity'])):
+                return False
+        except KeyError:
+            return False
+    return True
 
-    }
+
+def is_market_data_shape_valid(market_data) -> bool:
+    """
+    This function provide an ability to check market data without jsonschema (hand-written checks of
+    MARKET_DATA_SCHEMA). Its result is the same as market_data_validator.is_valid(market_data).
+
+    :param market_data: market data (see OrderBook.get_market_data)
+    :return: True if market data is valid
+    """
+    if not isinstance(market_data, dict):
+        return False
+    try:
+        return _are_levels_valid(market_data['asks']) and _are_levels_valid(market_data['bids'])
+    except KeyError:
+        return False
+
+
+def is_market_data_schema_valid(market_data):
+    """
+    This function provide an ability to validate market data by MARKET_DATA_SCHEMA (precompiled validator).
+
+    :param market_data: market data (see OrderBook.get_market_data)
+    :return: True or tuple (False, ValidationError)
+    """
     try:
-        validate(instance=market_data, schema=market_data_schema)
+        market_data_validator.validate(market_data)
         return True
     except ValidationError as e:
         return False, e
+
+
+def validate_market_data_batch(snapshots) -> list:
+    """
+    This function provide an ability to validate a lot of market data snapshots (for example all published ones).
+    Each snapshot is checked by fast hand-written checks, jsonschema validator is used only for invalid snapshots
+    to get their errors.
+
+    :param snapshots: iterable of market data
+    :return: list of ValidationError or None (valid snapshot) in the same order
+    """
+    return [None if is_market_data_shape_valid(market_data)
+            else best_match(market_data_validator.iter_errors(market_data)) for market_data in snapshots]
@@ -0,0 +1,189 @@
+import random
+import time
+from dataclasses import dataclass, field
+
+from src.entity.order import Order, MarketOrder, LimitOrder, StopOrder, StopLimitOrder
+from src.entity.symbol import Symbol
+from src.enums import OrderAction, OrderStatus, OrderType, SymbolType, Currency
+
+DEFAULT_ORDER_MIX = {OrderType.MARKET: 1, OrderType.LIMIT: 6, OrderType.STOP: 2, OrderType.STOP_LIMIT: 1}
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def percentiles(latencies: list) -> dict:
+    """
+    This function provide an ability to summarize latencies.
+
+    :param latencies: list of latencies in seconds
+    :return: dict {'p50': value, ..., 'max': value} in microseconds (empty dict if there are no latencies)
+    """
+    if not latencies:
+        return dict()
+    latencies = sorted(latencies)
+    result = {f'p{percentile}': latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))] * 10 ** 6
+              for percentile in PERCENTILES}
+    result['max'] = latencies[-1] * 10 ** 6
+    return result
+
+
+class OrderFlowGenerator:
+    """
+    The OrderFlowGenerator object produces random orders of the given mix of types.
+    Prices are drawn from normal distribution N(mu, sigma) of the symbol (the same as quotes of QuotesGenerator),
+    so limit orders are spread around the market and stop orders are triggered by some of the next quotes.
+
+    :param symbols: dict {symbol name: {'mu': value, 'sigma': value}} (quotes_generator's symbols from config.yml)
+    :param order_mix: dict {OrderType: weight}
+    :param max_quantity: quantity of order is random integer from 1 to max_quantity
+    :param seed: seed of random generator
+    """
+
+    def __init__(self, symbols: dict, order_mix: dict = None, max_quantity: int = 10, seed: int = None):
+        order_mix = order_mix if order_mix is not None else DEFAULT_ORDER_MIX
+        if not order_mix or any(weight < 0 for weight in order_mix.values()) or not sum(order_mix.values()):
+            raise ValueError(f"Order mix {order_mix} should have positive weights")
+        self.symbols = [Symbol(name, 'exchange1', SymbolType.STOCK, Currency.USD) for name in symbols]
+        self._distributions = [(float(symbols[name]['mu']), float(symbols[name]['sigma'])) for name in symbols]
+        self._types = list(order_mix)
+        self._weights = list(order_mix.values())
+        self.max_quantity = max_quantity
+        self._random = random.Random(seed)
+
+    def _price(self, index: int) -> float:
+        mu, sigma = self._distributions[index]
+        # Order's price should be > 0
+        return max(round(self._random.gauss(mu, sigma), 2), 0.01)
+
+    def next_order(self) -> Order:
+        rnd = self._random
+        index = rnd.randrange(len(self.symbols))
+        symbol = self.symbols[index]
+        order_type = rnd.choices(self._types, self._weights)[0]
+        action = OrderAction.BUY if rnd.random() < 0.5 else OrderAction.SELL
+        quantity = rnd.randint(1, self.max_quantity)
+        if order_type == OrderType.MARKET:
+            return MarketOrder(symbol, quantity, action)
+        if order_type == OrderType.LIMIT:
+            return LimitOrder(symbol, self._price(index), quantity, action)
+        if order_type == OrderType.STOP:
+            return StopOrder(symbol, self._price(index), quantity, action)
+        return StopLimitOrder(symbol, self._price(index), self._price(index), quantity, action)
+
+
+@dataclass
+class LoadReport:
+    """
+    Result of the load: latency is the time of the order book call, response time also includes waiting
+    when the generator is behind the schedule (it's not hidden when the book is slower than the target rate).
+    Latencies are in microseconds.
+    """
+    target_rate: float
+    achieved_rate: float
+    duration: float
+    placed: int
+    cancelled: int
+    errors: int
+    executions: int
+    latency: dict = field(default_factory=dict)
+    response_time: dict = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        def format_percentiles(values: dict) -> str:
+            return ', '.join(f"{name} {value:.1f}" for name, value in values.items())
+
+        return (f"Target rate {self.target_rate:,.0f} ops/s, achieved {self.achieved_rate:,.0f} ops/s "
+                f"in {self.duration:.2f} s\n"
+                f"Placed {self.placed}, cancelled {self.cancelled}, errors {self.errors}, "
+                f"executions {self.executions}\n"
+                f"Latency us: {format_percentiles(self.latency)}\n"
+                f"Response time us: {format_percentiles(self.response_time)}")
+
+
+class LoadGenerator:
+    """
+    The LoadGenerator object drives the order book by synthetic order flow at the target rate.
+    Requests arrive as Poisson process (exponential time between arrivals) by the fixed schedule (open loop):
+    if the book is slower than the rate, requests aren't skipped, they are sent late and it's visible in
+    response time. Each request is placing of new order or (with cancel_ratio probability) cancelling of
+    one of the orders that still wait in the book.
+
+    :param order_book: order book (OrderBook or any object with place_order and cancel_order)
+    :param flow: generator of orders
+    :param rate: target rate of requests per second
+    :param cancel_ratio: probability of request to be cancel (from 0 to 1)
+    :param seed: seed of random generator of arrivals and cancels
+    """
+
+    def __init__(self, order_book, flow: OrderFlowGenerator, rate: float, cancel_ratio: float = 0.2,
+                 seed: int = None):
+        if rate <= 0:
+            raise ValueError(f"Rate {rate} should be > 0")
+        if not 0 <= cancel_ratio <= 1:
+            raise ValueError(f"Cancel ratio {cancel_ratio} is out of range [0, 1]")
+        self.order_book = order_book
+        self.flow = flow
+        self.rate = rate
+        self.cancel_ratio = cancel_ratio
+        self._random = random.Random(seed)
+        self._resting = list()
+
+    def _pop_resting_order(self):
+        # Random order that still waits in the book (removed by swap with the last one, so it's O(1))
+        resting = self._resting
+        while resting:
+            index = self._random.randrange(len(resting))
+            resting[index], resting[-1] = resting[-1], resting[index]
+            order = resting.pop()
+            if order.status in (OrderStatus.PENDING, OrderStatus.CREATED):
+                return order
+        return None
+
+    def run(self, duration: float = None, requests: int = None) -> LoadReport:
+        """
+        This method provide an ability to send requests until duration is over or the number of requests is sent.
+
+        :param duration: duration of the load in seconds
+        :param requests: number of requests
+        :return: LoadReport
+        """
+        if duration is None and requests is None:
+            raise ValueError("Duration or number of requests should be set")
+        rnd = self._random
+        clock = time.perf_counter
+        latencies, response_times = list(), list()
+        placed = cancelled = errors = executions = 0
+        started_at = scheduled_at = clock()
+        finish_at = started_at + duration if duration is not None else float('inf')
+        sent = 0
+        while requests is None or sent < requests:
+            scheduled_at += rnd.expovariate(self.rate)
+            if scheduled_at > finish_at:
+                break
+            delay = scheduled_at - clock()
+            if delay > 0:
+                time.sleep(delay)
+
+            order = self._pop_resting_order() if rnd.random() < self.cancel_ratio else None
+            start = clock()
+            try:
+                if order is not None:
+                    self.order_book.cancel_order(order)
+                    cancelled += 1
+                else:
+                    order = self.flow.next_order()
+                    start = clock()
+                    executions += len(self.order_book.place_order(order))
+                    placed += 1
+                    if order.status in (OrderStatus.PENDING, OrderStatus.CREATED):
+                        self._resting.append(order)
+            except Exception:
+                errors += 1
+            end = clock()
+            latencies.append(end - start)
+            response_times.append(end - scheduled_at)
+            sent += 1
+
+        duration = clock() - started_at
+        return LoadReport(target_rate=self.rate, achieved_rate=sent / duration if duration else 0, duration=duration,
+                          placed=placed, cancelled=cancelled, errors=errors, executions=executions,
+                          latency=percentiles(latencies), response_time=percentiles(response_times))
@@ -0,0 +1,216 @@
+import time
+from collections import Counter
+
+from src.entity.order import MarketOrder, LimitOrder, StopOrder, StopLimitOrder
+from src.entity.order_update import OrderUpdate
+from src.enums import OrderStatus, OrderType
+
+# Histogram keeps 2^(SUB_BUCKET_BITS - 1) buckets per power of two (HDR-style log-linear buckets),
+# so recorded value is rounded by less than 1/64 (1.6%)
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+# Values up to 2^40 ns (~18 minutes) are recorded exactly, bigger ones go to the last bucket
+MAX_VALUE_BITS = 40
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+OPERATIONS = {'place_order': 'place', 'place_orders': 'place_batch', 'cancel_order': 'cancel', 'fill_order': 'fill',
+              'get_market_data': 'market_data'}
+# Orders are counted by the type they are placed with: triggered stop orders change their type to market or limit
+ORDER_CLASS_TYPES = {MarketOrder: OrderType.MARKET, LimitOrder: OrderType.LIMIT, StopOrder: OrderType.STOP,
+                     StopLimitOrder: OrderType.STOP_LIMIT}
+
+
+class LatencyHistogram:
+    """
+    The LatencyHistogram object records latencies (ns) into fixed log-linear buckets like HdrHistogram:
+    recording is O(1) without allocations and memory doesn't depend on the number of recorded values.
+    """
+
+    def __init__(self):
+        self.counts = [0] * ((MAX_VALUE_BITS - SUB_BUCKET_BITS + 2) * SUB_BUCKET_HALF)
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def bucket_index(value: int) -> int:
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+    @staticmethod
+    def bucket_value(index: int) -> int:
+        """
+        This method provide an ability to get the highest value of the bucket (percentiles are not underestimated).
+
+        :param index: index of the bucket
+        :return: value in ns
+        """
+        shift = max((index >> (SUB_BUCKET_BITS - 1)) - 1, 0)
+        return ((index - (shift << (SUB_BUCKET_BITS - 1)) + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        index = self.bucket_index(value)
+        counts = self.counts
+        counts[index if index < len(counts) else -1] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def percentile(self, quantile: float) -> int:
+        """
+        This method provide an ability to get the value that isn't exceeded by the quantile of recorded values.
+
+        :param quantile: from 0 to 1 (0.99 - 99th percentile)
+        :return: value in ns (0 if there are no values)
+        """
+        if not self.count:
+            return 0
+        rank = max(1, round(quantile * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        """
+        :return: dict {'count', 'sum', 'min', 'max', 'mean', 'p50', 'p90', 'p99', 'p99.9'} (latencies in ns)
+        """
+        result = {'count': self.count, 'sum': self.sum, 'min': self.min or 0, 'max': self.max,
+                  'mean': self.sum / self.count if self.count else 0}
+        for quantile in QUANTILES:
+            result[f'p{quantile * 100:g}'] = self.percentile(quantile)
+        return result
+
+
+class OrderBookMetrics:
+    """
+    The OrderBookMetrics object instruments the order book: latency histograms of its calls (place, cancel, fill,
+    market data), counters of orders by type and status they reached, and gauges of the book.
+    It's enabled by OrderBook.enable_metrics(): timed wrappers are set as attributes of the order book instance
+    and counters are fed by order events. Disabled metrics remove them, so not instrumented book has no overhead.
+
+    :param order_book: order book
+    """
+
+    def __init__(self, order_book):
+        self.order_book = order_book
+        self.histograms = {operation: LatencyHistogram() for operation in OPERATIONS.values()}
+        # (order type on placing, order status) -> number of orders that reached the status
+        self.orders = Counter()
+        self.executions = 0
+        self.is_enabled = False
+
+    def enable(self) -> None:
+        if self.is_enabled:
+            return
+        for method_name, operation in OPERATIONS.items():
+            setattr(self.order_book, method_name, self.__timed(getattr(self.order_book, method_name),
+                                                               self.histograms[operation]))
+        self.order_book.subscribe_orders(self._on_order_update)
+        self.is_enabled = True
+
+    def disable(self) -> None:
+        if not self.is_enabled:
+            return
+        for method_name in OPERATIONS:
+            delattr(self.order_book, method_name)
+        self.order_book.unsubscribe_orders(self._on_order_update)
+        self.is_enabled = False
+
+    def __timed(self, method, histogram: LatencyHistogram):
+        lock, clock, record = self.order_book._lock, time.perf_counter_ns, histogram.record
+
+        def timed(*args, **kwargs):
+            # Histogram is recorded under the book's lock, so concurrent calls don't lose values
+            with lock:
+                start = clock()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    record(clock() - start)
+
+        timed.__wrapped__ = method
+        return timed
+
+    def _on_order_update(self, update: OrderUpdate) -> None:
+        order = update.order
+        self.orders[(ORDER_CLASS_TYPES.get(type(order), order.type), order.status)] += 1
+        if update.executions:
+            self.executions += len(update.executions)
+            # Resting orders filled by the incoming order don't get their own events
+            for resting in update.counterparties:
+                if resting.status == OrderStatus.FILL:
+                    self.orders[(ORDER_CLASS_TYPES.get(type(resting), resting.type), OrderStatus.FILL)] += 1
+
+    def get_gauges(self) -> dict:
+        """
+        :return: dict {'price_levels', 'resting_orders', 'pending_stops', 'orders', 'history_orders'}
+        (current state of the book: live orders and finished orders in memory)
+        """
+        order_book = self.order_book
+        with order_book._lock:
+            engine = order_book._engine
+            return {
+                'price_levels': sum(len(book.bids.levels) + len(book.asks.levels) for book in engine.books.values()),
+                'resting_orders': len(engine.levels),
+                'pending_stops': len(order_book._stops),
+                'orders': len(order_book._orders),
+                'history_orders': len(order_book.history),
+            }
+
+    def to_dict(self) -> dict:
+        """
+        This method provide an ability to get all metrics.
+
+        :return: dict {
+            'latency': {operation: histogram's dict (ns)},
+            'orders': {order type value: {order status value: count}},
+            'executions': count,
+            'gauges': {gauge: value}
+        }
+        """
+        with self.order_book._lock:
+            orders = dict()
+            for (order_type, status), count in self.orders.items():
+                orders.setdefault(order_type.value, dict())[getattr(status, 'value', None)] = count
+            return {'latency': {operation: histogram.to_dict() for operation, histogram in self.histograms.items()},
+                    'orders': orders,
+                    'executions': self.executions,
+                    'gauges': self.get_gauges()}
+
+    def to_prometheus(self, prefix: str = 'order_book') -> str:
+        """
+        This method provide an ability to export metrics in Prometheus text format (latencies are summaries
+        in seconds).
+
+        :param prefix: prefix of metrics' names
+        :return: text of metrics
+        """
+        metrics = self.to_dict()
+        lines = [f'# HELP {prefix}_latency_seconds Latency of order book calls',
+                 f'# TYPE {prefix}_latency_seconds summary']
+        for operation, histogram in metrics['latency'].items():
+            for quantile in QUANTILES:
+                lines.append(f'{prefix}_latency_seconds{{operation="{operation}",quantile="{quantile:g}"}} '
+                             f'{histogram[f"p{quantile * 100:g}"] / 1e9:.9g}')
+            lines.append(f'{prefix}_latency_seconds_sum{{operation="{operation}"}} {histogram["sum"] / 1e9:.9g}')
+            lines.append(f'{prefix}_latency_seconds_count{{operation="{operation}"}} {histogram["count"]}')
+
+        lines += [f'# HELP {prefix}_orders_total Orders by type and status they reached',
+                  f'# TYPE {prefix}_orders_total counter']
+        for order_type, statuses in metrics['orders'].items():
+            for status, count in statuses.items():
+                lines.append(f'{prefix}_orders_total{{type="{order_type}",status="{status}"}} {count}')
+        lines += [f'# HELP {prefix}_executions_total Trades', f'# TYPE {prefix}_executions_total counter',
+                  f'{prefix}_executions_total {metrics["executions"]}']
+
+        for gauge, value in metrics['gauges'].items():
+            lines += [f'# TYPE {prefix}_{gauge} gauge', f'{prefix}_{gauge} {value}']
+        return '\n'.join(lines) + '\n'
@@ -1,45 +1,119 @@
 import random
 import threading
 import time
-from threading import Thread
-from src.entity.symbol import Symbol
 from src.conf.config_parser import ConfigParser
+from src.entity.symbol import Symbol
+from src.enums import LogLevel
+from src.utils.event_log import event_log
+from src.utils.quotes_publisher import QuotesPublisher
 
 
-class QuotesGenerator(Thread):
-    def __init__(self):
-        super().__init__(daemon=True)
-        config_parser = ConfigParser()
-        self.config = config_parser.parse_config('quotes_generator')
-        self.current_quotes = dict()
-        self._stop = threading.Event()
-
-    # function using _stop function
-    def stop(self):
-        self._stop.set()
-
-    def stopped(self):
-        return self._stop.isSet()
+class QuotesGenerator(QuotesPublisher):
+    """
+    The QuotesGenerator object generates random quotes of symbols from quotes_generator section of config.yml
+    in the background thread.
+    Nothing is done on import: config is read and the thread is started by start() or lazily by the first
+    quote request (for example placing of market or stop order), subscription doesn't start it. stop() stops
+    the thread (lazy start doesn't restart stopped generator, start() does).
+    """
 
     def __new__(cls):
         if not hasattr(cls, 'instance'):
             cls.instance = super(QuotesGenerator, cls).__new__(cls)
         return cls.instance
 
-    def run(self):
-        while True:
-            if self.stopped():
+    def __init__(self):
+        # It's singleton, so the next QuotesGenerator() returns already initialized object
+        if getattr(self, '_is_initialized', False):
+            return
+        QuotesPublisher.__init__(self)
+        self._thread = None
+        self._stop = threading.Event()
+        self._lifecycle_lock = threading.Lock()
+        self._is_initialized = True
+
+    @property
+    def config(self) -> dict:
+        return ConfigParser().parse_config('quotes_generator')
+
+    def start(self) -> None:
+        """
+        This method provide an ability to start generation of quotes. The first quotes are generated right away,
+        so current quotes are available when it returns.
+
+        :return: None
+        """
+        with self._lifecycle_lock:
+            if self.is_alive():
                 return
-            self.current_quotes = {
-                s: round(random.gauss(self.config['symbols'][s]['mu'], self.config['symbols'][s]['sigma']), 4)
-                for s in self.config['symbols']
-            }
-            print(self.current_quotes)
-            time.sleep(1)
+            config = self.config
+            tick_interval = config.get('tick_interval', 1)
+            if config.get('mode', 'gauss') == 'vectorized':
+                next_quotes, is_logged = self._create_vectorized_quotes(config, tick_interval), False
+            else:
+                symbols = config['symbols']
+
+                def next_quotes():
+                    return {s: round(random.gauss(symbols[s]['mu'], symbols[s]['sigma']), 4) for s in symbols}
+                is_logged = True
+            self._stop.clear()
+            self.current_quotes = next_quotes()
+            self._thread = threading.Thread(target=self.__run, args=(next_quotes, tick_interval, is_logged),
+                                            name='QuotesGenerator', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        with self._lifecycle_lock:
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: float = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _start_lazily(self) -> None:
+        if self._thread is None and not self._stop.is_set():
+            self.start()
 
     def get_current_quote(self, symbol: Symbol) -> float:
-        return self.current_quotes[symbol.name]
+        self._start_lazily()
+        return super().get_current_quote(symbol)
+
+    @staticmethod
+    def _create_vectorized_quotes(config: dict, tick_interval: float):
+        """
+        NumPy-batched mode for load testing: quotes of all symbols are generated per tick as one array
+        (see VectorizedQuotesModel) and published as QuotesArray without logging.
+        """
+        from src.utils.vectorized_quotes import VectorizedQuotesModel
+
+        model = VectorizedQuotesModel(config['symbols'], tick_interval,
+                                      correlation=config.get('correlation', 0),
+                                      random_walk=config.get('random_walk', False))
+        return model.next_quotes
+
+    def __run(self, next_quotes, tick_interval: float, is_logged: bool) -> None:
+        # Ticks are scheduled by deadline, so tick_interval is kept even when generation takes part of it
+        deadline = time.perf_counter()
+        while True:
+            if is_logged and event_log.is_enabled_for(LogLevel.DEBUG):
+                event_log.log(LogLevel.DEBUG, 'quotes', **self.current_quotes)
+            self._publish(self.current_quotes)
+            deadline += tick_interval
+            if self._stop.wait(max(deadline - time.perf_counter(), 0)):
+                return
+            if deadline < time.perf_counter():
+                deadline = time.perf_counter()
+            self.current_quotes = next_quotes()
 
 
 quote_generator = QuotesGenerator()
-quote_generator.start()
@@ -0,0 +1,136 @@
+import inspect
+import threading
+from weakref import WeakMethod
+
+from src.entity.symbol import Symbol
+from src.utils.event_log import event_log
+
+
+class QuotesPublisher:
+    """
+    The QuotesPublisher object keeps current quotes and pushes their updates to subscribers.
+    It's the interface of quote sources of the order book (OrderBook.quotes): random QuotesGenerator,
+    TickReplay of recorded quotes and so on.
+    """
+
+    def __init__(self):
+        self.current_quotes = dict()
+        self._subscribers = list()
+        self._subscribers_lock = threading.Lock()
+
+    def subscribe(self, callback, symbols=None) -> None:
+        """
+        This method provide an ability to get quotes pushed on each update instead of polling.
+        Callback is called from publisher's thread with dict {symbol name: price}.
+        If symbols are set then callback gets only quotes of these symbols that changed since the previous call
+        (and it's not called if nothing changed).
+        Bound methods are kept by weak reference, so subscription doesn't keep their object alive.
+
+        :param callback: function or bound method
+        :param symbols: iterable of symbol names (None - all symbols)
+        :return: None
+        """
+        reference = WeakMethod(callback) if inspect.ismethod(callback) else (lambda: callback)
+        subscriber = (reference, frozenset(symbols) if symbols is not None else None, dict())
+        with self._subscribers_lock:
+            self._subscribers.append(subscriber)
+
+    def subscribe_queue(self, symbols=None) -> 'QuoteSubscription':
+        """
+        This method provide an ability to read quotes by consumer's own thread without polling.
+        Subscription keeps only the latest quote of each symbol, so slow consumer doesn't get a backlog.
+
+        :param symbols: iterable of symbol names (None - all symbols)
+        :return: QuoteSubscription
+        """
+        return QuoteSubscription(self, symbols)
+
+    def unsubscribe(self, callback) -> None:
+        with self._subscribers_lock:
+            self._subscribers = [s for s in self._subscribers if s[0]() not in (None, callback)]
+
+    def _publish(self, quotes: dict) -> None:
+        is_cleanup_needed = False
+        for reference, symbols, last_quotes in self._subscribers:
+            callback = reference()
+            if callback is None:
+                is_cleanup_needed = True
+                continue
+            if symbols is not None:
+                changed = dict()
+                for name in symbols:
+                    quote = quotes.get(name)
+                    if quote is not None and quote != last_quotes.get(name):
+                        changed[name] = quote
+                if not changed:
+                    continue
+                last_quotes.update(changed)
+                quotes_to_send = changed
+            else:
+                quotes_to_send = quotes
+            try:
+                callback(quotes_to_send)
+            except Exception as e:
+                event_log.error('quotes_subscriber_failed', callback=repr(callback), error=repr(e))
+        if is_cleanup_needed:
+            with self._subscribers_lock:
+                self._subscribers = [s for s in self._subscribers if s[0]() is not None]
+
+    def get_current_quote(self, symbol: Symbol) -> float:
+        return self.current_quotes[symbol.name]
+
+
+class QuoteSubscription:
+    """
+    The QuoteSubscription object is a queue of quotes for one consumer. Quotes are coalesced:
+    only the latest quote of each symbol is kept until consumer gets it, so memory doesn't grow
+    if consumer is slower than publisher. Subscription is closed by close() or by leaving "with" block.
+
+    :param publisher: quotes generator or any other quotes publisher
+    :param symbols: iterable of symbol names (None - all symbols)
+    """
+
+    def __init__(self, publisher: QuotesPublisher, symbols=None):
+        self.publisher = publisher
+        self._latest = dict()
+        self._condition = threading.Condition()
+        self._is_closed = False
+        publisher.subscribe(self._on_quotes, symbols)
+
+    def __enter__(self) -> 'QuoteSubscription':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __iter__(self):
+        while True:
+            quotes = self.get()
+            if quotes is None:
+                return
+            yield quotes
+
+    def get(self, timeout: float = None) -> dict:
+        """
+        This method provide an ability to wait for the next quotes.
+
+        :param timeout: max time in seconds to wait (None - wait forever)
+        :return: dict {symbol name: the latest price} of symbols updated since the previous call
+        or None if subscription is closed or timeout is expired
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._latest or self._is_closed, timeout) or not self._latest:
+                return None
+            quotes, self._latest = self._latest, dict()
+            return quotes
+
+    def close(self) -> None:
+        self.publisher.unsubscribe(self._on_quotes)
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify_all()
+
+    def _on_quotes(self, quotes: dict) -> None:
+        with self._condition:
+            self._latest.update(quotes)
+            self._condition.notify()
@@ -0,0 +1,177 @@
+import mmap
+import struct
+import threading
+import time
+
+from src.utils.quotes_publisher import QuotesPublisher
+
+# File: header (magic, version, number of symbols), symbols' names (length + utf-8), then fixed-size tick records
+TICK_FILE_MAGIC = b'TICK'
+TICK_FILE_VERSION = 1
+TICK_FILE_HEADER = struct.Struct('<4sHI')
+SYMBOL_NAME_LENGTH = struct.Struct('<H')
+# Tick record: timestamp (seconds), symbol id (index in symbols' names), price
+TICK_RECORD = struct.Struct('<dId')
+
+
+def write_tick_file(path: str, symbols: list, ticks) -> None:
+    """
+    This function provide an ability to record quotes to the tick file.
+
+    :param path: path of the file
+    :param symbols: list of symbols' names. Symbol id of the tick is the index of its name in the list
+    :param ticks: iterable of tuples (timestamp, symbol id, price) sorted by timestamp
+    :return: None
+    """
+    with open(path, 'wb') as f:
+        f.write(TICK_FILE_HEADER.pack(TICK_FILE_MAGIC, TICK_FILE_VERSION, len(symbols)))
+        for name in symbols:
+            encoded = name.encode('utf-8')
+            f.write(SYMBOL_NAME_LENGTH.pack(len(encoded)))
+            f.write(encoded)
+        pack = TICK_RECORD.pack
+        f.writelines(pack(timestamp, symbol_id, price) for timestamp, symbol_id, price in ticks)
+
+
+class TickFile:
+    """
+    The TickFile object reads the tick file by memory mapping: records are unpacked right from the mapped pages,
+    the file isn't loaded to memory.
+
+    :param path: path of the file written by write_tick_file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, symbols_count = TICK_FILE_HEADER.unpack_from(self._mmap, 0)
+        if magic != TICK_FILE_MAGIC or version != TICK_FILE_VERSION:
+            self._mmap.close()
+            raise ValueError(f"File {path} is not a tick file of version {TICK_FILE_VERSION}")
+
+        offset = TICK_FILE_HEADER.size
+        self.symbols = list()
+        for _ in range(symbols_count):
+            length, = SYMBOL_NAME_LENGTH.unpack_from(self._mmap, offset)
+            offset += SYMBOL_NAME_LENGTH.size
+            self.symbols.append(self._mmap[offset:offset + length].decode('utf-8'))
+            offset += length
+        self._records_offset = offset
+        self._records_count = (len(self._mmap) - offset) // TICK_RECORD.size
+
+    def __enter__(self) -> 'TickFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._records_count
+
+    def __getitem__(self, index: int) -> tuple:
+        """
+        This method provide an ability to read one record without reading the others.
+
+        :param index: index of the record
+        :return: tuple (timestamp, symbol id, price)
+        """
+        if index < 0:
+            index += self._records_count
+        if not 0 <= index < self._records_count:
+            raise IndexError(index)
+        return TICK_RECORD.unpack_from(self._mmap, self._records_offset + index * TICK_RECORD.size)
+
+    def __iter__(self):
+        end = self._records_offset + self._records_count * TICK_RECORD.size
+        with memoryview(self._mmap) as view, view[self._records_offset:end] as records:
+            yield from TICK_RECORD.iter_unpack(records)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+class TickReplay(QuotesPublisher):
+    """
+    The TickReplay object is the quote source of recorded quotes (for backtests): it can be used as
+    OrderBook.quotes instead of random QuotesGenerator. Ticks with the same timestamp are published as one update
+    {symbol name: price}, current quotes keep the latest price of each replayed symbol.
+
+    :param path: path of the tick file
+    :param speed: replay speed. 1 - wall-clock (the same delays as between recorded ticks), 10 - 10 times faster
+    and so on. None - as fast as possible (no delays)
+    """
+
+    def __init__(self, path: str, speed: float = None):
+        super().__init__()
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Replay speed {speed} should be > 0")
+        self.path = path
+        self.speed = speed
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """
+        This method provide an ability to replay the file in the background thread.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.replay, name='TickReplay', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def join(self, timeout: float = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def replay(self) -> int:
+        """
+        This method provide an ability to replay the file in the current thread (for example, deterministic
+        backtest as fast as possible). It returns when all ticks are replayed or replay is stopped.
+
+        :return: number of published updates
+        """
+        published = 0
+        with TickFile(self.path) as tick_file:
+            symbols = tick_file.symbols
+            speed = self.speed
+            started_at = first_timestamp = None
+            update_timestamp, update = None, dict()
+            records = iter(tick_file)
+            try:
+                for timestamp, symbol_id, price in records:
+                    if timestamp != update_timestamp:
+                        if update:
+                            self.__publish_update(update)
+                            published += 1
+                            update = dict()
+                        if self._stop.is_set():
+                            return published
+                        update_timestamp = timestamp
+                        if speed is not None:
+                            if started_at is None:
+                                started_at, first_timestamp = time.perf_counter(), timestamp
+                            delay = started_at + (timestamp - first_timestamp) / speed - time.perf_counter()
+                            if delay > 0 and self._stop.wait(delay):
+                                return published
+                    update[symbols[symbol_id]] = price
+            finally:
+                # Records are views of the mapped file, so they should be released before the file is closed
+                records.close()
+            if update:
+                self.__publish_update(update)
+                published += 1
+        return published
+
+    def __publish_update(self, update: dict) -> None:
+        self.current_quotes.update(update)
+        self._publish(update)
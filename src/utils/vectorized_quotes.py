@@ -0,0 +1,83 @@
+import math
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class QuotesArray(Mapping):
+    """
+    The QuotesArray object is read-only dict-like view {symbol name: price} over the array of quotes of one tick.
+    It's created without copying of prices, so publishing of thousands of quotes per tick is cheap.
+
+    :param index: dict {symbol name: position in the array} (it's shared by all ticks)
+    :param prices: array of quotes of all symbols
+    """
+    __slots__ = ('index', 'prices')
+
+    def __init__(self, index: dict, prices: np.ndarray):
+        self.index = index
+        self.prices = prices
+
+    def __getitem__(self, symbol_name: str) -> float:
+        return float(self.prices[self.index[symbol_name]])
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class VectorizedQuotesModel:
+    """
+    The VectorizedQuotesModel object generates quotes of all symbols per tick as one NumPy array.
+    By default each quote is drawn from normal distribution N(mu, sigma) of the symbol (like QuotesGenerator does).
+    In random walk mode quotes start from mu and each tick moves them by sigma * sqrt(tick_interval) * shock.
+    Shocks can be correlated: correlation is the same for each pair of symbols (one common factor).
+
+    :param symbols: dict {symbol name: {'mu': value, 'sigma': value}} (quotes_generator's symbols from config.yml)
+    :param tick_interval: time between ticks in seconds (used by random walk)
+    :param correlation: correlation of shocks of different symbols from 0 to 1
+    :param random_walk: generate random walk instead of independent quotes
+    :param seed: seed of random generator
+    """
+
+    def __init__(self, symbols: dict, tick_interval: float = 1, correlation: float = 0, random_walk: bool = False,
+                 seed: int = None):
+        if not 0 <= correlation <= 1:
+            raise ValueError(f"Correlation {correlation} is out of range [0, 1]")
+        self.index = {name: i for i, name in enumerate(symbols)}
+        self.mu = np.array([float(symbols[name]['mu']) for name in symbols])
+        self.sigma = np.array([float(symbols[name]['sigma']) for name in symbols])
+        self.correlation = correlation
+        self.random_walk = random_walk
+        self._step = self.sigma * math.sqrt(tick_interval)
+        self._common_weight = math.sqrt(correlation)
+        self._own_weight = math.sqrt(1 - correlation)
+        self._random = np.random.default_rng(seed)
+        self._prices = self.mu.copy()
+
+    def next_shocks(self) -> np.ndarray:
+        shocks = self._random.standard_normal(len(self.mu))
+        if self.correlation:
+            shocks *= self._own_weight
+            shocks += self._common_weight * self._random.standard_normal()
+        return shocks
+
+    def next(self) -> np.ndarray:
+        """
+        This method provide an ability to generate quotes of the next tick.
+
+        :return: new array of quotes (rounded to 4 digits like QuotesGenerator does)
+        """
+        if self.random_walk:
+            self._prices = self._prices + self._step * self.next_shocks()
+        else:
+            self._prices = self.mu + self.sigma * self.next_shocks()
+        return np.round(self._prices, 4)
+
+    def next_quotes(self) -> QuotesArray:
+        return QuotesArray(self.index, self.next())
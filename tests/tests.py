@@ -1,20 +1,44 @@
+import asyncio
+import io
+import os
+import threading
+import time
 import uuid
 from typing import Union
 from uuid import UUID
+from jsonschema.exceptions import ValidationError
 from retrying import retry
 
+import numpy as np
 import pytest
 
+from src.conf.config_parser import ConfigParser
 from src.entity.deep import Deep
+from src.entity.market_data_feed import LevelDelta, MarketDataSnapshot
 from src.entity.order import MarketOrder, LimitOrder, Order, StopOrder, StopLimitOrder
+from src.entity.async_order_book import AsyncOrderBook
 from src.entity.order_book import OrderBook
+from src.entity.order_history import OrderHistory
+from src.entity.order_sequencer import OrderSequencer
+from src.entity.sharded_order_book import ShardedOrderBook, get_shard, merge_depths
 from src.entity.symbol import Symbol
-from src.enums import SymbolType, Currency, OrderAction, OrderStatus, OrderType
+from src.enums import SymbolType, Currency, OrderAction, OrderStatus, OrderType, LevelUpdateType, Backpressure, \
+    LogLevel
 from src.exception import ChangeOrderBookDeepError, OrderPriceIsNotValidError, SymbolIsNotValidError, \
-    OrderQuantityIsNotValidError, OrderChangeWhenPlacedError
+    OrderQuantityIsNotValidError, OrderChangeWhenPlacedError, OrderAlreadyCreatedError, SymbolIsNotEnabledError, \
+    OrderSequencerIsFullError, OrderSequencerIsStoppedError, OrderIsNotAmendableError, \
+    ShardedOrderBookIsStoppedError, OrderIsNotWaitingError
 
-from src.utils.jsonschema_validators import is_market_data_schema_valid
+from src.utils.jsonschema_validators import is_market_data_schema_valid, is_market_data_shape_valid, \
+    market_data_validator, validate_market_data_batch
 from src.utils.quotes_generator import quote_generator
+from src.utils.quotes_publisher import QuotesPublisher
+from src.utils.event_log import EventLog, event_log
+from src.utils.journal import Journal
+from src.utils.load_generator import LoadGenerator, OrderFlowGenerator
+from src.utils.metrics import LatencyHistogram
+from src.utils.tick_replay import TickFile, TickReplay, write_tick_file
+from src.utils.vectorized_quotes import VectorizedQuotesModel, QuotesArray
 
 
 def try_create_order(order: MarketOrder or LimitOrder or StopLimitOrder or StopOrder, *args) \
@@ -354,6 +378,61 @@ class TestOrder:
         order = StopLimitOrder(symbol1, 50, 100, 0.24, OrderAction.SELL)
         assert order.type == OrderType.STOP_LIMIT
 
+    def test_slots(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that orders don't have __dict__ and can be printed with all fields
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+
+        @steps:
+        1. Create stop limit order
+
+        @assertions:
+        1. Order doesn't have __dict__ and new attributes cannot be added
+        2. Order's representation contains all fields including stop price
+        """
+        order = StopLimitOrder(symbol1, 50, 100, 0.24, OrderAction.SELL)
+        assert not hasattr(order, '__dict__')
+        with pytest.raises(AttributeError):
+            order.comment = 'test'
+        assert order.to_dict() == {'_status': None, '_symbol': symbol1, '_quantity': 0.24,
+                                   '_type': OrderType.STOP_LIMIT, '_price': 50, '_action': OrderAction.SELL,
+                                   '_id': order.id, 'stop_price': 100}
+        assert repr(order) == str(order.to_dict())
+
+    def test_from_trusted(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that orders can be created by trusted path (without validation)
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+
+        @steps:
+        1. Create limit order with given id by trusted path
+        2. Create 2 stop limit orders by trusted bulk path
+
+        @assertions:
+        1. Orders have the given fields, orders without given id get unique UUID
+        2. Placed order created by trusted path cannot be changed by setters
+        """
+        order_id = uuid.uuid4()
+        order = LimitOrder.from_trusted(symbol1, 100, 5, OrderType.LIMIT, OrderAction.BUY, order_id,
+                                        OrderStatus.PENDING)
+        assert isinstance(order, LimitOrder)
+        assert (order.id, order.price, order.quantity, order.type, order.action, order.status) == \
+               (order_id, 100, 5, OrderType.LIMIT, OrderAction.BUY, OrderStatus.PENDING)
+        with pytest.raises(OrderPriceIsNotValidError):
+            order.price = 200
+
+        row = (symbol1, 90, 1, OrderType.STOP_LIMIT, OrderAction.SELL, None, None, 95)
+        orders = StopLimitOrder.bulk_from_trusted([row, row])
+        assert [o.stop_price for o in orders] == [95, 95]
+        assert orders[0].id != orders[1].id
+        assert all(isinstance(o.id, UUID) and o.id.version == 4 for o in orders)
+
     def test_status__get___market_before_placing(self, market_buy_order):
         """
         @description:
@@ -663,9 +742,9 @@ class TestOrderBook:
         1. If test_order_action is valid that count of orders by this action is correct
         2. If test_order_action is invalid that client received empty list
         """
-        order1 = MarketOrder(symbol1, 0.25, OrderAction.BUY)
-        order2 = MarketOrder(symbol1, 1, OrderAction.SELL)
-        order3 = MarketOrder(symbol1, 1, OrderAction.SELL)
+        order1 = LimitOrder(symbol1, 90, 0.25, OrderAction.BUY)
+        order2 = LimitOrder(symbol1, 110, 1, OrderAction.SELL)
+        order3 = LimitOrder(symbol1, 110, 1, OrderAction.SELL)
         orderbook_2x2.place_order(order1)
         orderbook_2x2.place_order(order2)
         orderbook_2x2.place_order(order3)
@@ -703,10 +782,10 @@ class TestOrderBook:
         1. If test_order_action is valid that count of orders by this action is correct
         2. If test_order_action is invalid that client received empty list
         """
-        order1 = MarketOrder(symbol1, 0.25, OrderAction.BUY)
-        order2 = MarketOrder(symbol1, 1, OrderAction.SELL)
-        order3 = MarketOrder(symbol1, 1, OrderAction.SELL)
-        order4 = MarketOrder(symbol1, 0.25, OrderAction.BUY)
+        order1 = LimitOrder(symbol1, 90, 0.25, OrderAction.BUY)
+        order2 = LimitOrder(symbol1, 110, 1, OrderAction.SELL)
+        order3 = LimitOrder(symbol1, 110, 1, OrderAction.SELL)
+        order4 = LimitOrder(symbol1, 90, 0.25, OrderAction.BUY)
         orderbook_2x2.place_order(order1)
         orderbook_2x2.place_order(order2)
         orderbook_2x2.place_order(order3)
@@ -716,6 +795,65 @@ class TestOrderBook:
         else:
             assert len(orderbook_2x2.get_orders_by_action(test_order_action, count)) == 0
 
+    def test_get_order_by_action__price_time_priority(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that orders are returned in price-time priority
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place 3 SELL limit orders (two of them with the same price)
+        2. Place 2 BUY limit orders
+
+        @assertions:
+        1. Asks are sorted from the lowest price to the highest, orders with the same price are sorted by placing time
+        2. Bids are sorted from the highest price to the lowest
+        """
+        ask1 = LimitOrder(symbol1, 110, 1, OrderAction.SELL)
+        ask2 = LimitOrder(symbol1, 105, 1, OrderAction.SELL)
+        ask3 = LimitOrder(symbol1, 105, 2, OrderAction.SELL)
+        bid1 = LimitOrder(symbol1, 90, 1, OrderAction.BUY)
+        bid2 = LimitOrder(symbol1, 95, 1, OrderAction.BUY)
+        for order in (ask1, ask2, ask3, bid1, bid2):
+            orderbook_2x2.place_order(order)
+            check_order_status(order, OrderStatus.PENDING)
+
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL) == [ask2, ask3, ask1]
+        assert orderbook_2x2.get_orders_by_action(OrderAction.BUY) == [bid2, bid1]
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL, 1) == [ask2]
+
+    def test_cancel_order__removed_from_book(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that cancelled order doesn't rest in the book anymore
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place 2 SELL limit orders with the same price
+        2. Cancel the first one
+
+        @assertions:
+        1. Only the second order is visible in asks
+        2. Cancelled order still can be found by id
+        """
+        order1 = LimitOrder(symbol1, 105, 1, OrderAction.SELL)
+        order2 = LimitOrder(symbol1, 105, 1, OrderAction.SELL)
+        orderbook_2x2.place_order(order1)
+        orderbook_2x2.place_order(order2)
+        check_order_status(order1, OrderStatus.PENDING)
+        check_order_status(order2, OrderStatus.PENDING)
+
+        orderbook_2x2.cancel_order(order1)
+
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL) == [order2]
+        assert orderbook_2x2.get_order_by_id(order1.id).status == OrderStatus.CANCEL
+
     def test_reject_order(self, market_buy_order, orderbook_2x2):
         """
         @description:
@@ -795,6 +933,33 @@ class TestOrderBook:
         orderbook_2x2.place_order(market_buy_order)
         assert orderbook_2x2.get_order_by_id(market_buy_order.id) == market_buy_order
 
+    def test_place_order__duplicate(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that client cannot place the same order twice
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place stop order (it is waiting for trigger)
+        2. Place the same order again
+
+        @assertions:
+        1. Client received an error message like "The order {order.id} is already created. "
+        2. Order can be found by id
+        3. Unknown id is not found
+        """
+        order = StopOrder(symbol1, 1000, 1, OrderAction.BUY)
+        orderbook_2x2.place_order(order)
+        with pytest.raises(OrderAlreadyCreatedError) as e:
+            orderbook_2x2.place_order(order)
+        assert e.value.msg == f"The order {order.id} is already created. "
+        assert orderbook_2x2.get_order_by_id(order.id) is order
+        assert orderbook_2x2.get_order_by_id(uuid.uuid4()) is None
+        orderbook_2x2.cancel_order(order)
+
     def test_get_market_data(self, symbol1, orderbook_2x2):
         """
         @description:
@@ -811,14 +976,14 @@ class TestOrderBook:
 
         @assertions:
         JSON schema is valid
-        All orders with action BUY in asks
-        All orders with action SELL in bids
-        Asks and Bids are sorted
-        """
-        order1 = MarketOrder(symbol1, 0.25, OrderAction.BUY)
-        order2 = MarketOrder(symbol1, 0.25, OrderAction.BUY)
-        order3 = MarketOrder(symbol1, 0.25, OrderAction.SELL)
-        order4 = MarketOrder(symbol1, 0.25, OrderAction.SELL)
+        All orders with action SELL in asks
+        All orders with action BUY in bids
+        Asks are sorted from the lowest price, bids are sorted from the highest price
+        """
+        order1 = LimitOrder(symbol1, 90, 0.25, OrderAction.BUY)
+        order2 = LimitOrder(symbol1, 95, 0.25, OrderAction.BUY)
+        order3 = LimitOrder(symbol1, 105, 0.25, OrderAction.SELL)
+        order4 = LimitOrder(symbol1, 110, 0.25, OrderAction.SELL)
         orderbook_2x2.place_order(order1)
         orderbook_2x2.place_order(order2)
         orderbook_2x2.place_order(order3)
@@ -827,15 +992,110 @@ class TestOrderBook:
 
         assert is_market_data_schema_valid(market_data)
 
-        asks = orderbook_2x2.get_orders_by_action(OrderAction.BUY)
-        bids = orderbook_2x2.get_orders_by_action(OrderAction.SELL)
-        assert {'price': order1.price, 'quantity': order1.quantity} in market_data['asks']
-        assert {'price': order2.price, 'quantity': order2.quantity} in market_data['asks']
-        assert {'price': order3.price, 'quantity': order3.quantity} in market_data['bids']
-        assert {'price': order4.price, 'quantity': order4.quantity} in market_data['bids']
+        assert {'price': order1.price, 'quantity': order1.quantity} in market_data['bids']
+        assert {'price': order2.price, 'quantity': order2.quantity} in market_data['bids']
+        assert {'price': order3.price, 'quantity': order3.quantity} in market_data['asks']
+        assert {'price': order4.price, 'quantity': order4.quantity} in market_data['asks']
 
         assert market_data['bids'][0]['price'] >= market_data['bids'][1]['price']
-        assert market_data['asks'][0]['price'] >= market_data['asks'][1]['price']
+        assert market_data['asks'][0]['price'] <= market_data['asks'][1]['price']
+
+
+class TestOrderBookMatching:
+    def test_place_order__partial_fill(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that crossing limit order is matched with resting orders
+        in price-time priority and its remainder rests in the book
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place 3 SELL limit orders: 2 by price 101 and 1 by price 102
+        2. Place BUY limit order by price 101 with quantity bigger than the sum of asks by price 101
+
+        @assertions:
+        1. Executions are done by price 101 with the oldest ask first
+        2. Asks by price 101 are filled, ask by price 102 is not touched
+        3. The remainder of BUY order rests in bids with reduced quantity
+        """
+        ask1 = LimitOrder(symbol1, 101, 2, OrderAction.SELL)
+        ask2 = LimitOrder(symbol1, 101, 3, OrderAction.SELL)
+        ask3 = LimitOrder(symbol1, 102, 1, OrderAction.SELL)
+        for order in (ask1, ask2, ask3):
+            orderbook_2x2.place_order(order)
+        bid = LimitOrder(symbol1, 101, 6, OrderAction.BUY)
+
+        executions = orderbook_2x2.place_order(bid)
+
+        assert [(e.sell_order_id, e.price, e.quantity) for e in executions] == [(ask1.id, 101, 2), (ask2.id, 101, 3)]
+        assert all(e.buy_order_id == bid.id and e.aggressor == OrderAction.BUY for e in executions)
+        assert ask1.status == ask2.status == OrderStatus.FILL
+        assert ask3.status == OrderStatus.PENDING
+        assert bid.status == OrderStatus.PENDING
+        assert bid.quantity == 1
+        assert orderbook_2x2.get_orders_by_action(OrderAction.BUY) == [bid]
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL) == [ask3]
+
+    def test_place_order__resting_partial_fill(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that resting order keeps its place in the book after partial fill
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place BUY limit order by price 99
+        2. Place SELL limit order by price 98 with smaller quantity
+
+        @assertions:
+        1. Execution is done by the resting order's price
+        2. SELL order is filled, BUY order is still pending with reduced quantity
+        """
+        bid = LimitOrder(symbol1, 99, 5, OrderAction.BUY)
+        ask = LimitOrder(symbol1, 98, 1.5, OrderAction.SELL)
+        orderbook_2x2.place_order(bid)
+
+        executions = orderbook_2x2.place_order(ask)
+
+        assert [(e.price, e.quantity, e.aggressor) for e in executions] == [(99, 1.5, OrderAction.SELL)]
+        assert ask.status == OrderStatus.FILL
+        assert bid.status == OrderStatus.PENDING
+        assert bid.quantity == 3.5
+        assert orderbook_2x2.get_orders_by_action(OrderAction.BUY) == [bid]
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL) == []
+
+    def test_place_order__market_order_sweeps_book(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that market order takes liquidity by any price
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place 2 BUY limit orders by very different prices
+        2. Place SELL market order with quantity equals to the sum of bids
+
+        @assertions:
+        1. Both bids are filled from the highest price
+        2. Market order is filled
+        """
+        bid1 = LimitOrder(symbol1, 1, 1, OrderAction.BUY)
+        bid2 = LimitOrder(symbol1, 1000, 1, OrderAction.BUY)
+        orderbook_2x2.place_order(bid1)
+        orderbook_2x2.place_order(bid2)
+
+        executions = orderbook_2x2.place_order(MarketOrder(symbol1, 2, OrderAction.SELL))
+
+        assert [e.price for e in executions] == [1000, 1]
+        assert bid1.status == bid2.status == OrderStatus.FILL
+        assert orderbook_2x2.get_orders_by_action(OrderAction.BUY) == []
 
 
 class TestOrderBookDeep:
@@ -872,3 +1132,1960 @@ class TestOrderBookDeep:
             assert not is_it_positive_case
             assert e.msg == f"The deep {deep} is not valid. Probably, asks_count or bids_count are les then 0. "
         assert order_book.deep == deep if is_it_positive_case else order_book is None
+
+
+class TestOrderBookStopOrders:
+    def test_place_order__stop_order_waits_for_trigger(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that stop orders wait for the trigger outside of the book
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place BUY stop order with stop price far above the market
+        2. Place SELL stop limit order with stop price far below the market
+
+        @assertions:
+        1. Orders have CREATED status and don't rest in the book
+        2. Orders can be found by id
+        """
+        buy_stop = StopOrder(symbol1, 100000, 1, OrderAction.BUY)
+        sell_stop_limit = StopLimitOrder(symbol1, 0.5, 0.001, 1, OrderAction.SELL)
+
+        assert orderbook_2x2.place_order(buy_stop) == []
+        assert orderbook_2x2.place_order(sell_stop_limit) == []
+
+        assert buy_stop.status == sell_stop_limit.status == OrderStatus.CREATED
+        assert orderbook_2x2.get_orders_by_action(OrderAction.BUY) == []
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL) == []
+        assert orderbook_2x2.get_order_by_id(buy_stop.id) is buy_stop
+
+    def test_place_order__stop_orders_triggered_by_quote(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that all stop orders triggered by quote update are released into the book
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place 2 BUY stop orders and 1 BUY stop limit order with stop prices far above the market
+        2. Push the quote that triggers only the stop order with the lowest stop price and the stop limit order
+
+        @assertions:
+        1. Triggered stop order becomes pending market order by quote's price
+        2. Triggered stop limit order becomes pending limit order by its limit price
+        3. Not triggered order still waits
+        """
+        stop1 = StopOrder(symbol1, 100000, 1, OrderAction.BUY)
+        stop2 = StopOrder(symbol1, 200000, 1, OrderAction.BUY)
+        stop_limit = StopLimitOrder(symbol1, 90, 150000, 1, OrderAction.BUY)
+        for order in (stop1, stop2, stop_limit):
+            orderbook_2x2.place_order(order)
+
+        orderbook_2x2._on_quotes({symbol1.name: 150000})
+
+        assert stop1.status == OrderStatus.PENDING
+        assert stop1.type == OrderType.MARKET
+        assert stop1.price == 150000
+        assert stop_limit.status == OrderStatus.PENDING
+        assert stop_limit.type == OrderType.LIMIT
+        assert stop_limit.price == 90
+        assert stop2.status == OrderStatus.CREATED
+        assert orderbook_2x2.get_orders_by_action(OrderAction.BUY) == [stop1, stop_limit]
+
+    def test_cancel_order__pending_stop_order(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that cancelled stop order is never triggered
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place SELL stop order with stop price far below the market
+        2. Cancel the order
+        3. Push the quote that triggers the order
+
+        @assertions:
+        1. Order's status is CANCEL and order is not in the book
+        """
+        order = StopOrder(symbol1, 0.001, 1, OrderAction.SELL)
+        orderbook_2x2.place_order(order)
+        orderbook_2x2.cancel_order(order)
+
+        orderbook_2x2._on_quotes({symbol1.name: 0.0001})
+
+        assert order.status == OrderStatus.CANCEL
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL) == []
+
+
+class TestMarketData:
+    def test_get_market_data__aggregated_by_price_level(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that market data shows price levels with total quantity
+        and honors the order book's deep
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place 2 SELL limit orders by price 105 and 1 SELL limit order by prices 106 and 107
+        2. Place 3 BUY limit orders by price 95, 94 and 93
+        3. Cancel one of the orders by price 105
+        4. Place BUY limit order by price 105 that partially fills the rest of level 105
+
+        @assertions:
+        1. There are 2 asks and 2 bids in market data (deep is 2x2)
+        2. Quantities of price levels are sums of resting orders' quantities
+        3. Cancelled quantity and filled quantity are not visible
+        """
+        asks = [LimitOrder(symbol1, price, quantity, OrderAction.SELL)
+                for price, quantity in ((105, 1), (105, 2), (106, 3), (107, 4))]
+        bids = [LimitOrder(symbol1, price, 1, OrderAction.BUY) for price in (95, 94, 93)]
+        for order in asks + bids:
+            orderbook_2x2.place_order(order)
+        orderbook_2x2.cancel_order(asks[0])
+        orderbook_2x2.place_order(LimitOrder(symbol1, 105, 0.5, OrderAction.BUY))
+
+        market_data = orderbook_2x2.get_market_data()
+
+        assert market_data == {
+            'asks': [{'price': 105, 'quantity': 1.5}, {'price': 106, 'quantity': 3}],
+            'bids': [{'price': 95, 'quantity': 1}, {'price': 94, 'quantity': 1}]
+        }
+        assert orderbook_2x2.get_market_data(symbol1) == market_data
+
+    def test_get_market_data__all_symbols(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that market data of all symbols merges levels with the same price
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place SELL limit orders by price 105 and 106 for symbol1
+        2. Place SELL limit orders by price 105 and 104 for symbol2
+
+        @assertions:
+        1. Market data without symbol contains merged levels 104 and 105
+        2. Market data of symbol2 contains only its levels
+        """
+        symbol2 = Symbol('symbol2', 'exchange1', SymbolType.STOCK, Currency.USD)
+        orderbook_2x2.place_order(LimitOrder(symbol1, 105, 1, OrderAction.SELL))
+        orderbook_2x2.place_order(LimitOrder(symbol1, 106, 1, OrderAction.SELL))
+        orderbook_2x2.place_order(LimitOrder(symbol2, 105, 2, OrderAction.SELL))
+        orderbook_2x2.place_order(LimitOrder(symbol2, 104, 2, OrderAction.SELL))
+
+        assert orderbook_2x2.get_market_data()['asks'] == [{'price': 104, 'quantity': 2}, {'price': 105, 'quantity': 3}]
+        assert orderbook_2x2.get_market_data(symbol2)['asks'] == [{'price': 104, 'quantity': 2},
+                                                                  {'price': 105, 'quantity': 2}]
+
+
+class TestMarketDataFeed:
+    def test_subscribe_market_data__deltas(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that subscriber receives snapshot and then sequence-numbered level deltas
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Place SELL limit order by price 105
+
+        @steps:
+        1. Subscribe to market data
+        2. Place SELL limit order by price 105 and by price 106
+        3. Place BUY limit order by price 106 that fills level 105 and partially fills level 106
+        4. Cancel the rest of order by price 106
+
+        @assertions:
+        1. The first message is snapshot with existing level
+        2. Deltas describe each change of levels (add/update/delete) and have sequence without gaps
+        """
+        orderbook_2x2.place_order(LimitOrder(symbol1, 105, 1, OrderAction.SELL))
+        messages = list()
+        orderbook_2x2.subscribe_market_data(messages.append)
+
+        orderbook_2x2.place_order(LimitOrder(symbol1, 105, 2, OrderAction.SELL))
+        ask = LimitOrder(symbol1, 106, 5, OrderAction.SELL)
+        orderbook_2x2.place_order(ask)
+        orderbook_2x2.place_order(LimitOrder(symbol1, 106, 4, OrderAction.BUY))
+        orderbook_2x2.cancel_order(ask)
+
+        snapshot, deltas = messages[0], messages[1:]
+        assert isinstance(snapshot, MarketDataSnapshot)
+        assert (snapshot.symbol, snapshot.asks, snapshot.bids) == ('symbol1', [{'price': 105, 'quantity': 1}], [])
+        assert all(isinstance(delta, LevelDelta) for delta in deltas)
+        assert [delta.sequence for delta in deltas] == list(range(snapshot.sequence + 1, snapshot.sequence + 6))
+        assert [(delta.action, delta.price, delta.quantity, delta.update) for delta in deltas] == [
+            (OrderAction.SELL, 105, 3, LevelUpdateType.UPDATE),
+            (OrderAction.SELL, 106, 5, LevelUpdateType.ADD),
+            (OrderAction.SELL, 105, 0, LevelUpdateType.DELETE),
+            (OrderAction.SELL, 106, 4, LevelUpdateType.UPDATE),
+            (OrderAction.SELL, 106, 0, LevelUpdateType.DELETE),
+        ]
+
+    def test_subscribe_market_data__periodic_snapshots(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that snapshots are published after each snapshot_interval deltas
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2) with snapshot interval = 2
+
+        @steps:
+        1. Subscribe to market data
+        2. Place 3 BUY limit orders with different prices
+
+        @assertions:
+        1. Snapshot is published after the second delta and contains all levels with sequence of the second delta
+        """
+        orderbook_2x2.market_data_feed.snapshot_interval = 2
+        messages = list()
+        orderbook_2x2.subscribe_market_data(messages.append)
+        for price in (90, 91, 92):
+            orderbook_2x2.place_order(LimitOrder(symbol1, price, 1, OrderAction.BUY))
+
+        assert [type(message) for message in messages] == [LevelDelta, LevelDelta, MarketDataSnapshot, LevelDelta]
+        assert messages[2].sequence == messages[1].sequence
+        assert messages[2].bids == [{'price': 91, 'quantity': 1}, {'price': 90, 'quantity': 1}]
+
+
+class TestOrderBookBatch:
+    def test_place_orders(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that client can place a batch of orders and get result per order
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Place SELL limit order by price 105
+
+        @steps:
+        1. Place the batch: BUY limit order by price 105 (crossing), already placed order, new SELL limit order,
+           the same new SELL limit order again and the order of disabled symbol
+
+        @assertions:
+        1. Results are returned in the batch order
+        2. Crossing order has executions
+        3. Duplicates (in the book and in the batch) and order of disabled symbol are not placed and have errors
+        """
+        resting = LimitOrder(symbol1, 105, 1, OrderAction.SELL)
+        orderbook_2x2.place_order(resting)
+        crossing = LimitOrder(symbol1, 105, 1, OrderAction.BUY)
+        new = LimitOrder(symbol1, 110, 1, OrderAction.SELL)
+        disabled = LimitOrder(Symbol('symbol2', 'exchange1', SymbolType.STOCK, Currency.USD, is_enabled=False),
+                              110, 1, OrderAction.SELL)
+
+        results = orderbook_2x2.place_orders([crossing, resting, new, new, disabled])
+
+        assert [result.order for result in results] == [crossing, resting, new, new, disabled]
+        assert [result.is_placed for result in results] == [True, False, True, False, False]
+        assert [(e.buy_order_id, e.sell_order_id) for e in results[0].executions] == [(crossing.id, resting.id)]
+        assert isinstance(results[1].error, OrderAlreadyCreatedError)
+        assert isinstance(results[3].error, OrderAlreadyCreatedError)
+        assert isinstance(results[4].error, SymbolIsNotEnabledError)
+        assert orderbook_2x2.get_orders_by_action(OrderAction.SELL) == [new]
+        assert orderbook_2x2.get_order_by_id(disabled.id) is None
+
+    def test_place_orders__market_data_published_once(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that changes of market data are coalesced for the whole batch
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Subscribe to market data
+
+        @steps:
+        1. Place the batch of 3 BUY limit orders by price 90
+
+        @assertions:
+        1. Subscriber received one delta with total quantity of the level
+        """
+        messages = list()
+        orderbook_2x2.subscribe_market_data(messages.append)
+
+        orderbook_2x2.place_orders([LimitOrder(symbol1, 90, 1, OrderAction.BUY) for _ in range(3)])
+
+        assert [(m.price, m.quantity, m.update) for m in messages] == [(90, 3, LevelUpdateType.ADD)]
+
+
+class TestOrderSequencer:
+    def test_place_order__from_many_threads(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that orders from many threads are applied one by one by sequencer
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Start sequencer
+
+        @steps:
+        1. Place 50 BUY and 50 SELL limit orders by the same price from 4 threads
+        2. Wait for all futures
+
+        @assertions:
+        1. Each future has the result of place_order (list of executions)
+        2. All orders are matched: there are 50 executions and the book is empty
+        """
+        orders = [LimitOrder(symbol1, 100, 1, OrderAction.BUY if i % 2 else OrderAction.SELL) for i in range(100)]
+        futures = list()
+        with OrderSequencer(orderbook_2x2) as sequencer:
+            def place(chunk):
+                futures.extend(sequencer.place_order(order) for order in chunk)
+
+            threads = [threading.Thread(target=place, args=(orders[i::4],)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results = [future.result(timeout=5) for future in futures]
+
+        assert sum(len(executions) for executions in results) == 50
+        assert all(order.status == OrderStatus.FILL for order in orders)
+        assert orderbook_2x2.get_market_data() == {'asks': [], 'bids': []}
+
+    def test_submit__backpressure_reject(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that sequencer with REJECT backpressure doesn't accept operations
+        when its queue is full
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Start sequencer with queue size 1 and REJECT backpressure
+
+        @steps:
+        1. Block the consumer thread
+        2. Place 2 orders
+
+        @assertions:
+        1. The first order is queued, the second one is rejected with OrderSequencerIsFullError
+        2. The first order is placed when consumer thread is unblocked
+        3. Sequencer doesn't accept operations after stop
+        """
+        sequencer = OrderSequencer(orderbook_2x2, maxsize=1, backpressure=Backpressure.REJECT)
+        sequencer.start()
+        is_blocked, is_released = threading.Event(), threading.Event()
+        sequencer.submit(lambda: is_blocked.set() or is_released.wait(5))
+        is_blocked.wait(5)
+
+        order1 = LimitOrder(symbol1, 100, 1, OrderAction.BUY)
+        future = sequencer.place_order(order1)
+        with pytest.raises(OrderSequencerIsFullError):
+            sequencer.place_order(LimitOrder(symbol1, 100, 1, OrderAction.BUY))
+        is_released.set()
+
+        assert future.result(timeout=5) == []
+        assert order1.status == OrderStatus.PENDING
+        sequencer.stop()
+        with pytest.raises(OrderSequencerIsStoppedError):
+            sequencer.place_order(LimitOrder(symbol1, 100, 1, OrderAction.BUY))
+
+    def test_cancel_order__error_in_future(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that error of operation is returned by its future
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Start sequencer
+
+        @steps:
+        1. Place the same order twice
+
+        @assertions:
+        1. The second future raises OrderAlreadyCreatedError
+        """
+        order = LimitOrder(symbol1, 100, 1, OrderAction.BUY)
+        with OrderSequencer(orderbook_2x2) as sequencer:
+            sequencer.place_order(order)
+            with pytest.raises(OrderAlreadyCreatedError):
+                sequencer.place_order(order).result(timeout=5)
+
+    def test_submit__while_stopping(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that operation submitted while sequencer is stopping is either applied
+        or rejected, but its future is never left unresolved
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Start sequencer
+
+        @steps:
+        1. Submit operations from another thread till sequencer is stopped
+        2. Stop sequencer
+
+        @assertions:
+        1. All returned futures are done after stop
+        2. The thread gets OrderSequencerIsStoppedError
+        """
+        sequencer = OrderSequencer(orderbook_2x2)
+        sequencer.start()
+        futures, errors = list(), list()
+
+        def submit():
+            try:
+                while True:
+                    futures.append(sequencer.submit(lambda: None))
+            except OrderSequencerIsStoppedError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        while len(futures) < 100:
+            time.sleep(0.001)
+        sequencer.stop()
+        thread.join(5)
+
+        assert len(errors) == 1
+        assert all(future.done() for future in futures)
+
+    def test_stop__blocked_submit_and_quotes(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that submitter blocked by the full queue doesn't block other submitters
+        and stop, and quotes are not queued after stop
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Start sequencer with queue size 1 and BLOCK backpressure
+
+        @steps:
+        1. Block the consumer thread and fill the queue
+        2. Place order from another thread (it waits for the free place)
+        3. Stop sequencer from another thread and place one more order
+        4. Unblock the consumer thread
+        5. Send quotes to stopped sequencer
+
+        @assertions:
+        1. The order placed while stopping is rejected with OrderSequencerIsStoppedError right away
+        2. The blocked order is applied before stop
+        3. Quotes after stop are not queued
+        """
+        sequencer = OrderSequencer(orderbook_2x2, maxsize=1)
+        sequencer.start()
+        is_blocked, is_released = threading.Event(), threading.Event()
+        sequencer.submit(lambda: is_blocked.set() or is_released.wait(5))
+        is_blocked.wait(5)
+        sequencer.submit(lambda: None)
+
+        futures = list()
+        blocked_order = LimitOrder(symbol1, 100, 1, OrderAction.BUY)
+        submitter = threading.Thread(target=lambda: futures.append(sequencer.place_order(blocked_order)))
+        submitter.start()
+        while sequencer._puts == 0:
+            time.sleep(0.001)
+        stopper = threading.Thread(target=sequencer.stop)
+        stopper.start()
+        while sequencer._is_accepting:
+            time.sleep(0.001)
+
+        with pytest.raises(OrderSequencerIsStoppedError):
+            sequencer.place_order(LimitOrder(symbol1, 100, 1, OrderAction.BUY))
+        is_released.set()
+        submitter.join(5)
+        stopper.join(5)
+
+        assert futures[0].result(timeout=5) == []
+        assert blocked_order.status == OrderStatus.PENDING
+        sequencer._on_quotes({symbol1.name: 100})
+        assert sequencer._queue.empty()
+
+
+class TestAsyncOrderBook:
+    def test_place_order__resolved_when_accepted(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that awaitable place_order is resolved by executions when order is accepted
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create async order book (AsyncOrderBook(orderbook_2x2))
+
+        @steps:
+        1. Place SELL limit order and BUY limit order by the same price from 2 coroutines
+
+        @assertions:
+        1. The first coroutine gets no executions, the second one gets one execution
+        """
+        async def main():
+            book = AsyncOrderBook(orderbook_2x2)
+            sell = LimitOrder(symbol1, 100, 1, OrderAction.SELL)
+            buy = LimitOrder(symbol1, 100, 1, OrderAction.BUY)
+            return await book.place_order(sell), await book.place_order(buy)
+
+        sell_executions, buy_executions = asyncio.run(main())
+        assert sell_executions == []
+        assert len(buy_executions) == 1
+        assert buy_executions[0].quantity == 1
+
+    def test_place_order__stop_order_resolved_when_triggered(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that awaitable place_order of stop order is resolved when order is triggered
+        by quote from another thread and when waiting order is cancelled
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create async order book (AsyncOrderBook(orderbook_2x2))
+        3. Place SELL limit order by price 100
+
+        @steps:
+        1. Place BUY stop limit order (stop price 150000, limit price 100) and BUY stop order far above the market
+        2. Push the quote 150000 from another thread
+        3. Cancel the second stop order
+
+        @assertions:
+        1. Stop limit order is resolved with execution against SELL limit order
+        2. Cancelled stop order is resolved with empty list and has CANCEL status
+        """
+        stop_limit = StopLimitOrder(symbol1, 100, 150000, 1, OrderAction.BUY)
+        stop = StopOrder(symbol1, 1000000, 1, OrderAction.BUY)
+
+        async def main():
+            book = AsyncOrderBook(orderbook_2x2)
+            await book.place_order(LimitOrder(symbol1, 100, 1, OrderAction.SELL))
+            stop_limit_task = asyncio.create_task(book.place_order(stop_limit))
+            stop_task = asyncio.create_task(book.place_order(stop))
+            await asyncio.sleep(0)
+            assert not stop_limit_task.done()
+
+            thread = threading.Thread(target=orderbook_2x2._on_quotes, args=({symbol1.name: 150000},))
+            thread.start()
+            thread.join()
+            stop_limit_executions = await asyncio.wait_for(stop_limit_task, 5)
+            await book.cancel_order(stop)
+            return stop_limit_executions, await asyncio.wait_for(stop_task, 5)
+
+        stop_limit_executions, stop_executions = asyncio.run(main())
+        assert len(stop_limit_executions) == 1
+        assert stop_limit_executions[0].price == 100
+        assert stop_executions == []
+        assert stop.status == OrderStatus.CANCEL
+
+    def test_market_data__async_iterator(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that market data updates can be read by async iterator
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create async order book (AsyncOrderBook(orderbook_2x2))
+
+        @steps:
+        1. Open market data stream
+        2. Place BUY limit order
+        3. Read messages until the first delta and close the stream
+
+        @assertions:
+        1. Stream gets the delta of new bid level (there are no snapshots because the book was empty)
+        2. Iterator is finished after close
+        """
+        async def main():
+            book = AsyncOrderBook(orderbook_2x2)
+            messages = list()
+            async with book.market_data() as stream:
+                await book.place_order(LimitOrder(symbol1, 100, 2, OrderAction.BUY))
+                async for message in stream:
+                    messages.append(message)
+                    if isinstance(message, LevelDelta):
+                        stream.close()
+            return messages
+
+        messages = asyncio.run(main())
+        assert messages == [LevelDelta(1, symbol1.name, OrderAction.BUY, 100, 2, LevelUpdateType.ADD)]
+
+
+class TestVectorizedQuotesModel:
+    def test_next__distribution(self):
+        """
+        @description:
+        Here we would like to make sure that vectorized quotes have mu and sigma of their symbols
+
+        @pre-conditions:
+        1. Create model of 2 symbols with different mu and sigma
+
+        @steps:
+        1. Generate 20000 ticks
+
+        @assertions:
+        1. Each tick is one array with quote of each symbol
+        2. Mean and standard deviation of quotes are close to mu and sigma of symbols
+        """
+        model = VectorizedQuotesModel({'s1': {'mu': 100, 'sigma': 20}, 's2': {'mu': 908, 'sigma': 13}}, seed=1)
+        ticks = np.array([model.next() for _ in range(20000)])
+
+        assert ticks.shape == (20000, 2)
+        assert np.allclose(ticks.mean(axis=0), [100, 908], atol=1)
+        assert np.allclose(ticks.std(axis=0), [20, 13], rtol=0.05)
+
+    def test_next__correlated_random_walk(self):
+        """
+        @description:
+        Here we would like to make sure that random walk moves quotes by correlated shocks
+
+        @pre-conditions:
+        1. Create random walk model of 3 symbols with correlation 0.8 and tick interval 0.01
+
+        @steps:
+        1. Generate 20000 ticks
+
+        @assertions:
+        1. Quotes start near mu
+        2. Standard deviation of moves is sigma * sqrt(tick interval)
+        3. Moves of different symbols are correlated
+        """
+        symbols = {name: {'mu': 100, 'sigma': 10} for name in ('s1', 's2', 's3')}
+        model = VectorizedQuotesModel(symbols, tick_interval=0.01, correlation=0.8, random_walk=True, seed=1)
+        ticks = np.array([model.next() for _ in range(20000)])
+        moves = np.diff(ticks, axis=0)
+
+        assert np.allclose(ticks[0], 100, atol=5)
+        assert np.allclose(moves.std(axis=0), 1, rtol=0.05)
+        assert np.allclose(np.corrcoef(moves.T)[np.triu_indices(3, 1)], 0.8, atol=0.05)
+
+    def test_next_quotes__triggers_stop_orders(self, symbol1, orderbook_2x2):
+        """
+        @description:
+        Here we would like to make sure that order book accepts quotes as QuotesArray
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+        3. Place BUY stop order with stop price far above the market
+
+        @steps:
+        1. Push QuotesArray where symbol1 has quote above the stop price
+
+        @assertions:
+        1. QuotesArray works like dict {symbol name: price}
+        2. Stop order is triggered by quote from the array
+        """
+        stop = StopOrder(symbol1, 100000, 1, OrderAction.BUY)
+        orderbook_2x2.place_order(stop)
+        quotes = QuotesArray({'symbol0': 0, symbol1.name: 1}, np.array([1.5, 150000.0]))
+
+        assert dict(quotes) == {'symbol0': 1.5, symbol1.name: 150000.0}
+        orderbook_2x2._on_quotes(quotes)
+        assert stop.status == OrderStatus.PENDING
+        assert stop.price == 150000
+
+
+class TestQuotesSubscription:
+    def test_subscribe__symbols_filter(self):
+        """
+        @description:
+        Here we would like to make sure that subscriber with symbols filter gets only changed quotes of its symbols
+
+        @pre-conditions:
+        1. Subscribe callback to quotes of symbol_a
+
+        @steps:
+        1. Publish quotes of symbol_a and symbol_b 3 times (quote of symbol_a is the same in the second update)
+
+        @assertions:
+        1. Callback gets only quotes of symbol_a
+        2. Callback isn't called when quote of symbol_a isn't changed
+        """
+        received = list()
+        quote_generator.subscribe(received.append, symbols=['symbol_a'])
+        try:
+            quote_generator._publish({'symbol_a': 1, 'symbol_b': 2})
+            quote_generator._publish({'symbol_a': 1, 'symbol_b': 3})
+            quote_generator._publish({'symbol_a': 4, 'symbol_b': 5})
+        finally:
+            quote_generator.unsubscribe(received.append)
+
+        assert received == [{'symbol_a': 1}, {'symbol_a': 4}]
+
+    def test_subscribe_queue__coalescing(self):
+        """
+        @description:
+        Here we would like to make sure that slow queue subscriber gets only the latest quotes
+
+        @pre-conditions:
+        1. Subscribe queue to quotes of symbol_a and symbol_b
+
+        @steps:
+        1. Publish 3 updates of quotes before reading the queue
+        2. Read the queue twice (the second time with timeout)
+        3. Close the queue
+
+        @assertions:
+        1. The first read returns the latest quote of each symbol
+        2. The second read returns None by timeout
+        3. Iteration of closed queue is finished
+        """
+        with quote_generator.subscribe_queue(symbols=['symbol_a', 'symbol_b']) as subscription:
+            quote_generator._publish({'symbol_a': 1, 'symbol_b': 2})
+            quote_generator._publish({'symbol_a': 3, 'symbol_c': 4})
+            quote_generator._publish({'symbol_a': 5})
+
+            assert subscription.get(timeout=1) == {'symbol_a': 5, 'symbol_b': 2}
+            assert subscription.get(timeout=0.01) is None
+        assert list(subscription) == []
+
+
+class TestTickReplay:
+    def test_tick_file__records(self, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that tick file keeps symbols and ticks
+
+        @pre-conditions:
+        1. Write tick file of 2 symbols and 3 ticks
+
+        @steps:
+        1. Open tick file
+
+        @assertions:
+        1. Symbols and all ticks are read in the same order
+        2. Any tick can be read by its index
+        """
+        ticks = [(1.0, 0, 100.5), (1.0, 1, 200.25), (2.5, 0, 101.0)]
+        write_tick_file(tmp_path / 'ticks.bin', ['symbol_a', 'symbol_b'], ticks)
+
+        with TickFile(tmp_path / 'ticks.bin') as tick_file:
+            assert tick_file.symbols == ['symbol_a', 'symbol_b']
+            assert len(tick_file) == 3
+            assert list(tick_file) == ticks
+            assert tick_file[-1] == ticks[-1]
+
+    def test_replay__order_book_quotes(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that order book can get quotes from the replay as fast as possible
+
+        @pre-conditions:
+        1. Write tick file of symbol1 and symbol_b with 3 timestamps
+        2. Create order book with TickReplay quotes
+        3. Place BUY stop order with stop price 110
+
+        @steps:
+        1. Replay the file in the current thread
+
+        @assertions:
+        1. Ticks with the same timestamp are published as one update
+        2. Stop order is triggered by the quote 115 of the second timestamp
+        3. Current quotes are the latest quotes of each symbol
+        """
+        ticks = [(1.0, 0, 100), (1.0, 1, 5), (2.0, 0, 115), (3.0, 0, 90)]
+        write_tick_file(tmp_path / 'ticks.bin', [symbol1.name, 'symbol_b'], ticks)
+        replay = TickReplay(tmp_path / 'ticks.bin')
+        orderbook = OrderBook(Deep(2, 2), quotes=replay)
+        stop = StopOrder(symbol1, 110, 1, OrderAction.BUY)
+        orderbook.place_order(stop)
+
+        assert replay.replay() == 3
+        assert stop.status == OrderStatus.PENDING
+        assert stop.price == 115
+        assert replay.current_quotes == {symbol1.name: 90, 'symbol_b': 5}
+
+    def test_replay__accelerated(self, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that replay keeps recorded delays divided by speed
+
+        @pre-conditions:
+        1. Write tick file with ticks in 2 seconds
+
+        @steps:
+        1. Replay the file in the background thread 10 times faster
+        2. Wait for the end of replay
+
+        @assertions:
+        1. Replay takes about 0.2 seconds
+        2. All ticks are received by subscriber
+        """
+        write_tick_file(tmp_path / 'ticks.bin', ['symbol_a'], [(10.0, 0, 1), (11.0, 0, 2), (12.0, 0, 3)])
+        replay = TickReplay(tmp_path / 'ticks.bin', speed=10)
+        received = list()
+        replay.subscribe(received.append)
+
+        started_at = time.perf_counter()
+        replay.start()
+        replay.join(5)
+        elapsed = time.perf_counter() - started_at
+
+        assert 0.18 <= elapsed < 1
+        assert received == [{'symbol_a': 1}, {'symbol_a': 2}, {'symbol_a': 3}]
+
+
+def place_journaled_orders(symbol, orderbook) -> dict:
+    """
+    This function places orders that change the book by each kind of journaled events
+    (place with partial fill, trigger, cancel, fill, reject).
+
+    :return: dict {order id: (status, quantity, price)} of all orders after placing
+    """
+    orders = [LimitOrder(symbol, 100, 5, OrderAction.SELL), LimitOrder(symbol, 101, 5, OrderAction.SELL),
+              LimitOrder(symbol, 99, 3, OrderAction.BUY), LimitOrder(symbol, 98, 4, OrderAction.BUY),
+              LimitOrder(symbol, 100, 2, OrderAction.BUY), StopLimitOrder(symbol, 101, 150000, 4, OrderAction.BUY),
+              StopOrder(symbol, 200000, 1, OrderAction.BUY), LimitOrder(symbol, 97, 1, OrderAction.BUY)]
+    for order in orders:
+        orderbook.place_order(order)
+    orderbook._on_quotes({symbol.name: 150000})
+    orderbook.cancel_order(orders[3])
+    orderbook.fill_order(orders[7])
+    orderbook.reject_order(orders[6])
+    return {order.id: (order.status, order.quantity, order.price) for order in orders}
+
+
+class TestJournal:
+    def test_recover__from_journal(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that the order book is rebuilt from the journal after restart
+
+        @pre-conditions:
+        1. Create order book with journal
+
+        @steps:
+        1. Place orders with executions, trigger stop limit order, cancel, fill and reject orders
+        2. Close journal
+        3. Recover new order book from the journal's directory
+
+        @assertions:
+        1. Recovered orders have the same status, quantity and price
+        2. Recovered book has the same market data
+        3. Resting orders keep time priority (partially filled order is still the first one in its level)
+        """
+        journal = Journal(tmp_path)
+        orderbook = journal.recover(Deep(5, 5))
+        journal.start(orderbook)
+        states = place_journaled_orders(symbol1, orderbook)
+        market_data = orderbook.get_market_data()
+        asks = orderbook.get_orders_by_action(OrderAction.SELL)
+        journal.close()
+
+        recovered = Journal(tmp_path).recover(Deep(5, 5))
+        assert {order.id: (order.status, order.quantity, order.price)
+                for order in recovered.orders + recovered.finished_orders} == states
+        assert recovered.get_market_data() == market_data
+        assert [order.id for order in recovered.get_orders_by_action(OrderAction.SELL)] == [o.id for o in asks]
+
+    def test_recover__from_snapshot_and_tail(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that recovery loads the latest snapshot and replays the journal's tail,
+        and that broken tail of the journal (crash during writing) is skipped
+
+        @pre-conditions:
+        1. Create order book with journal that writes snapshot after each 4 records
+
+        @steps:
+        1. Place orders (more than 4 records), then place one more order and flush the journal
+        2. Write half of the record to the end of the journal (crash during writing)
+        3. Recover new order book and continue journaling
+
+        @assertions:
+        1. Snapshots are written and the latest one covers all records except the tail
+        2. Recovered book has the same orders, the broken record is skipped
+        3. New records continue the sequence of recovered journal
+        """
+        journal = Journal(tmp_path, snapshot_interval=4)
+        orderbook = journal.recover(Deep(5, 5))
+        journal.start(orderbook)
+        states = place_journaled_orders(symbol1, orderbook)
+        assert journal.flush(5)
+        snapshot_sequence = journal.snapshot()
+        last_order = LimitOrder(symbol1, 90, 1, OrderAction.BUY)
+        orderbook.place_order(last_order)
+        states[last_order.id] = (OrderStatus.PENDING, 1, 90)
+        journal.close()
+        segment = sorted(tmp_path.glob('journal-*.bin'))[-1]
+        with open(segment, 'ab') as f:
+            f.write(segment.read_bytes()[-20:])
+
+        journal = Journal(tmp_path)
+        recovered = journal.recover(Deep(5, 5))
+        assert sorted(tmp_path.glob('snapshot-*.bin'))[-1].name == f'snapshot-{snapshot_sequence:020d}.bin'
+        assert journal.sequence == snapshot_sequence + 1
+        assert {order.id: (order.status, order.quantity, order.price)
+                for order in recovered.orders + recovered.finished_orders} == states
+        assert recovered.get_market_data() == orderbook.get_market_data()
+
+        journal.start(recovered)
+        recovered.cancel_order(last_order)
+        assert journal.flush(5)
+        assert journal.durable_sequence == snapshot_sequence + 2
+        journal.close()
+
+    def test_recover__bounded_history(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that executions are journaled when filled resting orders are evicted
+        from the history right away
+
+        @pre-conditions:
+        1. Create order book without history (max_size=0) with journal and enable metrics
+
+        @steps:
+        1. Place two sell limit orders and buy limit order that fills both of them
+        2. Close journal and recover new order book
+
+        @assertions:
+        1. Each event has its record, filled resting orders are counted by metrics
+        2. Recovered book doesn't have filled orders
+        """
+        journal = Journal(tmp_path)
+        orderbook = OrderBook(Deep(5, 5), history=OrderHistory(max_size=0))
+        journal.start(orderbook)
+        metrics = orderbook.enable_metrics()
+        orderbook.place_order(LimitOrder(symbol1, 101, 1, OrderAction.SELL))
+        orderbook.place_order(LimitOrder(symbol1, 102, 1, OrderAction.SELL))
+        orderbook.place_order(LimitOrder(symbol1, 102, 2, OrderAction.BUY))
+        assert orderbook.get_market_data() == {'asks': [], 'bids': []}
+        assert metrics.to_dict()['orders']['limit'] == {'pending': 2, 'fill': 3}
+        assert journal.flush(5) and journal.durable_sequence == 3
+        journal.close()
+
+        recovered = Journal(tmp_path).recover(Deep(5, 5))
+        assert recovered.get_market_data() == {'asks': [], 'bids': []}
+        assert not recovered._orders
+
+    def test_recover__broken_tail_and_restart(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that records written after restart are not lost behind the broken tail
+        of the segment (crash during the first write after restart)
+
+        @pre-conditions:
+        1. Create order book with journal and place order
+        2. Restart journal, place order and cut the end of its record (crash during writing)
+
+        @steps:
+        1. Recover order book, continue journaling and place order
+        2. Recover order book again
+
+        @assertions:
+        1. Broken record is cut by the first recovery
+        2. The order placed after restart is recovered and the sequence continues
+        """
+        journal = Journal(tmp_path)
+        journal.start(journal.recover(Deep(5, 5)))
+        journal.order_book.place_order(LimitOrder(symbol1, 90, 1, OrderAction.BUY))
+        journal.close()
+
+        journal = Journal(tmp_path)
+        journal.start(journal.recover(Deep(5, 5)))
+        journal.order_book.place_order(LimitOrder(symbol1, 91, 1, OrderAction.BUY))
+        journal.close()
+        segment = sorted(tmp_path.glob('journal-*.bin'))[-1]
+        segment.write_bytes(segment.read_bytes()[:-10])
+
+        journal = Journal(tmp_path)
+        orderbook = journal.recover(Deep(5, 5))
+        assert journal.sequence == 1
+        journal.start(orderbook)
+        order = LimitOrder(symbol1, 92, 1, OrderAction.BUY)
+        orderbook.place_order(order)
+        journal.close()
+
+        journal = Journal(tmp_path)
+        recovered = journal.recover(Deep(5, 5))
+        assert journal.sequence == 2
+        assert recovered.get_order_by_id(order.id).price == 92
+        assert [o.price for o in recovered.get_orders_by_action(OrderAction.BUY)] == [92, 90]
+
+
+class TestOrderBookSnapshot:
+    def test_load_snapshot(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that the order book is restored from the binary snapshot
+
+        @pre-conditions:
+        1. Create order book (orderbook_2x2)
+        2. Place orders with executions, trigger stop limit order, cancel, fill and reject orders
+
+        @steps:
+        1. Save snapshot of the order book
+        2. Load new order book from the snapshot
+
+        @assertions:
+        1. Loaded orders have the same ids, types, status, quantity, price and stop price
+        2. Loaded book has the same market data and time priority of resting orders
+        3. Waiting stop order is triggered by the next quote
+        """
+        orderbook = OrderBook(Deep(5, 5))
+        states = place_journaled_orders(symbol1, orderbook)
+        waiting_stop = StopOrder(symbol1, 300000, 1, OrderAction.BUY)
+        orderbook.place_order(waiting_stop)
+        states[waiting_stop.id] = (OrderStatus.CREATED, 1, 300000)
+        orderbook.save_snapshot(tmp_path / 'book.bin')
+
+        loaded = OrderBook.load_snapshot(tmp_path / 'book.bin', Deep(5, 5))
+        loaded_orders = loaded.orders + loaded.finished_orders
+        assert {order.id: (order.status, order.quantity, order.price) for order in loaded_orders} == states
+        assert {o.id: (type(o), o.type, getattr(o, 'stop_price', None)) for o in loaded_orders} == \
+               {o.id: (type(o), o.type, getattr(o, 'stop_price', None))
+                for o in orderbook.orders + orderbook.finished_orders}
+        assert loaded.get_market_data() == orderbook.get_market_data()
+        assert [o.id for o in loaded.get_orders_by_action(OrderAction.SELL)] == \
+               [o.id for o in orderbook.get_orders_by_action(OrderAction.SELL)]
+
+        loaded._on_quotes({symbol1.name: 300000})
+        assert loaded.get_order_by_id(waiting_stop.id).type == OrderType.MARKET
+        assert loaded.get_order_by_id(waiting_stop.id).status == OrderStatus.FILL
+
+    def test_load_snapshot__damaged(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that damaged snapshot isn't loaded
+
+        @pre-conditions:
+        1. Save snapshot of the order book with one order
+        2. Change one byte of the snapshot
+
+        @steps:
+        1. Load new order book from the snapshot
+
+        @assertions:
+        1. ValueError is raised
+        """
+        orderbook = OrderBook(Deep(5, 5))
+        orderbook.place_order(LimitOrder(symbol1, 100, 5, OrderAction.SELL))
+        orderbook.save_snapshot(tmp_path / 'book.bin')
+        data = bytearray((tmp_path / 'book.bin').read_bytes())
+        data[-1] ^= 0xff
+        (tmp_path / 'book.bin').write_bytes(bytes(data))
+
+        with pytest.raises(ValueError):
+            OrderBook.load_snapshot(tmp_path / 'book.bin', Deep(5, 5))
+
+
+class TestLoadGenerator:
+    def test_order_flow__mix(self):
+        """
+        @description:
+        Here we would like to make sure that order flow generator produces orders of the given mix
+
+        @pre-conditions:
+        1. Create order flow generator with symbols of config.yml and mix without stop limit orders
+
+        @steps:
+        1. Generate 1000 orders
+
+        @assertions:
+        1. There are only market, limit and stop orders of config's symbols
+        2. Limit orders are the most of them
+        3. The same seed gives the same flow
+        """
+        symbols = {'symbol1': {'mu': 100, 'sigma': 20}, 'symbol2': {'mu': 908, 'sigma': 13}}
+        mix = {OrderType.MARKET: 1, OrderType.LIMIT: 6, OrderType.STOP: 2}
+        flow = OrderFlowGenerator(symbols, mix, seed=1)
+        orders = [flow.next_order() for _ in range(1000)]
+
+        types = [order.type for order in orders]
+        assert set(types) == set(mix)
+        assert types.count(OrderType.LIMIT) > types.count(OrderType.STOP) > types.count(OrderType.MARKET)
+        assert {order.symbol.name for order in orders} == set(symbols)
+        assert all(1 <= order.quantity <= 10 and order.price > 0 for order in orders)
+        same_flow = OrderFlowGenerator(symbols, mix, seed=1)
+        assert [(o.type, o.price, o.quantity) for o in orders] == \
+               [(o.type, o.price, o.quantity) for o in (same_flow.next_order() for _ in range(1000))]
+
+    def test_run(self):
+        """
+        @description:
+        Here we would like to make sure that load generator drives order book and reports the load
+
+        @pre-conditions:
+        1. Create order book with static quotes and load generator with 50% cancels
+
+        @steps:
+        1. Send 300 requests
+
+        @assertions:
+        1. All requests are placed or cancelled orders without errors
+        2. Cancelled orders have CANCEL status
+        3. Report has achieved rate and latency percentiles
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {'symbol1': 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        flow = OrderFlowGenerator({'symbol1': {'mu': 100, 'sigma': 20}}, seed=1)
+        load_generator = LoadGenerator(orderbook, flow, rate=100000, cancel_ratio=0.5, seed=1)
+        report = load_generator.run(requests=300)
+
+        assert report.placed + report.cancelled == 300
+        assert report.cancelled > 0 and report.errors == 0
+        assert len([o for o in orderbook.finished_orders if o.status == OrderStatus.CANCEL]) == report.cancelled
+        assert report.achieved_rate > 0
+        assert set(report.latency) == {'p50', 'p90', 'p99', 'p99.9', 'max'}
+        assert report.latency['p50'] <= report.latency['max']
+
+
+class TestOrderBookMetrics:
+    def test_latency_histogram(self):
+        """
+        @description:
+        Here we would like to make sure that latency histogram gives percentiles with small relative error
+
+        @pre-conditions:
+        1. Create latency histogram
+
+        @steps:
+        1. Record latencies from 1 us to 10 ms
+
+        @assertions:
+        1. Count, min, max and sum are exact
+        2. Percentiles differ from exact ones less than 2%
+        """
+        histogram = LatencyHistogram()
+        for value in range(1, 10001):
+            histogram.record(value * 1000)
+        result = histogram.to_dict()
+
+        assert (result['count'], result['min'], result['max']) == (10000, 1000, 10000000)
+        assert result['sum'] == sum(value * 1000 for value in range(1, 10001))
+        for name, exact in (('p50', 5000000), ('p90', 9000000), ('p99', 9900000), ('p99.9', 9990000)):
+            assert exact <= result[name] <= exact * 1.02
+
+    def test_enable_metrics(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that order book metrics count calls, orders and book's state
+
+        @pre-conditions:
+        1. Create order book (with static quotes) and enable metrics
+
+        @steps:
+        1. Place two sell limit orders, buy limit order that fills one of them and stop order
+        2. Cancel the other sell order, get market data
+        3. Disable metrics
+
+        @assertions:
+        1. Latencies are recorded per operation
+        2. Orders are counted by type and status, gauges show the book
+        3. Prometheus text has summary, counters and gauges
+        4. Disabled metrics remove instrumentation
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        metrics = orderbook.enable_metrics()
+        assert orderbook.enable_metrics() is metrics
+
+        orderbook.place_order(LimitOrder(symbol1, 101, 5, OrderAction.SELL))
+        sell_order = LimitOrder(symbol1, 102, 5, OrderAction.SELL)
+        orderbook.place_order(sell_order)
+        orderbook.place_order(LimitOrder(symbol1, 101, 5, OrderAction.BUY))
+        orderbook.place_order(StopOrder(symbol1, 150, 1, OrderAction.BUY))
+        assert metrics.to_dict()['gauges'] == {'price_levels': 1, 'resting_orders': 1, 'pending_stops': 1,
+                                               'orders': 2, 'history_orders': 2}
+        orderbook.cancel_order(sell_order)
+        orderbook.get_market_data()
+        result = metrics.to_dict()
+
+        assert {name: latency['count'] for name, latency in result['latency'].items()} == \
+               {'place': 4, 'place_batch': 0, 'cancel': 1, 'fill': 0, 'market_data': 1}
+        assert result['orders'] == {'limit': {'pending': 2, 'fill': 2, 'cancel': 1}, 'stop': {'created': 1}}
+        assert result['executions'] == 1
+        assert result['gauges'] == {'price_levels': 0, 'resting_orders': 0, 'pending_stops': 1, 'orders': 1,
+                                    'history_orders': 3}
+
+        text = metrics.to_prometheus()
+        assert '# TYPE order_book_latency_seconds summary' in text
+        assert 'order_book_latency_seconds_count{operation="place"} 4' in text
+        assert 'order_book_orders_total{type="limit",status="fill"} 2' in text
+        assert 'order_book_pending_stops 1' in text
+
+        orderbook.disable_metrics()
+        assert orderbook.metrics is None
+        assert 'place_order' not in vars(orderbook) and not orderbook._order_subscribers
+
+    def test_enable_metrics__triggered_stop_orders(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that triggered stop orders are counted by their stop types,
+        not by market or limit types they get on trigger
+
+        @pre-conditions:
+        1. Create order book (with static quotes) and enable metrics
+        2. Place sell limit orders by 101 and 102
+
+        @steps:
+        1. Place buy stop order and buy stop limit order that are triggered by the current quote and filled
+
+        @assertions:
+        1. Stop and stop limit orders are counted as created, triggered (pending) and filled
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        orderbook.place_order(LimitOrder(symbol1, 101, 1, OrderAction.SELL))
+        orderbook.place_order(LimitOrder(symbol1, 102, 1, OrderAction.SELL))
+        metrics = orderbook.enable_metrics()
+
+        orderbook.place_order(StopOrder(symbol1, 99, 1, OrderAction.BUY))
+        orderbook.place_order(StopLimitOrder(symbol1, 102, 99, 1, OrderAction.BUY))
+        orders = metrics.to_dict()['orders']
+
+        assert set(orders) == {'stop', 'stop limit', 'limit'}
+        assert orders['stop']['fill'] == 1 and orders['stop limit']['fill'] == 1
+        assert orders['limit'] == {'fill': 2}
+
+
+class TestEventLog:
+    def test_log(self):
+        """
+        @description:
+        Here we would like to make sure that event log writes records by the background writer
+
+        @pre-conditions:
+        1. Create event log with info level that writes to the stream
+
+        @steps:
+        1. Log debug, info and error records
+        2. Wait for the writer
+
+        @assertions:
+        1. Debug record is skipped
+        2. Info and error records are written in order as structured lines (enums by their values)
+        """
+        stream = io.StringIO()
+        log = EventLog(LogLevel.INFO, stream=stream, flush_interval=0.01)
+        log.debug('quotes', symbol1=100)
+        log.info('order_placed', type=OrderType.LIMIT, price=100)
+        log.error('subscriber_failed', error='ValueError()')
+        assert log._thread is not None
+
+        for _ in range(100):
+            if stream.getvalue().count('\n') == 2:
+                break
+            time.sleep(0.01)
+        log.stop()
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 2
+        assert lines[0].endswith(' INFO order_placed type=limit price=100')
+        assert lines[1].endswith(' ERROR subscriber_failed error=ValueError()')
+
+    def test_log__full_buffer(self):
+        """
+        @description:
+        Here we would like to make sure that full ring buffer drops the oldest records instead of blocking
+
+        @pre-conditions:
+        1. Create event log with buffer of 3 records and writer that doesn't drain it (long flush interval)
+
+        @steps:
+        1. Log 5 records
+        2. Flush the log
+
+        @assertions:
+        1. 2 records are dropped, the last 3 records are written
+        """
+        stream = io.StringIO()
+        log = EventLog(LogLevel.INFO, capacity=3, stream=stream, flush_interval=60)
+        for number in range(5):
+            log.info('event', number=number)
+
+        assert log.dropped == 2
+        assert log.flush() == 3
+        log.stop()
+        assert [line.split(' ', 1)[1] for line in stream.getvalue().splitlines()] == \
+               [f'INFO event number={number}' for number in range(2, 5)]
+
+    def test_place_order__not_logged_by_default(self, symbol1, orderbook_2x2, monkeypatch):
+        """
+        @description:
+        Here we would like to make sure that placed orders are logged at debug level only, so per order records
+        are not built with the default level
+
+        @pre-conditions:
+        1. Create symbol (symbol1)
+        2. Create order book (orderbook_2x2)
+
+        @steps:
+        1. Place limit order with the default level of the event log
+        2. Place limit order with debug level of the event log
+
+        @assertions:
+        1. The first order is not logged
+        2. The second order is logged as order_placed
+        """
+        records = list()
+        monkeypatch.setattr(event_log, 'log', lambda level, event, **fields: records.append((level, event)))
+        orderbook_2x2.place_order(LimitOrder(symbol1, 100, 1, OrderAction.BUY))
+        assert records == []
+
+        monkeypatch.setattr(event_log, 'level', LogLevel.DEBUG)
+        orderbook_2x2.place_order(LimitOrder(symbol1, 100, 1, OrderAction.BUY))
+        assert records == [(LogLevel.DEBUG, 'order_placed')]
+
+
+class TestMarketDataValidation:
+    INVALID_MARKET_DATA = [
+        None, [], {'asks': []}, {'bids': []}, {'asks': (), 'bids': []}, {'asks': [], 'bids': None},
+        {'asks': [1], 'bids': []}, {'asks': [{'price': 1}], 'bids': []},
+        {'asks': [], 'bids': [{'quantity': 1}]}, {'asks': [{'price': '1', 'quantity': 1}], 'bids': []},
+        {'asks': [], 'bids': [{'price': 1, 'quantity': True}]}, {'asks': [{'price': 1, 'quantity': None}], 'bids': []},
+    ]
+    VALID_MARKET_DATA = [
+        {'asks': [], 'bids': []}, {'asks': [{'price': 1.5, 'quantity': 2}], 'bids': [], 'symbol': 'symbol1'},
+        {'asks': [{'price': 1, 'quantity': 2.5, 'count': 1}], 'bids': [{'price': 0.5, 'quantity': 1}]},
+    ]
+
+    def test_shape_checks__agree_with_schema(self):
+        """
+        @description:
+        Here we would like to make sure that fast shape checks give the same result as jsonschema validator
+
+        @pre-conditions:
+        1. Prepare valid and invalid market data (wrong types, missing fields, bool instead of number)
+
+        @steps:
+        1. Check each market data by shape checks, precompiled validator and is_market_data_schema_valid
+
+        @assertions:
+        1. All checks agree
+        """
+        for market_data in self.VALID_MARKET_DATA:
+            assert is_market_data_shape_valid(market_data)
+            assert market_data_validator.is_valid(market_data)
+            assert is_market_data_schema_valid(market_data) is True
+        for market_data in self.INVALID_MARKET_DATA:
+            assert not is_market_data_shape_valid(market_data)
+            assert not market_data_validator.is_valid(market_data)
+            assert is_market_data_schema_valid(market_data)[0] is False
+
+    def test_validate_market_data_batch(self, orderbook_2x2, symbol1):
+        """
+        @description:
+        Here we would like to make sure that batch validation returns errors of invalid snapshots only
+
+        @pre-conditions:
+        1. Place sell and buy limit orders
+
+        @steps:
+        1. Validate market data of the order book with invalid market data
+
+        @assertions:
+        1. Market data of the order book is valid, invalid market data has validation errors
+        """
+        orderbook_2x2.place_order(LimitOrder(symbol1, 101, 5, OrderAction.SELL))
+        orderbook_2x2.place_order(LimitOrder(symbol1, 99, 5, OrderAction.BUY))
+        snapshots = [orderbook_2x2.get_market_data()] + self.INVALID_MARKET_DATA
+
+        errors = validate_market_data_batch(snapshots)
+        assert errors[0] is None
+        assert all(isinstance(error, ValidationError) for error in errors[1:])
+
+
+class TestQuotesGeneratorLifecycle:
+    def test_start_lazily(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that quotes generator is started by the first quote request only
+
+        @pre-conditions:
+        1. Quotes generator is stopped and its stop flag is cleared (like it's never started)
+
+        @steps:
+        1. Create order book with quotes generator (it subscribes to quotes)
+        2. Place limit order
+        3. Request current quote
+
+        @assertions:
+        1. Subscription and limit order don't start the thread
+        2. Quote request starts the thread and returns the quote
+        """
+        quote_generator.stop()
+        quote_generator._stop.clear()
+        try:
+            orderbook = OrderBook(Deep(2, 2))
+            orderbook.place_order(LimitOrder(symbol1, 100, 1, OrderAction.BUY))
+            assert not quote_generator.is_alive()
+            assert quote_generator.get_current_quote(symbol1) is not None
+            assert quote_generator.is_alive()
+        finally:
+            quote_generator.start()
+
+    def test_stop_start(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that quotes generator can be stopped and started again
+
+        @pre-conditions:
+        1. Quotes generator is started
+
+        @steps:
+        1. Stop quotes generator
+        2. Request current quote
+        3. Start quotes generator
+
+        @assertions:
+        1. Stopped generator doesn't have thread and it's not started lazily by the quote request
+        2. Started generator has thread and current quotes
+        """
+        quote_generator.start()
+        assert quote_generator.is_alive()
+
+        quote_generator.stop()
+        try:
+            assert not quote_generator.is_alive() and quote_generator.stopped()
+            quote_generator.get_current_quote(symbol1)
+            assert not quote_generator.is_alive()
+        finally:
+            quote_generator.start()
+        assert quote_generator.is_alive() and not quote_generator.stopped()
+        assert quote_generator.get_current_quote(symbol1) is not None
+
+
+class TestConfigParser:
+    def test_parse_config__cache(self, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that parsed config is cached until the file is changed
+
+        @pre-conditions:
+        1. Create config file
+
+        @steps:
+        1. Parse the section twice
+        2. Change the file and parse the section again
+
+        @assertions:
+        1. The file is parsed once until it's changed, changes of returned section don't affect the cache
+        2. Changed file is parsed again
+        """
+        path = tmp_path / 'config.yml'
+        path.write_text('section:\n  value: 1\n')
+        parser = ConfigParser(str(path))
+        section = parser.parse_config('section')
+        section['value'] = 2
+        cached = ConfigParser._cache[str(path)]
+        assert parser.parse_config('section') == {'value': 1}
+        assert ConfigParser._cache[str(path)] is cached
+
+        path.write_text('section:\n  value: 10\n')
+        os.utime(path, ns=(cached[0][0] + 10 ** 9, cached[0][0] + 10 ** 9))
+        assert parser.parse_config('section') == {'value': 10}
+
+
+class TestOrderHistory:
+    def test_finished_orders__moved_to_history(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that finished orders leave live orders of the book for the history
+
+        @pre-conditions:
+        1. Create order book (with static quotes) and history of 2 orders
+
+        @steps:
+        1. Place sell limit order and buy limit order that fills it
+        2. Place and cancel another sell limit order
+
+        @assertions:
+        1. Filled and cancelled orders are not live, they are found by id in the history
+        2. The oldest finished order is evicted from the history of 2 orders
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes, OrderHistory(max_size=2))
+        sell_order = LimitOrder(symbol1, 100, 5, OrderAction.SELL)
+        buy_order = LimitOrder(symbol1, 100, 5, OrderAction.BUY)
+        orderbook.place_order(sell_order)
+        orderbook.place_order(buy_order)
+        assert not orderbook._orders
+        assert orderbook.get_order_by_id(sell_order.id) is sell_order
+        assert orderbook.get_order_by_id(buy_order.id) is buy_order
+
+        cancelled_order = LimitOrder(symbol1, 101, 5, OrderAction.SELL)
+        orderbook.place_order(cancelled_order)
+        assert list(orderbook._orders) == [cancelled_order.id]
+        orderbook.cancel_order(cancelled_order)
+
+        assert not orderbook._orders
+        assert orderbook.get_order_by_id(sell_order.id) is None
+        assert orderbook.orders == []
+        assert {order.id for order in orderbook.finished_orders} == {buy_order.id, cancelled_order.id}
+        with pytest.raises(OrderAlreadyCreatedError):
+            orderbook.place_order(cancelled_order)
+
+    def test_cancel_order__finished_or_unknown(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that only orders that wait in the book can be cancelled, filled or rejected
+
+        @pre-conditions:
+        1. Create order book (with static quotes) and subscribe to order updates
+        2. Place sell limit order and buy limit order that fills it
+
+        @steps:
+        1. Cancel, fill and reject the filled order
+        2. Cancel order that isn't placed
+
+        @assertions:
+        1. OrderIsNotWaitingError is raised
+        2. Filled order keeps its status and no updates are published
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        sell_order = LimitOrder(symbol1, 100, 5, OrderAction.SELL)
+        orderbook.place_order(sell_order)
+        orderbook.place_order(LimitOrder(symbol1, 100, 5, OrderAction.BUY))
+        updates = list()
+        orderbook.subscribe_orders(updates.append)
+
+        for finish in (orderbook.cancel_order, orderbook.fill_order, orderbook.reject_order):
+            with pytest.raises(OrderIsNotWaitingError):
+                finish(sell_order)
+        with pytest.raises(OrderIsNotWaitingError):
+            orderbook.cancel_order(LimitOrder(symbol1, 100, 5, OrderAction.SELL))
+
+        assert sell_order.status == OrderStatus.FILL
+        assert updates == []
+
+    def test_evict__age_and_spill(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that old orders are evicted from memory to the spill file
+
+        @pre-conditions:
+        1. Create history with max age 0.05 seconds and spill file
+
+        @steps:
+        1. Add filled order
+        2. Wait for 0.05 seconds and add cancelled order
+
+        @assertions:
+        1. The first order is evicted from memory, it's read from the spill file with the same fields
+        2. The second order is in memory
+        """
+        history = OrderHistory(max_size=None, max_age=0.05, spill_path=str(tmp_path / 'history'))
+        filled_order = LimitOrder(symbol1, 100, 5, OrderAction.SELL)
+        filled_order.status = OrderStatus.FILL
+        cancelled_order = StopLimitOrder(symbol1, 90, 95, 2, OrderAction.BUY)
+        cancelled_order.status = OrderStatus.CANCEL
+        history.add(filled_order)
+        time.sleep(0.06)
+        history.add(cancelled_order)
+
+        assert list(history) == [cancelled_order]
+        assert history.get(cancelled_order.id) is cancelled_order
+        spilled_order = history.get(filled_order.id)
+        assert spilled_order is not filled_order
+        assert spilled_order.to_dict() == filled_order.to_dict()
+        assert history.get(uuid.uuid4()) is None
+        history.close()
+
+    def test_evict__idle_book_and_spilled_duplicate(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that history of idle book is aged by reads and spilled orders
+        are still known by the book's duplicate check
+
+        @pre-conditions:
+        1. Create order book (with static quotes) with history with max age 0.05 seconds and spill file
+
+        @steps:
+        1. Place and cancel sell limit order
+        2. Wait for 0.05 seconds without changes of the book
+        3. Place the cancelled order again
+
+        @assertions:
+        1. Cancelled order is evicted from memory by reading of finished orders, it's found in the spill file
+        2. Live orders don't include finished ones
+        3. OrderAlreadyCreatedError is raised for the spilled order
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        history = OrderHistory(max_size=None, max_age=0.05, spill_path=str(tmp_path / 'history'))
+        orderbook = OrderBook(Deep(5, 5), quotes, history)
+        order = LimitOrder(symbol1, 101, 5, OrderAction.SELL)
+        orderbook.place_order(order)
+        orderbook.cancel_order(order)
+        assert orderbook.orders == [] and orderbook.finished_orders == [order]
+        time.sleep(0.06)
+
+        assert orderbook.finished_orders == []
+        assert order.id in history
+        assert orderbook.get_order_by_id(order.id).status == OrderStatus.CANCEL
+        with pytest.raises(OrderAlreadyCreatedError):
+            orderbook.place_order(order)
+        history.close()
+
+
+class TestAmendOrder:
+    def test_amend_order__decrease_quantity(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that decrease of quantity keeps the order's place in the queue
+
+        @pre-conditions:
+        1. Create order book (with static quotes)
+        2. Place two sell limit orders with the same price
+
+        @steps:
+        1. Decrease quantity of the first order
+        2. Increase quantity of the first order
+
+        @assertions:
+        1. After decrease the first order is still the first in the queue and level's quantity is decreased
+        2. After increase the order is moved to the end of the queue
+        3. It's the same order object with the same id
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        first_order = LimitOrder(symbol1, 101, 5, OrderAction.SELL)
+        second_order = LimitOrder(symbol1, 101, 3, OrderAction.SELL)
+        orderbook.place_order(first_order)
+        orderbook.place_order(second_order)
+
+        assert orderbook.amend_order(first_order, quantity=2) == []
+        assert orderbook.get_orders_by_action(OrderAction.SELL) == [first_order, second_order]
+        assert orderbook.get_market_data()['asks'] == [{'price': 101, 'quantity': 5}]
+        assert first_order.quantity == 2 and orderbook.get_order_by_id(first_order.id) is first_order
+
+        orderbook.amend_order(first_order, quantity=4)
+        assert orderbook.get_orders_by_action(OrderAction.SELL) == [second_order, first_order]
+        assert orderbook.get_market_data()['asks'] == [{'price': 101, 'quantity': 7}]
+
+    def test_amend_order__price(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that new price moves the order and crossing order is matched
+
+        @pre-conditions:
+        1. Create order book (with static quotes)
+        2. Place sell limit orders by 101 and 102 and buy limit order by 99
+
+        @steps:
+        1. Amend price of the sell order from 101 to 103
+        2. Amend price of the buy order to 102 with quantity 4
+
+        @assertions:
+        1. Sell order is moved to the level 103
+        2. Buy order is filled by the sell order of 102
+        3. Finished order cannot be amended
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        moved_order = LimitOrder(symbol1, 101, 5, OrderAction.SELL)
+        sell_order = LimitOrder(symbol1, 102, 5, OrderAction.SELL)
+        buy_order = LimitOrder(symbol1, 99, 2, OrderAction.BUY)
+        for order in (moved_order, sell_order, buy_order):
+            orderbook.place_order(order)
+
+        orderbook.amend_order(moved_order, price=103)
+        assert orderbook.get_market_data()['asks'] == [{'price': 102, 'quantity': 5}, {'price': 103, 'quantity': 5}]
+
+        executions = orderbook.amend_order(buy_order, price=102, quantity=4)
+        assert [(e.price, e.quantity, e.sell_order_id) for e in executions] == [(102, 4, sell_order.id)]
+        assert buy_order.status == OrderStatus.FILL
+        assert orderbook.get_market_data() == {'asks': [{'price': 102, 'quantity': 1}, {'price': 103, 'quantity': 5}],
+                                               'bids': []}
+        with pytest.raises(OrderIsNotAmendableError):
+            orderbook.amend_order(buy_order, quantity=1)
+        with pytest.raises(OrderPriceIsNotValidError):
+            orderbook.amend_order(moved_order, price=-1)
+
+    def test_amend_order__market_remainder(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that amended remainders of market order and triggered stop order
+        are matched by their resting price, not by any price
+
+        @pre-conditions:
+        1. Create order book (with static quote 100)
+        2. Place sell limit order by 100 and buy market order that takes it and rests its remainder by 100
+        3. Place buy stop order by 100 that is triggered and rests by 100
+        4. Place sell limit order by 150
+
+        @steps:
+        1. Increase quantity of the market order's remainder
+        2. Increase quantity of the stop order's remainder
+
+        @assertions:
+        1. There are no executions, the ask by 150 is not taken
+        2. Remainders rest by 100 with new quantities
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        orderbook.place_order(LimitOrder(symbol1, 100, 2, OrderAction.SELL))
+        market_order = MarketOrder(symbol1, 5, OrderAction.BUY)
+        orderbook.place_order(market_order)
+        stop_order = StopOrder(symbol1, 100, 5, OrderAction.BUY)
+        orderbook.place_order(stop_order)
+        orderbook.place_order(LimitOrder(symbol1, 150, 5, OrderAction.SELL))
+        assert (market_order.status, market_order.quantity, market_order.type) == (OrderStatus.PENDING, 3,
+                                                                                   OrderType.MARKET)
+        assert (stop_order.status, stop_order.quantity, stop_order.type) == (OrderStatus.PENDING, 5, OrderType.MARKET)
+
+        assert orderbook.amend_order(market_order, quantity=6) == []
+        assert orderbook.amend_order(stop_order, quantity=7) == []
+        assert orderbook.get_market_data(symbol1) == {'asks': [{'price': 150, 'quantity': 5}],
+                                                      'bids': [{'price': 100, 'quantity': 13}]}
+
+    def test_amend_order__recover_from_journal(self, symbol1, tmp_path):
+        """
+        @description:
+        Here we would like to make sure that amended orders are recovered from the journal with their queue places
+
+        @pre-conditions:
+        1. Create journaled order book
+        2. Place two sell limit orders with the same price and stop order
+
+        @steps:
+        1. Decrease quantity of the first sell order, amend stop price of the stop order
+        2. Recover the order book from the journal
+
+        @assertions:
+        1. Recovered orders have amended prices and quantities, the first sell order is still the first
+        """
+        journal = Journal(tmp_path)
+        orderbook = journal.recover(Deep(5, 5))
+        journal.start(orderbook)
+        first_order = LimitOrder(symbol1, 300001, 5, OrderAction.SELL)
+        second_order = LimitOrder(symbol1, 300001, 3, OrderAction.SELL)
+        stop_order = StopOrder(symbol1, 300000, 1, OrderAction.BUY)
+        for order in (first_order, second_order, stop_order):
+            orderbook.place_order(order)
+        orderbook.amend_order(first_order, quantity=1)
+        orderbook.amend_order(stop_order, price=300005)
+        journal.close()
+
+        recovered = Journal(tmp_path).recover(Deep(5, 5))
+        assert [(o.id, o.quantity) for o in recovered.get_orders_by_action(OrderAction.SELL)] == \
+               [(first_order.id, 1), (second_order.id, 3)]
+        assert recovered.get_order_by_id(stop_order.id).price == 300005
+        assert recovered.get_market_data() == orderbook.get_market_data()
+
+
+class TestBestBidOffer:
+    def test_get_bbo(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that BBO is maintained and subscribers get only its changes
+
+        @pre-conditions:
+        1. Create order book (with static quotes) and subscribe to BBO of symbol1
+
+        @steps:
+        1. Place sell limit orders by 101 (twice) and 102, buy limit order by 99
+        2. Place buy limit order by 98 (doesn't change BBO)
+        3. Place buy limit order by 101 that fills the first sell order
+        4. Cancel all orders of the best ask
+
+        @assertions:
+        1. BBO has price, quantity and number of orders of the best levels
+        2. Subscriber is called only when BBO is changed
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        received = list()
+        orderbook.subscribe_bbo(received.append, symbols=[symbol1.name])
+        assert orderbook.get_bbo(symbol1).bid_price is None
+
+        first_order = LimitOrder(symbol1, 101, 5, OrderAction.SELL)
+        second_order = LimitOrder(symbol1, 101, 2, OrderAction.SELL)
+        for order in (first_order, second_order, LimitOrder(symbol1, 102, 1, OrderAction.SELL),
+                      LimitOrder(symbol1, 99, 3, OrderAction.BUY)):
+            orderbook.place_order(order)
+        bbo = orderbook.get_bbo(symbol1)
+        assert (bbo.bid_price, bbo.bid_quantity, bbo.bid_count) == (99, 3, 1)
+        assert (bbo.ask_price, bbo.ask_quantity, bbo.ask_count) == (101, 7, 2)
+        assert len(received) == 3 and received[-1] is bbo
+
+        orderbook.place_order(LimitOrder(symbol1, 98, 3, OrderAction.BUY))
+        assert len(received) == 3
+
+        orderbook.place_order(LimitOrder(symbol1, 101, 5, OrderAction.BUY))
+        assert (received[-1].ask_price, received[-1].ask_quantity, received[-1].ask_count) == (101, 2, 1)
+        orderbook.cancel_order(second_order)
+        assert (received[-1].ask_price, received[-1].ask_quantity, received[-1].ask_count) == (102, 1, 1)
+        assert len(received) == 5
+        orderbook.unsubscribe_bbo(received.append)
+
+    def test_get_best_price__bids(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that the best price of bids is the highest one
+
+        @pre-conditions:
+        1. Create order book (with static quotes)
+        2. Place buy limit orders by 98, 99, 97 and sell limit orders by 102, 101
+
+        @steps:
+        1. Get the best bids and asks
+
+        @assertions:
+        1. Bids are from the highest price, asks are from the lowest price
+        """
+        quotes = QuotesPublisher()
+        quotes.current_quotes = {symbol1.name: 100}
+        orderbook = OrderBook(Deep(5, 5), quotes)
+        for price, action in ((98, OrderAction.BUY), (99, OrderAction.BUY), (97, OrderAction.BUY),
+                              (102, OrderAction.SELL), (101, OrderAction.SELL)):
+            orderbook.place_order(LimitOrder(symbol1, price, 1, action))
+
+        assert [order.price for order in orderbook.get_best_price(OrderAction.BUY, 2)] == [99, 98]
+        assert [order.price for order in orderbook.get_best_price(OrderAction.SELL)] == [101, 102]
+
+
+class TestShardedOrderBook:
+    def test_place_orders_by_shards(self):
+        """
+        @description:
+        Here we would like to make sure that orders are matched in the shards of their symbols and
+        market data of all shards is merged
+
+        @pre-conditions:
+        1. Create symbols of both shards
+        2. Start sharded order book with 2 shards (with static quotes)
+
+        @steps:
+        1. Place a batch of sell limit orders (one per symbol)
+        2. Place buy limit order that partially fills the sell order of the first symbol
+        3. Cancel the rest of the sell order of the last symbol
+        4. Stop sharded order book and place order
+
+        @assertions:
+        1. Symbols are in different shards and the shard of the symbol is always the same
+        2. Caller's orders get status and quantity from the shards
+        3. Market data of the symbol and merged market data of all symbols are correct
+        4. Order is found by id in its shard
+        5. ShardedOrderBookIsStoppedError is raised by place_order and get_order_by_id after stop
+        """
+        symbols = [Symbol(f'symbol{i}', 'exchange1', SymbolType.STOCK, Currency.USD) for i in range(1, 5)]
+        assert {get_shard(symbol.name, 2) for symbol in symbols} == {0, 1}
+        assert [get_shard(symbol.name, 2) for symbol in symbols] == [get_shard(symbol.name, 2) for symbol in symbols]
+
+        sell_orders = [LimitOrder(symbol, 100 + i, 5, OrderAction.SELL) for i, symbol in enumerate(symbols)]
+        with ShardedOrderBook(Deep(2, 2), shards_count=2, quotes_factory=QuotesPublisher) as orderbook:
+            results = orderbook.place_orders(sell_orders)
+            assert [result.order for result in results] == sell_orders
+            assert all(result.is_placed for result in results)
+            assert all(order.status == OrderStatus.PENDING for order in sell_orders)
+
+            buy_order = LimitOrder(symbols[0], 100, 2, OrderAction.BUY)
+            executions = orderbook.place_order(buy_order)
+            assert len(executions) == 1 and executions[0].sell_order_id == sell_orders[0].id
+            assert buy_order.status == OrderStatus.FILL
+            assert orderbook.get_order_by_id(sell_orders[0].id).quantity == 3
+            assert orderbook.get_market_data(symbols[0]) == {'asks': [{'price': 100, 'quantity': 3}], 'bids': []}
+
+            orderbook.cancel_order(sell_orders[-1])
+            assert sell_orders[-1].status == OrderStatus.CANCEL
+            assert orderbook.get_market_data() == {'asks': [{'price': 100, 'quantity': 3},
+                                                            {'price': 101, 'quantity': 5}], 'bids': []}
+            assert orderbook.get_bbo(symbols[1]).ask_price == 101
+
+        with pytest.raises(ShardedOrderBookIsStoppedError):
+            orderbook.place_order(LimitOrder(symbols[0], 100, 1, OrderAction.BUY))
+        with pytest.raises(ShardedOrderBookIsStoppedError):
+            orderbook.get_order_by_id(sell_orders[0].id)
+
+    def test_place_orders_by_shards__errors(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that errors of the shard are returned to the caller
+
+        @pre-conditions:
+        1. Start sharded order book with 2 shards (with static quotes)
+        2. Place sell limit order
+
+        @steps:
+        1. Place the same order again (single and in a batch)
+        2. Place a batch with the same new order twice
+
+        @assertions:
+        1. OrderAlreadyCreatedError is raised by place_order
+        2. place_orders returns the error in the result of the order
+        3. The first copy of the order in the batch is placed, the second one gets OrderAlreadyCreatedError
+        """
+        order = LimitOrder(symbol1, 100, 5, OrderAction.SELL)
+        with ShardedOrderBook(Deep(5, 5), shards_count=2, quotes_factory=QuotesPublisher) as orderbook:
+            orderbook.place_order(order)
+            with pytest.raises(OrderAlreadyCreatedError):
+                orderbook.place_order(order)
+            result = orderbook.place_orders([order])[0]
+            assert not result.is_placed and isinstance(result.error, OrderAlreadyCreatedError)
+
+            new_order = LimitOrder(symbol1, 101, 5, OrderAction.SELL)
+            results = orderbook.place_orders([new_order, new_order])
+            assert results[0].is_placed and results[0].error is None
+            assert not results[1].is_placed and isinstance(results[1].error, OrderAlreadyCreatedError)
+            assert new_order.status == OrderStatus.PENDING
+
+    def test_amend_order_by_shards__finished_or_unknown(self, symbol1):
+        """
+        @description:
+        Here we would like to make sure that errors of the shard that can't be created by their arguments
+        are returned to the caller and the shard keeps working
+
+        @pre-conditions:
+        1. Start sharded order book with 2 shards (with static quotes)
+        2. Place sell limit order and buy limit order that fills it
+
+        @steps:
+        1. Amend order that isn't placed
+        2. Amend and cancel the filled order
+        3. Get BBO of the symbol's shard
+
+        @assertions:
+        1. OrderIsNotAmendableError and OrderIsNotWaitingError are raised with the shard's messages
+        2. The shard answers the next request
+        """
+        sell_order = LimitOrder(symbol1, 100, 5, OrderAction.SELL)
+        unknown_order = LimitOrder(symbol1, 100, 5, OrderAction.SELL)
+        with ShardedOrderBook(Deep(5, 5), shards_count=2, quotes_factory=QuotesPublisher) as orderbook:
+            orderbook.place_order(sell_order)
+            orderbook.place_order(LimitOrder(symbol1, 100, 5, OrderAction.BUY))
+
+            with pytest.raises(OrderIsNotAmendableError) as error:
+                orderbook.amend_order(unknown_order, 11)
+            assert str(unknown_order.id) in error.value.msg
+            with pytest.raises(OrderIsNotAmendableError):
+                orderbook.amend_order(sell_order, None, 1)
+            with pytest.raises(OrderIsNotWaitingError):
+                orderbook.cancel_order(sell_order)
+            assert orderbook.get_bbo(symbol1).ask_price is None
+
+    def test_merge_depths(self):
+        """
+        @description:
+        Here we would like to make sure that levels of several books are merged by price
+
+        @steps:
+        1. Merge bids and asks of two books
+
+        @assertions:
+        1. Levels are sorted from the best price, levels with the same price are summed up, count is kept
+        """
+        first = [{'price': 101, 'quantity': 1}, {'price': 100, 'quantity': 2}]
+        second = [{'price': 100, 'quantity': 3}, {'price': 99, 'quantity': 4}]
+        assert merge_depths([first, second], 2, OrderAction.BUY) == [{'price': 101, 'quantity': 1},
+                                                                     {'price': 100, 'quantity': 5}]
+        assert merge_depths([first[::-1], second[::-1]], 3, OrderAction.SELL) == [{'price': 99, 'quantity': 4},
+                                                                                 {'price': 100, 'quantity': 5},
+                                                                                 {'price': 101, 'quantity': 1}]